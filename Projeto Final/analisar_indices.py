@@ -0,0 +1,69 @@
+import argparse
+import json
+import sys
+
+from config.db import get_db, engine
+from benchmark import CASOS, _amostras
+from services.analise_indices import (
+    ColetorInstrucoes, analisar, verificar_recomendacoes, RECOMENDACOES, LINHAS_MINIMAS_PADRAO,
+)
+from services.cache import cache_referencia
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Roda as consultas dos controllers e de vw_consultas_futuras sob EXPLAIN "
+                                                 "e aponta varreduras completas, filesorts e tabelas temporárias.")
+    parser.add_argument("--apenas", action="append", default=[], help="Só os casos do benchmark que contêm este texto")
+    parser.add_argument("--linhas-minimas", type=int, default=LINHAS_MINIMAS_PADRAO,
+                        help="Ignora varreduras completas estimadas abaixo disso (só MySQL)")
+    parser.add_argument("--sql", action="store_true", help="Mostra o SQL completo de cada instrução com problema")
+    parser.add_argument("--saida", help="Grava o relatório completo (com os planos) em JSON")
+    args = parser.parse_args()
+
+    casos = [(n, f) for n, f in CASOS if not args.apenas or any(a in n for a in args.apenas)]
+
+    with get_db() as db:
+        amostras = _amostras(db)
+
+    cache_referencia.invalidar()
+    with ColetorInstrucoes(engine) as coletor:
+        for nome, funcao in casos:
+            coletor.caso = nome
+            with get_db() as db:
+                resultado = funcao(db, amostras)
+                # Consome geradores (iter_*), para as consultas de todas as páginas rodarem
+                if hasattr(resultado, "__next__"):
+                    for _ in resultado:
+                        pass
+
+    with engine.connect() as conn:
+        analises = analisar(conn, coletor.instrucoes, args.linhas_minimas)
+
+    com_problema = [a for a in analises if a[2]]
+    print(f"{len(analises)} instruções analisadas, {len(com_problema)} com problemas:\n")
+    for instrucao, _, problemas in com_problema:
+        print(f"• {instrucao.origem}")
+        for problema in problemas:
+            tabela = f" em {problema.tabela}" if problema.tabela else ""
+            print(f"    {problema.tipo}{tabela}: {problema.detalhe}")
+        sql = " ".join(instrucao.sql.split())
+        print(f"    {sql if args.sql else sql[:150]}")
+
+    print("\nÍndices recomendados (migrations/005_indices_consulta.sql):")
+    for nome, origens in verificar_recomendacoes(analises).items():
+        tabela, colunas, motivo = RECOMENDACOES[nome]
+        situacao = f"usado por {', '.join(origens)}" if origens else "NÃO usado (índice ausente ou não se paga)"
+        print(f"  {nome} ON {tabela} ({', '.join(colunas)}) — {motivo}\n    {situacao}")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump([
+                {"origem": i.origem, "sql": i.sql, "plano": plano,
+                 "problemas": [p._asdict() for p in problemas]}
+                for i, plano, problemas in analises
+            ], f, ensure_ascii=False, indent=2, default=str)
+        print(f"\nRelatório gravado em {args.saida}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import argparse
+
+from config.db import get_db
+from services import auditoria
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Log de auditoria (criações e alterações de paciente, médico e consulta).")
+    parser.add_argument("--manter", action="store_true",
+                        help="Cria as partições mensais dos próximos meses e descarta as que passaram da retenção")
+    parser.add_argument("--retencao", type=int, default=auditoria.RETENCAO_MESES_PADRAO,
+                        help="Meses de log mantidos (padrão: %(default)s)")
+    parser.add_argument("--historico", nargs=2, metavar=("TABELA", "ID"),
+                        help="Mostra os eventos de um registro, ex.: --historico paciente 42")
+    parser.add_argument("--descarregar", action="store_true",
+                        help="Grava no banco os eventos pendentes de execuções anteriores")
+    args = parser.parse_args()
+
+    if not (args.manter or args.historico or args.descarregar):
+        parser.error("informe --manter, --historico e/ou --descarregar")
+
+    if args.descarregar:
+        auditoria.auditoria.iniciar()
+        auditoria.auditoria.encerrar()
+        print(f"✅ {auditoria.auditoria.gravados} eventos pendentes gravados.")
+
+    with get_db() as db:
+        if args.manter:
+            criadas, removidas = auditoria.manter_particoes(db, args.retencao)
+            print(f"✅ {criadas} partições criadas, {removidas} removidas (retenção de {args.retencao} meses).")
+        if args.historico:
+            tabela, registro_id = args.historico
+            for data_hora, operacao, dados in auditoria.historico(db, tabela, int(registro_id)):
+                print(f"{data_hora}  {operacao:<12} {dados or ''}")
+
+
+if __name__ == "__main__":
+    main()
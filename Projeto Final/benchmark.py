@@ -0,0 +1,259 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text, func
+
+from config.db import get_db, engine, DATABASE_URL
+from controllers import paciente_controller, medico_controller, especialidade_controller, consulta_controller, receita_controller
+from models.paciente import Paciente
+from models.medico import Medico
+from models.consulta import Consulta
+from services.cache import cache_referencia
+from services.instrumentacao import instrumentacao
+
+# Tolerância padrão na comparação: 20% mais lento que a base conta como regressão
+TOLERANCIA_PADRAO = 0.20
+
+
+def _contar(resultado):
+    """
+    Quantidade de linhas devolvidas (consome geradores de lotes/páginas).
+    """
+    if resultado is None or isinstance(resultado, bool):
+        return int(bool(resultado))
+    if isinstance(resultado, tuple) and len(resultado) == 3 and isinstance(resultado[0], list):
+        return len(resultado[0]) + len(resultado[1])  # get_alteracoes_pacientes
+    if hasattr(resultado, "__iter__") and not hasattr(resultado, "__len__"):
+        return sum(len(item) if isinstance(item, list) else 1 for item in resultado)
+    if hasattr(resultado, "__len__"):
+        return len(resultado)
+    return 1
+
+
+def _amostras(db):
+    """
+    Parâmetros reais para os casos (ids e nomes existentes no banco).
+    """
+    consulta_id = db.query(func.max(Consulta.id)).scalar()
+    if not consulta_id:
+        raise SystemExit("Banco sem dados: rode gerar_dados.py antes do benchmark.")
+    # Paciente e médico de uma consulta real, para as buscas relacionadas devolverem linhas
+    consulta = db.query(Consulta.paciente_id, Consulta.medico_id).filter(Consulta.id == consulta_id).one()
+    paciente = db.query(Paciente.id, Paciente.nome).filter(Paciente.id == consulta.paciente_id).one()
+    medico = db.query(Medico.id, Medico.nome, Medico.especialidade_id).filter(Medico.id == consulta.medico_id).one()
+    # Horário bem no futuro e fora do expediente gerado, para não conflitar
+    data = datetime.now().replace(hour=7, minute=0, second=0, microsecond=0) + timedelta(days=3650)
+    return {
+        "paciente_id": paciente.id,
+        "paciente_nome": paciente.nome.split()[-1],
+        "medico_id": medico.id,
+        "medico_nome": medico.nome.split()[-1],
+        "especialidade_id": medico.especialidade_id,
+        "consulta_id": consulta_id,
+        "data_livre": data,
+    }
+
+
+def _ciclo_paciente(db, a):
+    p = paciente_controller.create_paciente(db, "Benchmark Paciente", "999.999.999-99")
+    paciente_controller.update_paciente(db, p.id, telefone="(11) 90000-0000")
+    return paciente_controller.delete_paciente(db, p.id)
+
+
+def _ciclo_medico(db, a):
+    m = medico_controller.create_medico(db, "Dr(a). Benchmark", "CRM-BENCH", a["especialidade_id"])
+    medico_controller.update_medico(db, m.id, nome="Dr(a). Benchmark Atualizado")
+    return medico_controller.delete_medico(db, m.id)
+
+
+def _ciclo_especialidade(db, a):
+    e = especialidade_controller.create_especialidade(db, "Benchmark")
+    especialidade_controller.update_especialidade(db, e.id, nome="Benchmark Atualizada")
+    return especialidade_controller.delete_especialidade(db, e.id)
+
+
+def _ciclo_consulta(db, a):
+    consulta_controller.create_consulta(db, a["paciente_id"], a["medico_id"], None, a["data_livre"])
+    consulta_id = db.query(func.max(Consulta.id)).scalar()
+    consulta_controller.update_consulta(db, consulta_id, observacoes="benchmark")
+    return consulta_controller.delete_consulta(db, consulta_id)
+
+
+def _ciclo_consultas_bulk(db, a):
+    inicio = a["data_livre"] + timedelta(days=1)
+    consultas = consulta_controller.consultas_recorrentes(
+        a["paciente_id"], a["medico_id"], None, inicio, quantidade=50, intervalo=timedelta(days=1)
+    )
+    total, _ = consulta_controller.create_consultas_bulk(db, consultas)
+    db.execute(text("DELETE FROM consulta WHERE medico_id = :m AND data_consulta >= :d"),
+               {"m": a["medico_id"], "d": inicio})
+    db.commit()
+    consulta_controller.agenda.limpar()
+    return total
+
+
+# (nome, função(db, amostras)). Escritas rodam em ciclo criar/atualizar/apagar
+# para o banco terminar igual ao que estava.
+CASOS = [
+    ("paciente_controller.get_paciente_by_id", lambda db, a: paciente_controller.get_paciente_by_id(db, a["paciente_id"])),
+    ("paciente_controller.get_all_pacientes", lambda db, a: paciente_controller.get_all_pacientes(db)),
+    ("paciente_controller.buscar_pacientes_por_nome", lambda db, a: paciente_controller.buscar_pacientes_por_nome(db, a["paciente_nome"])),
+    ("paciente_controller.buscar_pacientes_resumo_por_nome", lambda db, a: paciente_controller.buscar_pacientes_resumo_por_nome(db, a["paciente_nome"])),
+    ("paciente_controller.iter_pacientes", lambda db, a: paciente_controller.iter_pacientes(db)),
+    ("paciente_controller.get_pacientes_pagina", lambda db, a: paciente_controller.get_pacientes_pagina(db)),
+    ("paciente_controller.iter_paginas_pacientes", lambda db, a: paciente_controller.iter_paginas_pacientes(db)),
+    ("paciente_controller.get_alteracoes_pacientes", lambda db, a: paciente_controller.get_alteracoes_pacientes(db)),
+    ("paciente_controller.create_update_delete", _ciclo_paciente),
+    ("medico_controller.get_medico_by_id", lambda db, a: medico_controller.get_medico_by_id(db, a["medico_id"])),
+    ("medico_controller.get_all_medicos", lambda db, a: medico_controller.get_all_medicos(db)),
+    ("medico_controller.listar_medicos_com_especialidades", lambda db, a: medico_controller.listar_medicos_com_especialidades(db)),
+    ("medico_controller.listar_medicos_resumo", lambda db, a: medico_controller.listar_medicos_resumo(db)),
+    ("medico_controller.buscar_medicos_por_nome", lambda db, a: medico_controller.buscar_medicos_por_nome(db, a["medico_nome"])),
+    ("medico_controller.create_update_delete", _ciclo_medico),
+    ("especialidade_controller.get_especialidade_by_id", lambda db, a: especialidade_controller.get_especialidade_by_id(db, a["especialidade_id"])),
+    ("especialidade_controller.get_all_especialidades", lambda db, a: especialidade_controller.get_all_especialidades(db)),
+    ("especialidade_controller.create_update_delete", _ciclo_especialidade),
+    ("consulta_controller.get_consulta_by_id", lambda db, a: consulta_controller.get_consulta_by_id(db, a["consulta_id"])),
+    ("consulta_controller.get_all_consultas", lambda db, a: consulta_controller.get_all_consultas(db)),
+    ("consulta_controller.iter_consultas", lambda db, a: consulta_controller.iter_consultas(db)),
+    ("consulta_controller.get_consultas_pagina", lambda db, a: consulta_controller.get_consultas_pagina(db)),
+    ("consulta_controller.iter_paginas_consultas", lambda db, a: consulta_controller.iter_paginas_consultas(db)),
+    ("consulta_controller.get_consultas_by_paciente_id", lambda db, a: consulta_controller.get_consultas_by_paciente_id(db, a["paciente_id"])),
+    ("consulta_controller.listar_consultas_resumo_por_paciente", lambda db, a: consulta_controller.listar_consultas_resumo_por_paciente(db, a["paciente_id"])),
+    ("consulta_controller.get_consultas_futuras", lambda db, a: consulta_controller.get_consultas_futuras(db)),
+    ("consulta_controller.get_consultas_proximos_dias", lambda db, a: consulta_controller.get_consultas_proximos_dias(db, 7)),
+    ("consulta_controller.buscar_consultas", lambda db, a: consulta_controller.buscar_consultas(db, medico=a["medico_nome"])),
+    ("consulta_controller.get_horarios_livres", lambda db, a: consulta_controller.get_horarios_livres(db, especialidade_id=a["especialidade_id"])),
+    ("consulta_controller.get_todas_clinicas", lambda db, a: consulta_controller.get_todas_clinicas(db)),
+    ("consulta_controller.create_update_delete", _ciclo_consulta),
+    ("consulta_controller.create_consultas_bulk", _ciclo_consultas_bulk),
+    ("receita_controller.get_receitas_por_consultas", lambda db, a: receita_controller.get_receitas_por_consultas(
+        db, range(a["consulta_id"] - 499, a["consulta_id"] + 1))),
+    ("receita_controller.get_consultas_com_receitas_by_paciente_id", lambda db, a: receita_controller.get_consultas_com_receitas_by_paciente_id(db, a["paciente_id"])),
+    ("vw_consultas_futuras.count", lambda db, a: db.execute(text("SELECT COUNT(*) FROM vw_consultas_futuras")).fetchall()),
+    ("vw_consultas_futuras.primeiras_200", lambda db, a: db.execute(text(
+        "SELECT * FROM vw_consultas_futuras ORDER BY data_consulta LIMIT 200")).fetchall()),
+]
+
+
+def medir(nome, funcao, amostras, repeticoes):
+    """
+    Roda o caso uma vez "a frio" (caches e índices vazios) e depois 'repeticoes'
+    vezes, cada uma numa sessão nova. Tempos em milissegundos.
+    """
+    tempos, linhas = [], 0
+    instrucoes_antes = instrumentacao.total_instrucoes()
+    for i in range(repeticoes + 1):
+        with get_db() as db:
+            inicio = time.perf_counter()
+            linhas = _contar(funcao(db, amostras))
+            tempos.append((time.perf_counter() - inicio) * 1000)
+    primeira, demais = tempos[0], sorted(tempos[1:]) or tempos
+    return {
+        "nome": nome,
+        "primeira_ms": round(primeira, 3),
+        "min_ms": round(demais[0], 3),
+        "mediana_ms": round(statistics.median(demais), 3),
+        "p95_ms": round(demais[min(len(demais) - 1, int(len(demais) * 0.95))], 3),
+        "linhas": linhas,
+        "instrucoes_sql": (instrumentacao.total_instrucoes() - instrucoes_antes) // (repeticoes + 1),
+    }
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _escala(db):
+    return {
+        tabela: db.execute(text(f"SELECT COUNT(*) FROM {tabela}")).scalar()
+        for tabela in ("paciente", "medico", "especialidade", "clinica", "consulta", "receita_medica")
+    }
+
+
+def comparar(base, atual, tolerancia=TOLERANCIA_PADRAO):
+    """
+    Compara as medianas de dois resultados. Retorna a lista de regressões
+    (nome, mediana_base, mediana_atual, variação).
+    """
+    anteriores = {r["nome"]: r for r in base["resultados"]}
+    regressoes = []
+    for r in atual["resultados"]:
+        anterior = anteriores.get(r["nome"])
+        if not anterior or anterior["mediana_ms"] <= 0:
+            continue
+        variacao = r["mediana_ms"] / anterior["mediana_ms"] - 1
+        marca = "❌" if variacao > tolerancia else "  "
+        print(f"{marca} {r['nome']:<55} {anterior['mediana_ms']:>10.2f} -> {r['mediana_ms']:>10.2f} ms ({variacao:+.0%})", file=sys.stderr)
+        if variacao > tolerancia:
+            regressoes.append((r["nome"], anterior["mediana_ms"], r["mediana_ms"], variacao))
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o tempo das funções dos controllers e da view vw_consultas_futuras.")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Execuções por caso, além da primeira (a frio)")
+    parser.add_argument("--apenas", action="append", default=[], help="Roda só os casos que contêm este texto")
+    parser.add_argument("--pular", action="append", default=[], help="Pula os casos que contêm este texto")
+    parser.add_argument("--saida", help="Arquivo JSON com os resultados (padrão: stdout)")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para detectar regressões")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO,
+                        help="Aumento relativo da mediana aceito antes de acusar regressão (0.2 = 20%%)")
+    parser.add_argument("--instrumentar", action="store_true",
+                        help="Conta as instruções SQL de cada caso e inclui as suspeitas de N+1 no JSON")
+    args = parser.parse_args()
+
+    if args.instrumentar:
+        instrumentacao.instalar(engine)
+
+    casos = [(n, f) for n, f in CASOS
+             if (not args.apenas or any(a in n for a in args.apenas)) and not any(p in n for p in args.pular)]
+
+    with get_db() as db:
+        amostras = _amostras(db)
+        escala = _escala(db)
+
+    resultados = []
+    for nome, funcao in casos:
+        cache_referencia.invalidar()
+        resultado = medir(nome, funcao, amostras, args.repeticoes)
+        print(f"{nome:<55} {resultado['mediana_ms']:>10.2f} ms  ({resultado['linhas']} linhas)", file=sys.stderr)
+        resultados.append(resultado)
+
+    saida = {
+        "commit": _commit_atual(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "banco": DATABASE_URL.split("://")[0],
+        "escala": escala,
+        "repeticoes": args.repeticoes,
+        "resultados": resultados,
+    }
+    if args.instrumentar:
+        saida["n_mais_1"] = instrumentacao.relatorio()["n_mais_1"]
+    texto = json.dumps(saida, ensure_ascii=False, indent=2, default=str)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    else:
+        print(texto)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+        regressoes = comparar(base, saida, args.tolerancia)
+        if regressoes:
+            print(f"⚠️ {len(regressoes)} regressão(ões) acima de {args.tolerancia:.0%}.", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,360 @@
 # config/db.py
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import os
+import time
+import logging
+import functools
+import threading
+from itertools import count
+from contextlib import contextmanager
 
-# Ajuste aqui os dados conforme seu MySQL
-USER = 'root'
-PASSWORD = 'pedro'
-HOST = '127.0.0.1'
-PORT = '3306'
-DB_NAME = 'projeto_final'
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker, scoped_session, declarative_base
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import TextClause
+
+# Ajuste aqui os dados conforme seu MySQL (ou use as variáveis de ambiente DB_*)
+USER = os.getenv('DB_USER', 'root')
+PASSWORD = os.getenv('DB_PASSWORD', 'pedro')
+HOST = os.getenv('DB_HOST', '127.0.0.1')
+PORT = os.getenv('DB_PORT', '3306')
+DB_NAME = os.getenv('DB_NAME', 'projeto_final')
+
+# URL de conexão (DATABASE_URL tem prioridade sobre os campos acima)
+DATABASE_URL = os.getenv(
+    'DATABASE_URL',
+    f'mysql+mysqlconnector://{USER}:{PASSWORD}@{HOST}:{PORT}/{DB_NAME}'
+)
+
+
+def _env_bool(nome, padrao=False):
+    valor = os.getenv(nome)
+    if valor is None:
+        return padrao
+    return valor.strip().lower() in ('1', 'true', 'yes', 'sim', 'on')
+
+
+def _env_int(nome, padrao):
+    valor = os.getenv(nome)
+    return int(valor) if valor not in (None, '') else padrao
+
+
+def configuracao_pool():
+    """
+    Lê as configurações do pool de conexões das variáveis de ambiente.
+    """
+    return {
+        'pool_size': _env_int('DB_POOL_SIZE', 5),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+        'isolation_level': os.getenv('DB_ISOLATION_LEVEL') or None,
+        'echo': _env_bool('DB_ECHO', False),
+    }
+
+
+def criar_engine(url: str = None, **overrides):
+    """
+    Cria uma engine com pool de conexões configurado pelo ambiente.
+    Parâmetros passados em overrides têm prioridade sobre as variáveis DB_*.
+    """
+    url = url or DATABASE_URL
+    config = configuracao_pool()
+    config.update(overrides)
+
+    # O log de SQL vai para o logging (e não direto para o stdout)
+    if config.pop('echo'):
+        logging.getLogger('sqlalchemy.engine').setLevel(logging.INFO)
+
+    if config['isolation_level'] is None:
+        config.pop('isolation_level')
+
+    if not url.startswith('sqlite'):
+        return create_engine(url, **config)
+
+    # SQLite não usa QueuePool com tamanho configurável
+    for chave in ('pool_size', 'max_overflow', 'pool_recycle'):
+        config.pop(chave, None)
+    nova = create_engine(url, **config)
+    event.listen(nova, 'connect', _ativar_chaves_estrangeiras)
+    return nova
+
+
+def _ativar_chaves_estrangeiras(conexao, _):
+    # No SQLite as chaves estrangeiras (e o ON DELETE CASCADE / SET NULL de que
+    # dependem as deleções de paciente e médico) ficam desligadas por conexão
+    conexao.execute('PRAGMA foreign_keys=ON')
 
-# URL de conexão
-DATABASE_URL = f'mysql+mysqlconnector://{USER}:{PASSWORD}@{HOST}:{PORT}/{DB_NAME}'
 
 # Criar engine
-engine = create_engine(DATABASE_URL, echo=True)
+engine = criar_engine()
+
+# Estatísticas de SQL por função de controller (ver services/instrumentacao.py)
+if _env_bool('DB_INSTRUMENTAR'):
+    from services.instrumentacao import instrumentacao
+
+    instrumentacao.instalar(engine)
+    if os.getenv('DB_INSTRUMENTAR_ARQUIVO'):
+        instrumentacao.iniciar_dump(
+            os.getenv('DB_INSTRUMENTAR_ARQUIVO'), _env_int('DB_INSTRUMENTAR_INTERVALO', 60)
+        )
+
+# -------------------- RÉPLICAS DE LEITURA --------------------
+
+# URLs das réplicas, separadas por vírgula (vazio: tudo vai para o primário)
+REPLICA_URLS = [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+
+# Chave em Session.info que marca uma chamada somente leitura (ver somente_leitura)
+LEITURA = 'somente_leitura'
+
+
+class Roteador:
+    """
+    Escolhe a engine de cada instrução: escritas no primário, leituras nas
+    réplicas saudáveis em rodízio. Uma thread verifica as réplicas a cada
+    'intervalo_verificacao' segundos (SELECT 1 e, no MySQL, o atraso da replicação);
+    as que falham ficam fora do rodízio até responderem de novo.
+
+    Depois de uma escrita, as leituras de todo o processo voltam para o primário
+    por 'janela_escrita' segundos, para não ler de uma réplica atrasada o que
+    acabou de ser gravado. Uma réplica no rodízio pode estar até 'atraso_maximo'
+    segundos atrás, então a janela nunca é menor que esse atraso.
+    """
+
+    def __init__(self, primario, replicas, intervalo_verificacao: float = 10.0,
+                 janela_escrita: float = 30.0, atraso_maximo: int = 30):
+        self.primario = primario
+        self.replicas = list(replicas)
+        self.intervalo_verificacao = intervalo_verificacao
+        self.janela_escrita = max(janela_escrita, atraso_maximo)
+        self.atraso_maximo = atraso_maximo
+        self._saudaveis = list(self.replicas)
+        self._rodizio = count()
+        self._ultima_escrita = float('-inf')
+        self._verificacao = None
+
+    def replica(self):
+        """
+        Próxima réplica saudável (rodízio), ou None se nenhuma estiver disponível.
+        """
+        saudaveis = self._saudaveis
+        if not saudaveis:
+            return None
+        return saudaveis[next(self._rodizio) % len(saudaveis)]
+
+    def saudavel(self, replica):
+        return replica in self._saudaveis
+
+    def registrar_escrita(self):
+        self._ultima_escrita = time.monotonic()
+
+    def escrita_recente(self):
+        return time.monotonic() - self._ultima_escrita < self.janela_escrita
+
+    def _saudavel(self, replica):
+        try:
+            with replica.connect() as conexao:
+                conexao.execute(text('SELECT 1'))
+                if replica.dialect.name != 'mysql':
+                    return True
+                try:
+                    status = conexao.execute(text('SHOW REPLICA STATUS')).mappings().first()
+                except SQLAlchemyError:
+                    return True  # Sem permissão para ver o status: vale o SELECT 1
+                atraso = status and status.get('Seconds_Behind_Source')
+                return atraso is None or atraso <= self.atraso_maximo
+        except SQLAlchemyError as e:
+            print(f"Réplica {replica.url.host or replica.url.database} fora do rodízio: {e}")
+            return False
+
+    def marcar_falha(self, replica):
+        """
+        Tira a réplica do rodízio até a próxima verificação bem-sucedida.
+        """
+        self._saudaveis = [r for r in self._saudaveis if r is not replica]
+
+    def verificar(self):
+        """
+        Atualiza a lista de réplicas saudáveis. Retorna quantas estão no rodízio.
+        """
+        self._saudaveis = [replica for replica in self.replicas if self._saudavel(replica)]
+        return len(self._saudaveis)
+
+    def iniciar_verificacao(self):
+        if self._verificacao is not None or not self.replicas:
+            return
+        parar = threading.Event()
+
+        def laco():
+            # A primeira verificação é logo ao iniciar (fora da thread principal)
+            self.verificar()
+            while not parar.wait(self.intervalo_verificacao):
+                self.verificar()
+
+        thread = threading.Thread(target=laco, name='verificacao-replicas', daemon=True)
+        thread.start()
+        self._verificacao = (thread, parar)
+
+
+def _escreve(clause):
+    """
+    INSERT/UPDATE/DELETE, SELECT ... FOR UPDATE e SQL textual que não seja SELECT
+    (ex.: CALL agendar_consulta) precisam do primário.
+    """
+    if isinstance(clause, UpdateBase):
+        return True
+    if isinstance(clause, TextClause):
+        return not clause.text.lstrip().upper().startswith(('SELECT', 'WITH'))
+    return getattr(clause, '_for_update_arg', None) is not None
+
+
+class SessaoRoteada(Session):
+    """
+    Sessão que manda para as réplicas as leituras feitas dentro de funções
+    marcadas com @somente_leitura. Todo o resto vai para o primário, e a sessão
+    fica presa ao primário depois da primeira escrita (lê o que ela mesma gravou).
+    Uma sessão usa sempre a mesma réplica até ser fechada, para que leituras da
+    mesma transação vejam o mesmo estado do banco, a não ser que ela saia do
+    rodízio: aí a sessão passa para outra réplica saudável (ou para o primário).
+    """
+
+    def __init__(self, *args, roteador: Roteador = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.roteador = roteador
+        self.fixada_no_primario = False
+        self.replica = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        roteador = self.roteador
+        if roteador is None:
+            return super().get_bind(mapper, clause=clause, **kwargs)
+        if self._flushing or _escreve(clause):
+            self.fixada_no_primario = True
+            roteador.registrar_escrita()
+            return roteador.primario
+        if self.fixada_no_primario or not self.info.get(LEITURA) or roteador.escrita_recente():
+            return roteador.primario
+        if self.replica is None or not roteador.saudavel(self.replica):
+            self.replica = roteador.replica()
+        return self.replica or roteador.primario
+
+    def close(self):
+        super().close()
+        self.fixada_no_primario = False
+        self.replica = None
+
+
+def somente_leitura(funcao):
+    """
+    Marca uma função de controller (primeiro argumento: a sessão) como somente
+    leitura: com réplicas configuradas, suas consultas podem ir para uma réplica.
+    Sem réplicas (ou com outro tipo de sessão), não muda nada.
+    """
+    @functools.wraps(funcao)
+    def envolvida(db, *args, **kwargs):
+        with leitura_em_replica(db):
+            return funcao(db, *args, **kwargs)
+    return envolvida
+
+
+@contextmanager
+def leitura_em_replica(db):
+    """
+    Igual a @somente_leitura, para um trecho de código:
+
+        with leitura_em_replica(db):
+            exportar_consultas(db, ...)
+    """
+    anterior = db.info.get(LEITURA)
+    db.info[LEITURA] = True
+    try:
+        yield db
+    finally:
+        db.info[LEITURA] = anterior
+
+
+@contextmanager
+def leitura_no_primario(db):
+    """
+    Força o primário num trecho de uma função @somente_leitura, para leituras que
+    não podem ver uma réplica atrasada (ex.: marcas d'água por data de alteração).
+    """
+    anterior = db.info.get(LEITURA)
+    db.info[LEITURA] = False
+    try:
+        yield db
+    finally:
+        db.info[LEITURA] = anterior
+
+
+def criar_roteador(urls=None, primario=None, **opcoes):
+    """
+    Roteador com uma engine (e um pool) por réplica, mesmas configurações do primário.
+    """
+    replicas = [criar_engine(url) for url in (REPLICA_URLS if urls is None else urls)]
+    roteador = Roteador(primario or engine, replicas, **opcoes)
+
+    for replica in replicas:
+        def ao_falhar(contexto, replica=replica):
+            # Conexão perdida: sai do rodízio já, sem esperar a próxima verificação
+            if contexto.is_disconnect:
+                roteador.marcar_falha(replica)
+        event.listen(replica, 'handle_error', ao_falhar)
+    return roteador
+
 
 # Criar sessão
-SessionLocal = sessionmaker(bind=engine)
+if REPLICA_URLS:
+    roteador = criar_roteador(
+        intervalo_verificacao=float(os.getenv('DB_REPLICA_VERIFICACAO', '10')),
+        janela_escrita=float(os.getenv('DB_REPLICA_JANELA_ESCRITA', '30')),
+        atraso_maximo=_env_int('DB_REPLICA_ATRASO_MAXIMO', 30),
+    )
+    roteador.iniciar_verificacao()
+    SessionLocal = sessionmaker(bind=engine, class_=SessaoRoteada, roteador=roteador)
+else:
+    roteador = None
+    SessionLocal = sessionmaker(bind=engine)
+
+# Sessão por thread: cada worker recebe sua própria conexão do pool
+ScopedSession = scoped_session(SessionLocal)
+
+
+@contextmanager
+def get_db():
+    """
+    Abre uma sessão do pool e garante o fechamento (e rollback em caso de erro).
+
+        with get_db() as db:
+            paciente_controller.get_all_pacientes(db)
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def aquecer_pool(conexoes: int = 1):
+    """
+    Abre (e devolve ao pool) algumas conexões, para que a primeira consulta
+    da aplicação não pague o custo de conectar. A engine só conecta aqui ou no
+    primeiro uso, nunca na importação deste módulo.
+    """
+    abertas = []
+    try:
+        for _ in range(conexoes):
+            conexao = engine.connect()
+            conexao.execute(text('SELECT 1'))
+            abertas.append(conexao)
+    finally:
+        for conexao in abertas:
+            conexao.close()
+
 
 # Base para os modelos
 Base = declarative_base()
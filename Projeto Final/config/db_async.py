@@ -0,0 +1,64 @@
+# config/db_async.py
+
+import os
+from contextlib import asynccontextmanager
+
+from config.db import DATABASE_URL, configuracao_pool
+
+# Driver assíncrono (pip install aiomysql). Pode ser trocado por ASYNC_DATABASE_URL.
+ASYNC_DATABASE_URL = os.getenv(
+    'ASYNC_DATABASE_URL',
+    DATABASE_URL.replace('mysql+mysqlconnector://', 'mysql+aiomysql://', 1)
+)
+
+_async_engine = None
+_AsyncSessionLocal = None
+
+
+def criar_async_engine(url: str = None, **overrides):
+    """
+    Cria a engine assíncrona com as mesmas configurações de pool da engine síncrona.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = url or ASYNC_DATABASE_URL
+    config = configuracao_pool()
+    config.update(overrides)
+    config.pop('echo')
+    if config['isolation_level'] is None:
+        config.pop('isolation_level')
+    if url.startswith('sqlite'):
+        for chave in ('pool_size', 'max_overflow', 'pool_recycle'):
+            config.pop(chave, None)
+    return create_async_engine(url, **config)
+
+
+def get_async_engine():
+    """
+    Engine assíncrona do processo, criada só no primeiro uso
+    (assim quem não usa asyncio não precisa ter o driver instalado).
+    """
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        _async_engine = criar_async_engine()
+        _AsyncSessionLocal = async_sessionmaker(bind=_async_engine, expire_on_commit=False)
+    return _async_engine
+
+
+@asynccontextmanager
+async def get_async_db():
+    """
+    Abre uma AsyncSession. Cada tarefa concorrente (asyncio.gather) deve usar a sua.
+
+        async with get_async_db() as db:
+            pacientes = await paciente_controller_async.get_all_pacientes(db)
+    """
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception:
+            await db.rollback()
+            raise
@@ -0,0 +1,24 @@
+import argparse
+
+from config.db import get_db
+from services import consultas_futuras
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manutenção da tabela consulta_futura (consultas futuras materializadas).")
+    parser.add_argument("--reconstruir", action="store_true", help="Recria a tabela a partir de consulta")
+    parser.add_argument("--expirar", action="store_true", help="Remove as consultas que já passaram (para agendar no cron)")
+    args = parser.parse_args()
+
+    if not args.reconstruir and not args.expirar:
+        parser.error("informe --reconstruir e/ou --expirar")
+
+    with get_db() as db:
+        if args.reconstruir:
+            print(f"✅ consulta_futura reconstruída: {consultas_futuras.reconstruir(db)} consultas.")
+        if args.expirar:
+            print(f"✅ {consultas_futuras.expirar(db)} consultas passadas removidas.")
+
+
+if __name__ == "__main__":
+    main()
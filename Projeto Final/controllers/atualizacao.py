@@ -0,0 +1,39 @@
+from sqlalchemy import update, inspect
+from sqlalchemy.orm import Session
+
+
+def colunas_para_atualizar(modelo, valores: dict):
+    """
+    Traduz os nomes recebidos (inclusive sinônimos, ex.: id_medico) para os
+    atributos mapeados. 'versao' não pode ser alterada diretamente.
+    """
+    mapper = inspect(modelo)
+    resolvidos = {}
+    for chave, valor in valores.items():
+        if chave in mapper.synonyms:
+            chave = mapper.synonyms[chave].name
+        if chave not in mapper.column_attrs or chave in ("id", "versao"):
+            raise ValueError(f"{modelo.__name__} não tem o campo atualizável '{chave}'.")
+        resolvidos[chave] = valor
+    return resolvidos
+
+
+def atualizar_em_lote(db: Session, modelo, valores: dict, criterios, versao: int = None):
+    """
+    Um único UPDATE modelo SET valores, versao = versao + 1 WHERE criterios.
+    Com 'versao', só altera as linhas que ainda estão nessa versão (concorrência otimista).
+    Modelos sem a coluna versao (ex.: ReceitaMedica) recebem só os valores.
+    Não faz commit. Retorna a quantidade de linhas afetadas.
+    """
+    valores = colunas_para_atualizar(modelo, valores)
+    if not valores:
+        return 0
+    if "versao" in inspect(modelo).column_attrs:
+        valores["versao"] = modelo.versao + 1
+    elif versao is not None:
+        raise ValueError(f"{modelo.__name__} não tem controle de versão.")
+    query = update(modelo).where(*criterios).values(**valores)
+    if versao is not None:
+        query = query.where(modelo.versao == versao)
+    # Sem sincronizar a sessão: o commit do chamador expira os objetos carregados
+    return db.execute(query.execution_options(synchronize_session=False)).rowcount
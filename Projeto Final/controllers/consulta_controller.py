@@ -1,20 +1,41 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import text, select, insert, func, or_
 from sqlalchemy.exc import SQLAlchemyError
 from models.consulta import Consulta
 from models.medico import Medico
 from models.clinica import Clinica
-from models.paciente import Paciente
-from datetime import datetime, date
+from collections import Counter, namedtuple
+from datetime import datetime, date, time, timedelta
+from controllers import paciente_controller, medico_controller
+from controllers.paginacao import iter_stream, pagina_por_chave, iter_paginas
+from controllers.atualizacao import atualizar_em_lote, colunas_para_atualizar
+from services.disponibilidade import Agenda, agenda, STATUS_LIVRES
+from services.cache import cache_referencia, carregar_desanexado
+from services import resumo_consultas, consultas_futuras
+from services.consultas_futuras import consulta_futura
+from services.auditoria import auditoria, INSERCAO, ALTERACAO, ALTERACAO_EM_LOTE
+from config.db import somente_leitura
 
 # -------------------- CRUD CONSULTA --------------------
 
 def create_consulta(db: Session, id_paciente: int, id_medico: int, id_clinica: int, data_consulta, observacoes=None):
     """
     Agenda uma consulta usando a procedure SQL 'agendar_consulta'.
+    Recusa o agendamento se o médico já tiver consulta nesse horário (checado
+    no banco, com a linha do médico travada até o commit).
     Retorna True se sucesso, False se erro.
     """
     try:
+        data = _para_datetime(data_consulta)
+    except ValueError as e:
+        print(f"Erro ao agendar consulta: data inválida ({e})")
+        return False
+    try:
+        conflito = _conflito_no_banco(db, id_medico, data) if id_medico else None
+        if conflito:
+            db.rollback()
+            print(f"Erro ao agendar consulta: o médico {id_medico} já tem a consulta {conflito} nesse horário.")
+            return False
         db.execute(text(
             "CALL agendar_consulta(:p_paciente_id, :p_medico_id, :p_clinica_id, :p_data, :p_obs)"
         ), {
@@ -24,61 +45,515 @@ def create_consulta(db: Session, id_paciente: int, id_medico: int, id_clinica: i
             "p_data": data_consulta,
             "p_obs": observacoes
         })
+        resumo_consultas.registrar(db, [{
+            "medico_id": id_medico, "clinica_id": id_clinica, "data_consulta": data, "status": None,
+        }])
+        consultas_futuras.atualizar(db, Consulta.paciente_id == id_paciente, Consulta.data_consulta == data)
+        consulta_id = db.execute(query_id_agendada(id_paciente, id_medico, data)).scalar()
         db.commit()
+        auditoria.registrar("consulta", consulta_id, INSERCAO, {
+            "paciente_id": id_paciente, "medico_id": id_medico, "clinica_id": id_clinica,
+            "data_consulta": data, "observacoes": observacoes,
+        })
         return True
     except SQLAlchemyError as e:
         db.rollback()
         print(f"Erro ao agendar consulta: {e}")
         return False
 
+TAMANHO_LOTE_CONSULTAS = 500
+
+def _para_datetime(valor):
+    if isinstance(valor, datetime):
+        return valor
+    if isinstance(valor, date):
+        return datetime.combine(valor, time())
+    return datetime.fromisoformat(str(valor))
+
+def query_id_agendada(id_paciente: int, id_medico: int, data: datetime):
+    """
+    Id da consulta que a procedure 'agendar_consulta' acabou de gravar (ela não
+    o devolve). Rodar antes do commit, na mesma transação do CALL.
+    """
+    return select(func.max(Consulta.id)).where(
+        Consulta.paciente_id == id_paciente, Consulta.medico_id == id_medico, Consulta.data_consulta == data,
+    )
+
+# -------------------- CONFLITO DE HORÁRIO --------------------
+
+def travar_medico(medico_id: int):
+    """
+    SELECT ... FOR UPDATE na linha do médico. Dois agendamentos para o mesmo
+    médico (em threads ou terminais diferentes) ficam em fila: o segundo só
+    checa o conflito depois do commit do primeiro.
+    """
+    return select(Medico.id).where(Medico.id == medico_id).with_for_update()
+
+def query_conflito(medico_id: int, inicio: datetime, fim: datetime, ignorar_id: int = None):
+    """
+    Consultas do médico que ocupam horário entre 'inicio' e 'fim' (exclusivos),
+    pelo índice (medico_id, data_consulta). Leitura com trava: vê o que já foi
+    gravado por outras transações, não a foto do início desta.
+    """
+    criterios = [
+        Consulta.medico_id == medico_id,
+        Consulta.data_consulta > inicio,
+        Consulta.data_consulta < fim,
+        or_(Consulta.status.is_(None), Consulta.status.not_in(STATUS_LIVRES)),
+    ]
+    if ignorar_id is not None:
+        criterios.append(Consulta.id != ignorar_id)
+    return (
+        select(Consulta.id, Consulta.data_consulta)
+        .where(*criterios)
+        .order_by(Consulta.data_consulta)
+        .with_for_update(read=True)
+    )
+
+def _conflito_no_banco(db: Session, medico_id: int, data: datetime, ignorar_id: int = None):
+    """
+    Trava o médico e retorna o id da consulta que ocupa o horário, ou None.
+    A trava vale até o commit/rollback de quem chamou.
+    """
+    db.execute(travar_medico(medico_id))
+    duracao = agenda.expediente(medico_id).duracao
+    conflito = db.execute(query_conflito(medico_id, data - duracao, data + duracao, ignorar_id).limit(1)).first()
+    return conflito.id if conflito else None
+
+# Colunas lidas para a agenda em memória
+COLUNAS_AGENDA = (Consulta.id, Consulta.medico_id, Consulta.data_consulta, Consulta.status, Consulta.versao)
+
+def _sincronizar_agenda(db: Session):
+    """
+    Iguala a agenda em memória (consultas de ontem em diante) ao banco: lê o
+    (id, versao) de cada consulta e relê só as novas ou alteradas; as que sumiram
+    saem. Pega inserções, alterações, cancelamentos e deleções de outros processos.
+    A agenda só é usada para listar horários livres; o conflito na gravação é
+    checado no banco (_conflito_no_banco).
+    """
+    desde = datetime.now() - timedelta(days=1)
+    if not agenda.carregada:
+        agenda.carregar(iter_stream(db.query(*COLUNAS_AGENDA).filter(Consulta.data_consulta >= desde)))
+        return agenda
+    versoes = dict(db.execute(select(Consulta.id, Consulta.versao).where(Consulta.data_consulta >= desde)).all())
+    alteradas, removidas = agenda.desatualizadas(versoes)
+    for consulta_id in removidas:
+        agenda.remover(consulta_id)
+    for inicio in range(0, len(alteradas), TAMANHO_LOTE_CONSULTAS):
+        agenda.aplicar(db.execute(
+            select(*COLUNAS_AGENDA).where(Consulta.id.in_(alteradas[inicio:inicio + TAMANHO_LOTE_CONSULTAS]))
+        ))
+    return agenda
+
+def get_horarios_livres(db: Session, quantidade: int = 10, especialidade_id: int = None,
+                        medico_id: int = None, clinica_id: int = None, a_partir: datetime = None):
+    """
+    Retorna os próximos horários livres como pares (data, medico_id).
+    Filtra por um médico específico ou por todos os médicos de uma especialidade.
+    """
+    try:
+        if medico_id:
+            medicos_ids = [medico_id]
+        else:
+            query = db.query(Medico.id)
+            if especialidade_id:
+                query = query.filter(Medico.especialidade_id == especialidade_id)
+            medicos_ids = [m_id for (m_id,) in query]
+        _sincronizar_agenda(db)
+        return agenda.proximos_livres(medicos_ids, a_partir or datetime.now(), quantidade, clinica_id)
+    except SQLAlchemyError as e:
+        print(f"Erro ao buscar horários livres: {e}")
+        return []
+
+def _agora_no_banco(db: Session):
+    agora = db.execute(select(func.now())).scalar()
+    return _para_datetime(agora)
+
+def consultas_recorrentes(id_paciente: int, id_medico: int, id_clinica: int, primeira_data,
+                          quantidade: int, intervalo: timedelta = timedelta(weeks=1), observacoes=None):
+    """
+    Monta a lista de consultas de um tratamento recorrente (ex.: 20 sessões semanais),
+    no formato aceito por create_consultas_bulk.
+    """
+    primeira_data = _para_datetime(primeira_data)
+    return [
+        {
+            "id_paciente": id_paciente,
+            "id_medico": id_medico,
+            "id_clinica": id_clinica,
+            "data_consulta": primeira_data + intervalo * i,
+            "observacoes": observacoes,
+        }
+        for i in range(quantidade)
+    ]
+
+def _inserir_lote_consultas(db: Session, lote):
+    """
+    Insere um lote com um INSERT multi-linha dentro de um SAVEPOINT.
+    Se o lote falhar, refaz linha a linha para descobrir quais falharam.
+    Retorna (inseridas, falhas).
+    """
+    try:
+        with db.begin_nested():
+            db.execute(insert(Consulta.__table__).values([linha for _, linha in lote]))
+        return len(lote), []
+    except SQLAlchemyError:
+        pass
+
+    inseridas, falhas = 0, []
+    for indice, linha in lote:
+        try:
+            with db.begin_nested():
+                db.execute(insert(Consulta.__table__).values(linha))
+            inseridas += 1
+        except SQLAlchemyError as e:
+            falhas.append((indice, str(getattr(e, "orig", e))))
+    return inseridas, falhas
+
+def _ids_agendadas(db: Session, linhas):
+    """
+    Ids das consultas recém-inseridas (o INSERT multi-linha não os devolve),
+    na ordem de 'linhas', pelo mesmo critério de query_id_agendada.
+    Rodar antes do commit, na mesma transação dos INSERTs.
+    """
+    if not linhas:
+        return []
+    ids = {}
+    query = select(Consulta.id, Consulta.paciente_id, Consulta.medico_id, Consulta.data_consulta).where(
+        Consulta.paciente_id.in_({linha["paciente_id"] for linha in linhas}),
+        Consulta.data_consulta.in_({linha["data_consulta"] for linha in linhas}),
+    )
+    for consulta_id, paciente_id, medico_id, data in db.execute(query):
+        chave = (paciente_id, medico_id, _para_datetime(data))
+        ids[chave] = max(consulta_id, ids.get(chave, consulta_id))
+    return [ids.get((linha["paciente_id"], linha["medico_id"], linha["data_consulta"])) for linha in linhas]
+
+def create_consultas_bulk(db: Session, consultas, tamanho_lote: int = TAMANHO_LOTE_CONSULTAS):
+    """
+    Agenda várias consultas em uma única transação, com INSERTs em lote.
+    Cada item é um dict com id_paciente, id_medico, id_clinica, data_consulta e,
+    opcionalmente, observacoes (mesmos parâmetros de create_consulta).
+
+    Faz o mesmo INSERT da procedure agendar_consulta, então o trigger
+    before_insert_consulta continua valendo; datas no passado já são recusadas
+    antes do envio para não derrubar o lote inteiro. Os médicos envolvidos
+    ficam travados até o commit e o conflito é checado contra o banco.
+
+    Retorna (total_agendadas, falhas), onde falhas é uma lista de (índice, motivo).
+    Se a transação falhar, nenhuma é gravada: as consultas do lote que falhou
+    vêm com o erro e as dos outros lotes, como desfeitas.
+    """
+    falhas = []
+    candidatas = []
+    for indice, item in enumerate(consultas):
+        try:
+            data = _para_datetime(item["data_consulta"])
+            if data.tzinfo is not None:
+                # A coluna é DATETIME sem fuso, no horário local do banco
+                raise ValueError(f"data com fuso horário: {item['data_consulta']!r}")
+            linha = {
+                "paciente_id": item["id_paciente"],
+                "medico_id": item["id_medico"],
+                "clinica_id": item["id_clinica"],
+                "data_consulta": data,
+                "observacoes": item.get("observacoes"),
+            }
+        except (KeyError, TypeError, ValueError) as e:
+            falhas.append((indice, f"Dados inválidos: {e}"))
+            continue
+        candidatas.append((indice, linha))
+
+    # Horários já ocupados no banco, por médico, no período do lote (com os médicos travados)
+    ocupadas = Agenda()
+    try:
+        agora = _agora_no_banco(db)
+        datas_por_medico = {}
+        for _, linha in candidatas:
+            if linha["medico_id"]:
+                datas_por_medico.setdefault(linha["medico_id"], []).append(linha["data_consulta"])
+        # Sempre na mesma ordem, para dois lotes concorrentes não travarem um ao outro
+        for medico_id in sorted(datas_por_medico):
+            db.execute(travar_medico(medico_id))
+            duracao = agenda.expediente(medico_id).duracao
+            datas = datas_por_medico[medico_id]
+            for consulta_id, data in db.execute(query_conflito(medico_id, min(datas) - duracao, max(datas) + duracao)):
+                ocupadas.registrar(consulta_id, medico_id, _para_datetime(data))
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"Erro ao agendar consultas em lote: {e}")
+        return 0, sorted(falhas + [(indice, str(e)) for indice, _ in candidatas])
+
+    validas = []
+    for indice, linha in candidatas:
+        data, medico_id = linha["data_consulta"], linha["medico_id"]
+        if data < agora:
+            falhas.append((indice, "Não é possível agendar uma consulta no passado."))
+            continue
+        if medico_id:
+            if ocupadas.conflito(medico_id, data, agenda.expediente(medico_id).duracao):
+                falhas.append((indice, "O médico já tem consulta nesse horário."))
+                continue
+            # Também conflita com as próximas do próprio lote
+            ocupadas.registrar(-(indice + 1), medico_id, data)
+        validas.append((indice, linha))
+
+    total = 0
+    inseridas_total = []
+    rejeitadas = list(falhas)
+    lote = []
+    try:
+        for inicio in range(0, len(validas), tamanho_lote):
+            lote = validas[inicio:inicio + tamanho_lote]
+            inseridas, falhas_lote = _inserir_lote_consultas(db, lote)
+            total += inseridas
+            falhas.extend(falhas_lote)
+            recusadas = {indice for indice, _ in falhas_lote}
+            inseridas_lote = [linha for indice, linha in lote if indice not in recusadas]
+            resumo_consultas.registrar(db, inseridas_lote)
+            inseridas_total.extend({"id": consulta_id, **linha} for consulta_id, linha
+                                   in zip(_ids_agendadas(db, inseridas_lote), inseridas_lote))
+            if inseridas_lote:
+                consultas_futuras.atualizar(
+                    db,
+                    Consulta.paciente_id.in_({linha["paciente_id"] for linha in inseridas_lote}),
+                    Consulta.data_consulta.in_({linha["data_consulta"] for linha in inseridas_lote}),
+                )
+        # Falha no commit: todas as enviadas fazem parte do lote que falhou
+        lote = validas
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"Erro ao agendar consultas em lote: {e}")
+        no_lote = {indice for indice, _ in lote}
+        motivo = str(getattr(e, "orig", e))
+        desfeitas = [(indice, motivo if indice in no_lote else "Não gravada: outro lote da transação falhou.")
+                     for indice, _ in validas]
+        return 0, sorted(rejeitadas + desfeitas)
+
+    auditoria.registrar_varios("consulta", INSERCAO, inseridas_total)
+    falhas.sort()
+    return total, falhas
+
+@somente_leitura
 def get_consultas_futuras(db: Session, data_minima: date = None):
     """
-    Retorna uma lista de consultas futuras da view vw_consultas_futuras.
+    Retorna uma lista de consultas futuras (tabela consulta_futura, mesmas colunas
+    de vw_consultas_futuras), em ordem de data.
     Se data_minima for fornecida, filtra consultas com data_consulta >= data_minima.
     """
     try:
-        if data_minima:
-            # Filtra com data_consulta >= data_minima usando SQL raw query
-            query = text("SELECT * FROM vw_consultas_futuras WHERE data_consulta >= :data_minima ORDER BY data_consulta")
-            result = db.execute(query, {"data_minima": data_minima})
-        else:
-            query = text("SELECT * FROM vw_consultas_futuras ORDER BY data_consulta")
-            result = db.execute(query)
-        return result.fetchall()
+        return db.execute(montar_query_consultas(data_inicio=data_minima, limite=None)).fetchall()
     except SQLAlchemyError as e:
         print(f"Erro ao buscar consultas futuras: {e}")
         return []
 
+@somente_leitura
+def get_consultas_proximos_dias(db: Session, dias: int = 7, limite: int = None, **filtros):
+    """
+    Consultas de agora até daqui a 'dias' dias (leitura por faixa no índice de data).
+    """
+    agora = datetime.now()
+    return buscar_consultas(db, limite=limite, data_inicio=agora, data_fim=agora + timedelta(days=dias), **filtros)
+
+# -------------------- BUSCA FILTRADA --------------------
+
+LIMITE_PADRAO_CONSULTAS = 200
+
+def montar_query_consultas(paciente: str = None, medico: str = None, clinica: str = None,
+                           especialidade: str = None, status: str = None,
+                           data_inicio: date = None, data_fim: date = None,
+                           limite: int = LIMITE_PADRAO_CONSULTAS):
+    """
+    Monta um SELECT parametrizado sobre consulta_futura (cópia desnormalizada das
+    consultas futuras, ver services/consultas_futuras.py) com os filtros informados.
+    Filtros de texto são por "contém" (sem diferenciar maiúsculas); data_fim é inclusiva.
+    As datas viram uma faixa no índice de data_consulta, sem JOIN nem ordenação de tudo.
+    Retorna o Select, que ainda pode receber mais .where()/.order_by() antes de executar.
+    """
+    cf = consulta_futura
+    query = select(cf.c.consulta_id, cf.c.paciente, cf.c.medico, cf.c.especialidade,
+                   cf.c.clinica, cf.c.data_consulta, cf.c.status)
+
+    filtros_texto = {
+        cf.c.paciente: paciente,
+        cf.c.medico: medico,
+        cf.c.clinica: clinica,
+        cf.c.especialidade: especialidade,
+    }
+    for coluna, valor in filtros_texto.items():
+        if valor:
+            query = query.where(coluna.ilike(f"%{valor}%"))
+
+    if status:
+        query = query.where(cf.c.status == status)
+    # Linhas que já passaram mas ainda não foram expiradas não contam
+    query = query.where(cf.c.data_consulta >= func.now())
+    if data_inicio:
+        query = query.where(cf.c.data_consulta >= data_inicio)
+    if data_fim:
+        # Data sem hora: inclui o dia inteiro
+        if not isinstance(data_fim, datetime):
+            query = query.where(cf.c.data_consulta < data_fim + timedelta(days=1))
+        else:
+            query = query.where(cf.c.data_consulta <= data_fim)
+
+    query = query.order_by(cf.c.data_consulta, cf.c.consulta_id)
+    if limite:
+        query = query.limit(limite)
+    return query
+
+@somente_leitura
+def buscar_consultas(db: Session, limite: int = LIMITE_PADRAO_CONSULTAS, **filtros):
+    """
+    Busca consultas futuras filtrando direto no banco (ver montar_query_consultas).
+    Retorna no máximo 'limite' linhas.
+    """
+    try:
+        return db.execute(montar_query_consultas(limite=limite, **filtros)).fetchall()
+    except SQLAlchemyError as e:
+        print(f"Erro ao buscar consultas: {e}")
+        return []
+
 def get_consulta_by_id(db: Session, consulta_id: int):
     """
     Busca uma consulta pelo ID.
     """
     return db.query(Consulta).filter(Consulta.id == consulta_id).first()
 
+@somente_leitura
 def get_all_consultas(db: Session):
     """
     Retorna todas as consultas cadastradas.
     """
     return db.query(Consulta).all()
 
-def update_consulta(db: Session, consulta_id: int, **kwargs):
+def iter_consultas(db: Session, tamanho_lote: int = 1000):
     """
-    Atualiza campos de uma consulta pelo ID.
+    Percorre todas as consultas em memória constante (stream_results + yield_per).
+    """
+    return iter_stream(db.query(Consulta).order_by(Consulta.id), tamanho_lote)
+
+def get_consultas_pagina(db: Session, apos_id: int = None, limite: int = 100):
+    """
+    Retorna até 'limite' consultas com id > apos_id, ordenadas por id.
+    Para a próxima página, passe o id da última consulta retornada.
+    """
+    try:
+        return pagina_por_chave(db.query(Consulta), Consulta.id, apos_id, limite)
+    except SQLAlchemyError as e:
+        print(f"Erro ao buscar página de consultas: {e}")
+        return []
+
+def iter_paginas_consultas(db: Session, tamanho_pagina: int = 1000):
+    """
+    Gera páginas de consultas via keyset pagination (sem OFFSET).
+    """
+    return iter_paginas(db.query(Consulta), Consulta.id, tamanho_pagina)
+
+def update_consulta(db: Session, consulta_id: int, versao: int = None, **kwargs):
+    """
+    Atualiza campos de uma consulta pelo ID, recusando conflito de horário do médico.
+    A gravação é um único UPDATE; com 'versao', não sobrescreve a alteração feita
+    por outro usuário. Retorna a consulta atualizada ou None (campo desconhecido,
+    conflito de horário ou consulta alterada por outro usuário).
     """
-    consulta = get_consulta_by_id(db, consulta_id)
-    if not consulta:
-        return None
     try:
-        for key, value in kwargs.items():
-            setattr(consulta, key, value)
+        # Linha travada até o commit: a imagem "antes" do resumo não pode mudar no meio
+        consulta = (db.query(Consulta).filter(Consulta.id == consulta_id)
+                    .with_for_update().populate_existing().first())
+        if not consulta:
+            db.rollback()
+            return None
+        valores = colunas_para_atualizar(Consulta, kwargs)
+        medico_id = valores.get("medico_id", consulta.medico_id)
+        status = valores.get("status", consulta.status)
+        if medico_id and status not in STATUS_LIVRES and {"data_consulta", "medico_id", "status"} & valores.keys():
+            conflito = _conflito_no_banco(
+                db, medico_id, _para_datetime(valores.get("data_consulta", consulta.data_consulta)), ignorar_id=consulta.id
+            )
+            if conflito:
+                db.rollback()
+                print(f"Erro ao atualizar consulta: o médico já tem a consulta {conflito} nesse horário.")
+                return None
+        antes = {"medico_id": consulta.medico_id, "clinica_id": consulta.clinica_id,
+                 "data_consulta": consulta.data_consulta, "status": consulta.status}
+        afetados = atualizar_em_lote(db, Consulta, valores, [Consulta.id == consulta_id], versao)
+        if afetados and {"data_consulta", "medico_id", "clinica_id", "status"} & valores.keys():
+            resumo_consultas.registrar(db, [antes], sinal=-1)
+            resumo_consultas.registrar(db, [{**antes, **valores}])
+        if afetados:
+            consultas_futuras.atualizar(db, Consulta.id == consulta_id)
         db.commit()
+        if valores and not afetados:
+            print(f"Erro ao atualizar consulta: a consulta {consulta_id} foi alterada por outro usuário.")
+            return None
         db.refresh(consulta)
+        agenda.registrar(consulta.id, consulta.medico_id, consulta.data_consulta, consulta.status, consulta.versao)
+        if afetados:
+            auditoria.registrar("consulta", consulta_id, ALTERACAO, valores)
         return consulta
-    except SQLAlchemyError as e:
+    except (SQLAlchemyError, ValueError) as e:
         db.rollback()
         print(f"Erro ao atualizar consulta: {e}")
         return None
 
+def update_consultas_em_lote(db: Session, valores: dict, *criterios, versao: int = None):
+    """
+    Aplica 'valores' a todas as consultas que atendem aos critérios com um único UPDATE.
+    Não muda médico nem horário (isso exige checar conflito consulta a consulta: use update_consulta).
+    Retorna a quantidade de consultas alteradas.
+    """
+    valores = colunas_para_atualizar(Consulta, valores)
+    if {"medico_id", "data_consulta"} & valores.keys():
+        raise ValueError("Médico e horário não podem ser alterados em lote; use update_consulta.")
+    try:
+        # Consultas de ontem em diante: as únicas que estão na agenda em memória e em consulta_futura
+        desde = datetime.now() - timedelta(days=1)
+        ids = db.execute(select(Consulta.id).where(*criterios, Consulta.data_consulta >= desde)).scalars().all()
+        mudam_resumo = {"clinica_id", "status"} & valores.keys()
+        if mudam_resumo:
+            # Imagem "antes" (com as linhas travadas até o commit) para mover as contagens do resumo
+            filtro_versao = [Consulta.versao == versao] if versao is not None else []
+            antes = resumo_consultas.contagem(db, *criterios, *filtro_versao, travar=True)
+        afetados = atualizar_em_lote(db, Consulta, valores, criterios, versao)
+        if mudam_resumo and afetados:
+            deltas = Counter()
+            for (dia, medico_id, clinica_id, especialidade_id, status), n in antes.items():
+                deltas[(dia, medico_id, clinica_id, especialidade_id, status)] -= n
+                deltas[(dia, medico_id, valores.get("clinica_id", clinica_id) or 0, especialidade_id,
+                        valores.get("status", status))] += n
+            resumo_consultas.ajustar(db, deltas)
+        for inicio in range(0, len(ids), TAMANHO_LOTE_CONSULTAS):
+            consultas_futuras.atualizar(db, Consulta.id.in_(ids[inicio:inicio + TAMANHO_LOTE_CONSULTAS]))
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"Erro ao atualizar consultas em lote: {e}")
+        return 0
+    if afetados:
+        auditoria.registrar("consulta", None, ALTERACAO_EM_LOTE, {"valores": valores, "linhas": afetados})
+    if not agenda.carregada or "status" not in valores:
+        return afetados
+    # Cancelar/reativar muda a ocupação da agenda em memória
+    for inicio in range(0, len(ids), TAMANHO_LOTE_CONSULTAS):
+        agenda.aplicar(db.query(*COLUNAS_AGENDA)
+                       .filter(Consulta.id.in_(ids[inicio:inicio + TAMANHO_LOTE_CONSULTAS])))
+    return afetados
+
+def cancelar_consultas_do_medico(db: Session, medico_id: int, dia: date):
+    """
+    Marca como 'Cancelada' todas as consultas do médico no dia (um único UPDATE).
+    Retorna a quantidade de consultas canceladas.
+    """
+    inicio = datetime.combine(dia, time())
+    return update_consultas_em_lote(
+        db, {"status": "Cancelada"},
+        Consulta.medico_id == medico_id,
+        Consulta.data_consulta >= inicio,
+        Consulta.data_consulta < inicio + timedelta(days=1),
+        Consulta.status != "Cancelada",
+    )
+
 def delete_consulta(db: Session, consulta_id: int):
     """
     Deleta uma consulta pelo ID.
@@ -87,8 +562,11 @@ def delete_consulta(db: Session, consulta_id: int):
     if not consulta:
         return False
     try:
+        resumo_consultas.registrar(db, [consulta], sinal=-1)
+        consultas_futuras.remover(db, consulta_futura.c.consulta_id == consulta_id)
         db.delete(consulta)
         db.commit()
+        agenda.remover(consulta_id)
         return True
     except SQLAlchemyError as e:
         db.rollback()
@@ -105,34 +583,72 @@ def get_consultas_by_paciente_id(db: Session, paciente_id: int):
         print(f"Erro ao buscar consultas do paciente {paciente_id}: {e}")
         return []
 
+def contar_consultas_do_paciente(db: Session, paciente_id: int):
+    """
+    Quantidade de consultas do paciente (um SELECT COUNT pelo índice de paciente_id).
+    Lida no primário: é a checagem feita antes de apagar o paciente.
+    """
+    try:
+        return db.execute(select(func.count()).where(Consulta.paciente_id == paciente_id)).scalar()
+    except SQLAlchemyError as e:
+        print(f"Erro ao contar consultas do paciente {paciente_id}: {e}")
+        return 0
+
+# Linha da listagem de consultas de um paciente, com nomes de médico e clínica
+ConsultaResumo = namedtuple("ConsultaResumo", ["id", "medico", "clinica", "data_consulta", "status"])
+
+@somente_leitura
+def listar_consultas_resumo_por_paciente(db: Session, paciente_id: int):
+    """
+    Consultas do paciente em ConsultaResumo (somente leitura), com médico e clínica
+    resolvidos no mesmo SELECT (LEFT JOIN), em ordem de data.
+    """
+    try:
+        query = (
+            db.query(Consulta.id, Medico.nome, Clinica.nome, Consulta.data_consulta, Consulta.status)
+            .outerjoin(Medico, Consulta.medico_id == Medico.id)
+            .outerjoin(Clinica, Consulta.clinica_id == Clinica.id)
+            .filter(Consulta.paciente_id == paciente_id)
+            .order_by(Consulta.data_consulta, Consulta.id)
+        )
+        return [ConsultaResumo._make(linha) for linha in query]
+    except SQLAlchemyError as e:
+        print(f"Erro ao buscar consultas do paciente {paciente_id}: {e}")
+        return []
+
 # -------------------- BUSCAS COMPLEMENTARES --------------------
 
 def buscar_medicos_por_nome(db: Session, nome: str):
     """
-    Busca médicos cujo nome contenha a string fornecida.
+    Busca médicos pelo nome (índice de trigramas, ignora acentos).
     """
     try:
-        return db.query(Medico).filter(Medico.nome.ilike(f"%{nome}%")).all()
+        return medico_controller.buscar_medicos_por_nome(db, nome)
     except SQLAlchemyError as e:
         print(f"Erro ao buscar médicos: {e}")
         return []
 
 def buscar_pacientes_por_nome(db: Session, nome: str):
     """
-    Busca pacientes cujo nome contenha a string fornecida.
+    Busca pacientes pelo nome (índice de trigramas, ignora acentos).
     """
     try:
-        return db.query(Paciente).filter(Paciente.nome.ilike(f"%{nome}%")).all()
+        return paciente_controller.buscar_pacientes_por_nome(db, nome)
     except SQLAlchemyError as e:
         print(f"Erro ao buscar pacientes: {e}")
         return []
 
+@somente_leitura
 def get_todas_clinicas(db: Session):
     """
-    Retorna todas as clínicas disponíveis.
+    Retorna todas as clínicas disponíveis (com cache, ver services/cache.py).
     """
     try:
-        return db.query(Clinica).all()
+        clinicas = cache_referencia.obter(
+            "clinicas:todas",
+            lambda: carregar_desanexado(db, lambda s: s.query(Clinica).all()),
+        )
+        return list(clinicas)
     except SQLAlchemyError as e:
         print(f"Erro ao buscar clínicas: {e}")
         return []
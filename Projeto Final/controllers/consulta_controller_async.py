@@ -0,0 +1,176 @@
+import asyncio
+from datetime import date, datetime
+
+from sqlalchemy import text, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from models.consulta import Consulta
+from config.db_async import get_async_db
+from controllers.consulta_controller import (
+    montar_query_consultas, _para_datetime, LIMITE_PADRAO_CONSULTAS, travar_medico, query_conflito,
+    query_id_agendada,
+)
+from controllers import consulta_controller, paciente_controller_async, medico_controller_async
+from services.disponibilidade import agenda
+from services import resumo_consultas, consultas_futuras
+from services.consultas_futuras import consulta_futura
+from services.auditoria import auditoria, INSERCAO
+
+# -------------------- CONFLITO DE HORÁRIO (ver consulta_controller) --------------------
+
+async def _conflito_no_banco(db: AsyncSession, medico_id: int, data: datetime, ignorar_id: int = None):
+    """
+    Ver consulta_controller._conflito_no_banco: trava o médico até o commit e checa no banco.
+    """
+    await db.execute(travar_medico(medico_id))
+    duracao = agenda.expediente(medico_id).duracao
+    result = await db.execute(query_conflito(medico_id, data - duracao, data + duracao, ignorar_id).limit(1))
+    conflito = result.first()
+    return conflito.id if conflito else None
+
+# -------------------- CRUD CONSULTA --------------------
+
+async def create_consulta(db: AsyncSession, id_paciente: int, id_medico: int, id_clinica: int, data_consulta, observacoes=None):
+    """
+    Agenda uma consulta usando a procedure SQL 'agendar_consulta'.
+    Retorna True se sucesso, False se erro.
+    """
+    try:
+        data = _para_datetime(data_consulta)
+    except ValueError as e:
+        print(f"Erro ao agendar consulta: data inválida ({e})")
+        return False
+    try:
+        conflito = await _conflito_no_banco(db, id_medico, data) if id_medico else None
+        if conflito:
+            await db.rollback()
+            print(f"Erro ao agendar consulta: o médico {id_medico} já tem a consulta {conflito} nesse horário.")
+            return False
+        await db.execute(text(
+            "CALL agendar_consulta(:p_paciente_id, :p_medico_id, :p_clinica_id, :p_data, :p_obs)"
+        ), {
+            "p_paciente_id": id_paciente,
+            "p_medico_id": id_medico,
+            "p_clinica_id": id_clinica,
+            "p_data": data_consulta,
+            "p_obs": observacoes
+        })
+        nova = {"medico_id": id_medico, "clinica_id": id_clinica, "data_consulta": data, "status": None}
+        await db.run_sync(lambda s: (
+            resumo_consultas.registrar(s, [nova]),
+            consultas_futuras.atualizar(s, Consulta.paciente_id == id_paciente, Consulta.data_consulta == data),
+        ))
+        consulta_id = (await db.execute(query_id_agendada(id_paciente, id_medico, data))).scalar()
+        await db.commit()
+        auditoria.registrar("consulta", consulta_id, INSERCAO, {
+            "paciente_id": id_paciente, "medico_id": id_medico, "clinica_id": id_clinica,
+            "data_consulta": data, "observacoes": observacoes,
+        })
+        return True
+    except SQLAlchemyError as e:
+        await db.rollback()
+        print(f"Erro ao agendar consulta: {e}")
+        return False
+
+async def get_consultas_futuras(db: AsyncSession, data_minima: date = None):
+    """
+    Retorna as consultas futuras (tabela consulta_futura).
+    """
+    return await buscar_consultas(db, limite=None, data_inicio=data_minima)
+
+async def buscar_consultas(db: AsyncSession, limite: int = LIMITE_PADRAO_CONSULTAS, **filtros):
+    """
+    Busca consultas futuras filtrando no banco (ver consulta_controller.montar_query_consultas).
+    """
+    try:
+        result = await db.execute(montar_query_consultas(limite=limite, **filtros))
+        return result.fetchall()
+    except SQLAlchemyError as e:
+        print(f"Erro ao buscar consultas: {e}")
+        return []
+
+async def get_consulta_by_id(db: AsyncSession, consulta_id: int):
+    return await db.get(Consulta, consulta_id)
+
+async def get_all_consultas(db: AsyncSession):
+    result = await db.execute(select(Consulta))
+    return result.scalars().all()
+
+async def get_consultas_pagina(db: AsyncSession, apos_id: int = None, limite: int = 100):
+    query = select(Consulta)
+    if apos_id is not None:
+        query = query.where(Consulta.id > apos_id)
+    result = await db.execute(query.order_by(Consulta.id).limit(limite))
+    return result.scalars().all()
+
+async def update_consulta(db: AsyncSession, consulta_id: int, versao: int = None, **kwargs):
+    """
+    Mesma atualização de consulta_controller.update_consulta (conflito de horário,
+    'versao' e campos desconhecidos), na sessão assíncrona.
+    """
+    return await db.run_sync(lambda s: consulta_controller.update_consulta(s, consulta_id, versao, **kwargs))
+
+async def delete_consulta(db: AsyncSession, consulta_id: int):
+    consulta = await get_consulta_by_id(db, consulta_id)
+    if not consulta:
+        return False
+    try:
+        await db.run_sync(lambda s: (
+            resumo_consultas.registrar(s, [consulta], sinal=-1),
+            consultas_futuras.remover(s, consulta_futura.c.consulta_id == consulta_id),
+        ))
+        await db.delete(consulta)
+        await db.commit()
+        agenda.remover(consulta_id)
+        return True
+    except SQLAlchemyError as e:
+        await db.rollback()
+        print(f"Erro ao deletar consulta: {e}")
+        return False
+
+async def get_consultas_by_paciente_id(db: AsyncSession, paciente_id: int):
+    try:
+        result = await db.execute(select(Consulta).where(Consulta.paciente_id == paciente_id))
+        return result.scalars().all()
+    except SQLAlchemyError as e:
+        print(f"Erro ao buscar consultas do paciente {paciente_id}: {e}")
+        return []
+
+# -------------------- BUSCAS COMPLEMENTARES --------------------
+
+async def buscar_medicos_por_nome(db: AsyncSession, nome: str):
+    try:
+        return await medico_controller_async.buscar_medicos_por_nome(db, nome)
+    except SQLAlchemyError as e:
+        print(f"Erro ao buscar médicos: {e}")
+        return []
+
+async def buscar_pacientes_por_nome(db: AsyncSession, nome: str):
+    try:
+        return await paciente_controller_async.buscar_pacientes_por_nome(db, nome)
+    except SQLAlchemyError as e:
+        print(f"Erro ao buscar pacientes: {e}")
+        return []
+
+async def get_todas_clinicas(db: AsyncSession):
+    # Mesmo cache da versão síncrona
+    return await db.run_sync(consulta_controller.get_todas_clinicas)
+
+# -------------------- PAINEL --------------------
+
+async def carregar_painel(limite: int = 50):
+    """
+    Carrega pacientes, médicos e próximas consultas ao mesmo tempo.
+    Cada leitura usa a sua própria sessão, pois uma AsyncSession não
+    pode ser usada por duas tarefas concorrentes.
+    """
+    async def com_sessao(funcao, *args, **kwargs):
+        async with get_async_db() as db:
+            return await funcao(db, *args, **kwargs)
+
+    pacientes, medicos, consultas = await asyncio.gather(
+        com_sessao(paciente_controller_async.get_pacientes_pagina, limite=limite),
+        com_sessao(medico_controller_async.listar_medicos_com_especialidades),
+        com_sessao(buscar_consultas, limite=limite),
+    )
+    return {"pacientes": pacientes, "medicos": medicos, "consultas": consultas}
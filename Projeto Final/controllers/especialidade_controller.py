@@ -1,33 +1,95 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
 from models.especialidade import Especialidade
+from models.medico import Medico
+from services.cache import cache_referencia, carregar_desanexado
+from controllers.atualizacao import atualizar_em_lote
+from services import consultas_futuras, resumo_consultas
+from config.db import somente_leitura
+
+def _invalidar_cache():
+    # A lista de médicos também mostra o nome da especialidade
+    cache_referencia.invalidar("especialidades:")
+    cache_referencia.invalidar("medicos:")
 
 def create_especialidade(db: Session, nome: str):
     especialidade = Especialidade(nome=nome)
     db.add(especialidade)
     db.commit()
     db.refresh(especialidade)
+    _invalidar_cache()
     return especialidade
 
 def get_especialidade_by_id(db: Session, especialidade_id: int):
     return db.query(Especialidade).filter(Especialidade.id == especialidade_id).first()
 
+@somente_leitura
 def get_all_especialidades(db: Session):
-    return db.query(Especialidade).all()
+    especialidades = cache_referencia.obter(
+        "especialidades:todas",
+        lambda: carregar_desanexado(db, lambda s: s.query(Especialidade).all()),
+    )
+    return list(especialidades)
 
-def update_especialidade(db: Session, especialidade_id: int, **kwargs):
-    especialidade = get_especialidade_by_id(db, especialidade_id)
-    if not especialidade:
+def update_especialidade(db: Session, especialidade_id: int, versao: int = None, **kwargs):
+    """
+    Atualiza a especialidade com um único UPDATE. Com 'versao', não sobrescreve a
+    alteração feita por outro usuário. Retorna a especialidade atualizada ou None
+    (campo desconhecido, especialidade inexistente ou alterada por outro usuário).
+    Sem campos, só retorna o cadastro atual.
+    """
+    if not kwargs:
+        return get_especialidade_by_id(db, especialidade_id)
+    try:
+        afetados = atualizar_em_lote(db, Especialidade, kwargs, [Especialidade.id == especialidade_id], versao)
+        if afetados and "nome" in kwargs:
+            consultas_futuras.renomear(db, "especialidade", [especialidade_id], kwargs["nome"])
+        db.commit()
+    except (SQLAlchemyError, ValueError) as e:
+        db.rollback()
+        print(f"Erro ao atualizar especialidade: {e}")
         return None
-    for key, value in kwargs.items():
-        setattr(especialidade, key, value)
-    db.commit()
-    db.refresh(especialidade)
-    return especialidade
+    if not afetados:
+        return None
+    _invalidar_cache()
+    return get_especialidade_by_id(db, especialidade_id)
+
+def update_especialidades_em_lote(db: Session, valores: dict, *criterios, versao: int = None):
+    """
+    Aplica 'valores' a todas as especialidades que atendem aos critérios com um único UPDATE.
+    Retorna a quantidade de especialidades alteradas.
+    """
+    try:
+        afetados = atualizar_em_lote(db, Especialidade, valores, criterios, versao)
+        if afetados and "nome" in valores:
+            renomeadas = select(Especialidade.id).where(Especialidade.nome == valores["nome"])
+            consultas_futuras.renomear(db, "especialidade", renomeadas, valores["nome"])
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"Erro ao atualizar especialidades em lote: {e}")
+        return 0
+    if afetados:
+        _invalidar_cache()
+    return afetados
 
 def delete_especialidade(db: Session, especialidade_id: int):
     especialidade = get_especialidade_by_id(db, especialidade_id)
     if not especialidade:
         return False
-    db.delete(especialidade)
-    db.commit()
+    try:
+        # O resumo guarda a especialidade: as consultas dos médicos dela mudam de chave
+        antes = resumo_consultas.contagem(db, Medico.especialidade_id == especialidade_id, travar=True)
+        db.delete(especialidade)
+        db.flush()
+        # medico.especialidade_id virou NULL (ON DELETE SET NULL)
+        resumo_consultas.mover(db, antes, especialidade_id=None)
+        consultas_futuras.atualizar_por(db, "especialidade_id", especialidade_id)
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"Erro ao deletar especialidade: {e}")
+        return False
+    _invalidar_cache()
     return True
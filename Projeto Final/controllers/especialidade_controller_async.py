@@ -0,0 +1,50 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from models.especialidade import Especialidade
+from models.medico import Medico
+from controllers import especialidade_controller
+from controllers.especialidade_controller import _invalidar_cache
+from services import consultas_futuras, resumo_consultas
+
+async def create_especialidade(db: AsyncSession, nome: str):
+    especialidade = Especialidade(nome=nome)
+    db.add(especialidade)
+    await db.commit()
+    await db.refresh(especialidade)
+    _invalidar_cache()
+    return especialidade
+
+async def get_especialidade_by_id(db: AsyncSession, especialidade_id: int):
+    return await db.get(Especialidade, especialidade_id)
+
+async def get_all_especialidades(db: AsyncSession):
+    # Mesmo cache da versão síncrona
+    return await db.run_sync(especialidade_controller.get_all_especialidades)
+
+async def update_especialidade(db: AsyncSession, especialidade_id: int, versao: int = None, **kwargs):
+    """
+    Mesma atualização de especialidade_controller.update_especialidade, na sessão assíncrona.
+    """
+    return await db.run_sync(
+        lambda s: especialidade_controller.update_especialidade(s, especialidade_id, versao, **kwargs)
+    )
+
+async def delete_especialidade(db: AsyncSession, especialidade_id: int):
+    especialidade = await get_especialidade_by_id(db, especialidade_id)
+    if not especialidade:
+        return False
+    try:
+        antes = await db.run_sync(
+            lambda s: resumo_consultas.contagem(s, Medico.especialidade_id == especialidade_id, travar=True)
+        )
+        await db.delete(especialidade)
+        await db.flush()
+        await db.run_sync(lambda s: (resumo_consultas.mover(s, antes, especialidade_id=None),
+                                     consultas_futuras.atualizar_por(s, "especialidade_id", especialidade_id)))
+        await db.commit()
+    except SQLAlchemyError as e:
+        await db.rollback()
+        print(f"Erro ao deletar especialidade: {e}")
+        return False
+    _invalidar_cache()
+    return True
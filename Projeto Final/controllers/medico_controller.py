@@ -1,37 +1,170 @@
+from collections import namedtuple
+from sqlalchemy import select
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.exc import SQLAlchemyError
 from models.medico import Medico
 from models.especialidade import Especialidade
+from models.consulta import Consulta
+from controllers.paginacao import iter_stream
+from controllers.atualizacao import atualizar_em_lote
+from services.indice_nomes import indice_medicos
+from services.cache import cache_referencia, carregar_desanexado
+from services import consultas_futuras, resumo_consultas
+from services.auditoria import auditoria, INSERCAO, ALTERACAO, ALTERACAO_EM_LOTE
+from config.db import somente_leitura
 
 def create_medico(db: Session, nome: str, crm: str, id_especialidade: int = None):
     medico = Medico(nome=nome, crm=crm, especialidade_id=id_especialidade)
     db.add(medico)
     db.commit()
     db.refresh(medico)
+    indice_medicos.adicionar(medico.id, medico.nome)
+    cache_referencia.invalidar("medicos:")
+    auditoria.registrar("medico", medico.id, INSERCAO, {"nome": nome, "crm": crm, "especialidade_id": id_especialidade})
     return medico
 
 def get_medico_by_id(db: Session, medico_id: int):
     return db.query(Medico).filter(Medico.id == medico_id).first()
 
+@somente_leitura
 def get_all_medicos(db: Session):
     return db.query(Medico).all()
 
+@somente_leitura
 def listar_medicos_com_especialidades(db: Session):
-    return db.query(Medico).options(joinedload(Medico.especialidade)).all()
+    # Lista muda pouco: fica em cache até expirar ou até um create/update/delete
+    medicos = cache_referencia.obter(
+        "medicos:com_especialidades",
+        lambda: carregar_desanexado(db, lambda s: s.query(Medico).options(joinedload(Medico.especialidade)).all()),
+    )
+    return list(medicos)
 
-def update_medico(db: Session, medico_id: int, **kwargs):
+# Linha da listagem de médicos: nome da especialidade já resolvido pelo JOIN
+MedicoResumo = namedtuple("MedicoResumo", ["id", "nome", "crm", "especialidade"])
+
+@somente_leitura
+def listar_medicos_resumo(db: Session):
+    """
+    Médicos com o nome da especialidade (LEFT JOIN), em MedicoResumo somente leitura.
+    Usa o mesmo cache de listar_medicos_com_especialidades.
+    """
+    query = (
+        db.query(Medico.id, Medico.nome, Medico.crm, Especialidade.nome)
+        .outerjoin(Especialidade, Medico.especialidade_id == Especialidade.id)
+        .order_by(Medico.id)
+    )
+    medicos = cache_referencia.obter(
+        "medicos:resumo",
+        lambda: [MedicoResumo._make(linha) for linha in query],
+    )
+    return list(medicos)
+
+def carregar_indice_medicos(db: Session):
+    """
+    Carrega o índice de nomes na primeira busca. Médico não tem marca d'água de
+    alteração e são poucos: o índice é recarregado inteiro a cada
+    INDICE_NOMES_INTERVALO segundos, para ver o que outros processos gravaram.
+    """
+    query = db.query(Medico.id, Medico.nome).order_by(Medico.id)
+    return indice_medicos.sincronizar(lambda marca: (iter_stream(query), [], None))
+
+@somente_leitura
+def buscar_medicos_por_nome(db: Session, nome: str, limite: int = 50):
+    """
+    Busca médicos pelo nome usando o índice de trigramas (ignora acentos,
+    tolera erros de digitação). Retorna os 'limite' mais parecidos, em ordem
+    de relevância; com nome vazio, os primeiros 'limite' médicos por id.
+    """
+    if not nome or not nome.strip():
+        return db.query(Medico).order_by(Medico.id).limit(limite).all()
+    ranking = carregar_indice_medicos(db).buscar(nome, k=limite)
+    ids = [medico_id for medico_id, _ in ranking]
+    if not ids:
+        return []
+    por_id = {m.id: m for m in db.query(Medico).filter(Medico.id.in_(ids))}
+    return [por_id[i] for i in ids if i in por_id]
+
+def update_medico(db: Session, medico_id: int, versao: int = None, **kwargs):
+    """
+    Atualiza o médico com um único UPDATE. Com 'versao', não sobrescreve a
+    alteração feita por outro usuário. Retorna o médico atualizado ou None
+    (campo desconhecido, médico inexistente ou alterado por outro usuário).
+    Sem campos, só retorna o cadastro atual.
+    """
+    if not kwargs:
+        return get_medico_by_id(db, medico_id)
+    try:
+        if "especialidade_id" in kwargs:
+            # O resumo guarda a especialidade: as consultas do médico mudam de chave
+            antes = resumo_consultas.contagem(db, Consulta.medico_id == medico_id, travar=True)
+        afetados = atualizar_em_lote(db, Medico, kwargs, [Medico.id == medico_id], versao)
+        if afetados and "especialidade_id" in kwargs:
+            resumo_consultas.mover(db, antes, especialidade_id=kwargs["especialidade_id"])
+        if afetados and {"nome", "especialidade_id"} & kwargs.keys():
+            consultas_futuras.atualizar(db, Consulta.medico_id == medico_id)
+        db.commit()
+    except (SQLAlchemyError, ValueError) as e:
+        db.rollback()
+        print(f"Erro ao atualizar médico: {e}")
+        return None
     medico = get_medico_by_id(db, medico_id)
-    if not medico:
+    if medico is None:
         return None
-    for key, value in kwargs.items():
-        setattr(medico, key, value)
-    db.commit()
-    db.refresh(medico)
+    if not afetados:
+        print(f"Erro ao atualizar médico: o cadastro {medico_id} foi alterado por outro usuário.")
+        return None
+    indice_medicos.adicionar(medico.id, medico.nome)
+    cache_referencia.invalidar("medicos:")
+    auditoria.registrar("medico", medico_id, ALTERACAO, kwargs)
     return medico
 
+def update_medicos_em_lote(db: Session, valores: dict, *criterios, versao: int = None):
+    """
+    Aplica 'valores' a todos os médicos que atendem aos critérios com um único UPDATE.
+    Retorna a quantidade de médicos alterados.
+    """
+    try:
+        if "especialidade_id" in valores:
+            # Médicos que o UPDATE vai alterar (travados até o commit), para mover o resumo
+            filtro_versao = [Medico.versao == versao] if versao is not None else []
+            ids = db.execute(select(Medico.id).where(*criterios, *filtro_versao).with_for_update()).scalars().all()
+            antes = resumo_consultas.contagem(db, Consulta.medico_id.in_(ids), travar=True)
+        afetados = atualizar_em_lote(db, Medico, valores, criterios, versao)
+        if afetados and "especialidade_id" in valores:
+            resumo_consultas.mover(db, antes, especialidade_id=valores["especialidade_id"])
+        if afetados and {"nome", "especialidade_id"} & valores.keys():
+            # Os médicos alterados são os que agora têm os novos valores
+            alterados = select(Medico.id).where(*(getattr(Medico, campo) == valores[campo]
+                                                  for campo in ("nome", "especialidade_id") if campo in valores))
+            consultas_futuras.atualizar(db, Consulta.medico_id.in_(alterados))
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"Erro ao atualizar médicos em lote: {e}")
+        return 0
+    if afetados:
+        if "nome" in valores:
+            indice_medicos.limpar()
+        cache_referencia.invalidar("medicos:")
+        auditoria.registrar("medico", None, ALTERACAO_EM_LOTE, {"valores": valores, "linhas": afetados})
+    return afetados
+
 def delete_medico(db: Session, medico_id: int):
     medico = get_medico_by_id(db, medico_id)
     if not medico:
         return False
-    db.delete(medico)
-    db.commit()
+    try:
+        antes = resumo_consultas.contagem(db, Consulta.medico_id == medico_id, travar=True)
+        db.delete(medico)
+        db.flush()
+        # consulta.medico_id virou NULL (ON DELETE SET NULL): move o resumo e regrava as consultas futuras dele
+        resumo_consultas.mover(db, antes, medico_id=None, especialidade_id=None)
+        consultas_futuras.atualizar_por(db, "medico_id", medico_id)
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"Erro ao deletar médico: {e}")
+        return False
+    indice_medicos.remover(medico_id)
+    cache_referencia.invalidar("medicos:")
     return True
@@ -0,0 +1,63 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.medico import Medico
+from models.consulta import Consulta
+from controllers import medico_controller
+from services.indice_nomes import indice_medicos
+from services.cache import cache_referencia
+from services import consultas_futuras, resumo_consultas
+from services.auditoria import auditoria, INSERCAO
+
+async def create_medico(db: AsyncSession, nome: str, crm: str, id_especialidade: int = None):
+    medico = Medico(nome=nome, crm=crm, especialidade_id=id_especialidade)
+    db.add(medico)
+    await db.commit()
+    await db.refresh(medico)
+    indice_medicos.adicionar(medico.id, medico.nome)
+    cache_referencia.invalidar("medicos:")
+    auditoria.registrar("medico", medico.id, INSERCAO, {"nome": nome, "crm": crm, "especialidade_id": id_especialidade})
+    return medico
+
+async def get_medico_by_id(db: AsyncSession, medico_id: int):
+    return await db.get(Medico, medico_id)
+
+async def get_all_medicos(db: AsyncSession):
+    result = await db.execute(select(Medico))
+    return result.scalars().all()
+
+async def listar_medicos_com_especialidades(db: AsyncSession):
+    # Mesmo cache da versão síncrona
+    return await db.run_sync(medico_controller.listar_medicos_com_especialidades)
+
+async def buscar_medicos_por_nome(db: AsyncSession, nome: str, limite: int = 50):
+    if not nome or not nome.strip():
+        result = await db.execute(select(Medico).order_by(Medico.id).limit(limite))
+        return result.scalars().all()
+    indice = await db.run_sync(medico_controller.carregar_indice_medicos)
+    ids = [medico_id for medico_id, _ in indice.buscar(nome, k=limite)]
+    if not ids:
+        return []
+    result = await db.execute(select(Medico).where(Medico.id.in_(ids)))
+    por_id = {m.id: m for m in result.scalars()}
+    return [por_id[i] for i in ids if i in por_id]
+
+async def update_medico(db: AsyncSession, medico_id: int, versao: int = None, **kwargs):
+    """
+    Mesma atualização de medico_controller.update_medico ('versao', resumo de
+    consultas e campos desconhecidos), na sessão assíncrona.
+    """
+    return await db.run_sync(lambda s: medico_controller.update_medico(s, medico_id, versao, **kwargs))
+
+async def delete_medico(db: AsyncSession, medico_id: int):
+    medico = await get_medico_by_id(db, medico_id)
+    if not medico:
+        return False
+    antes = await db.run_sync(lambda s: resumo_consultas.contagem(s, Consulta.medico_id == medico_id, travar=True))
+    await db.delete(medico)
+    await db.flush()
+    await db.run_sync(lambda s: (resumo_consultas.mover(s, antes, medico_id=None, especialidade_id=None),
+                                 consultas_futuras.atualizar_por(s, "medico_id", medico_id)))
+    await db.commit()
+    indice_medicos.remover(medico_id)
+    cache_referencia.invalidar("medicos:")
+    return True
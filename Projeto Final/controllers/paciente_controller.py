@@ -1,100 +1,309 @@
+from collections import Counter, namedtuple
+from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
+from sqlalchemy import select, func, or_, table, column, delete
 from sqlalchemy.exc import SQLAlchemyError
 from models.paciente import Paciente
 from models.consulta import Consulta
+from controllers.paginacao import iter_stream, pagina_por_chave, iter_paginas
+from controllers.atualizacao import atualizar_em_lote
+from services.indice_nomes import indice_pacientes
+from services.disponibilidade import agenda
+from services import resumo_consultas, consultas_futuras
+from services.consultas_futuras import consulta_futura
+from services.auditoria import auditoria, INSERCAO, ALTERACAO, ALTERACAO_EM_LOTE
+from config.db import somente_leitura, leitura_no_primario
 
 def create_paciente(db: Session, nome: str, cpf: str, telefone: str = None, email: str = None):
     paciente = Paciente(nome=nome, cpf=cpf, telefone=telefone, email=email)
     db.add(paciente)
     db.commit()
     db.refresh(paciente)
+    indice_pacientes.adicionar(paciente.id, paciente.nome)
+    auditoria.registrar("paciente", paciente.id, INSERCAO,
+                        {"nome": nome, "cpf": cpf, "telefone": telefone, "email": email})
     return paciente
 
 def get_paciente_by_id(db: Session, paciente_id: int):
     return db.query(Paciente).filter(Paciente.id == paciente_id).first()
 
+@somente_leitura
 def get_all_pacientes(db: Session):
     return db.query(Paciente).all()
 
-def buscar_pacientes_por_nome(db: Session, nome: str):
-    return db.query(Paciente).filter(Paciente.nome.ilike(f"%{nome}%")).all()
+def carregar_indice_pacientes(db: Session):
+    """
+    Carrega o índice de nomes na primeira busca e, depois, aplica as alterações
+    feitas por outros processos a cada INDICE_NOMES_INTERVALO segundos (a marca
+    d'água de get_alteracoes_pacientes). Um paciente gravado em outro processo
+    aparece na busca em até esse intervalo; os gravados neste processo, na hora.
+    """
+    # Marca d'água por atualizado_em: uma réplica atrasada perderia alterações
+    with leitura_no_primario(db):
+        return indice_pacientes.sincronizar(lambda token: _alteracoes_nomes_pacientes(db, token))
 
-def update_paciente(db: Session, paciente_id: int, **kwargs):
+@somente_leitura
+def buscar_pacientes_por_nome(db: Session, nome: str, limite: int = 50):
+    """
+    Busca pacientes pelo nome usando o índice de trigramas (ignora acentos,
+    tolera erros de digitação). Retorna os 'limite' mais parecidos, em ordem de relevância.
+    """
+    if not nome or not nome.strip():
+        return get_pacientes_pagina(db, limite=limite)
+    ranking = carregar_indice_pacientes(db).buscar(nome, k=limite)
+    ids = [paciente_id for paciente_id, _ in ranking]
+    if not ids:
+        return []
+    por_id = {p.id: p for p in db.query(Paciente).filter(Paciente.id.in_(ids))}
+    return [por_id[i] for i in ids if i in por_id]
+
+# -------------------- LEITURA PARA LISTAGENS --------------------
+
+# Só as colunas exibidas nas telas de listagem, sem objeto ORM rastreado pela sessão
+PacienteResumo = namedtuple("PacienteResumo", ["id", "nome", "cpf", "telefone", "email"])
+
+_COLUNAS_RESUMO = (Paciente.id, Paciente.nome, Paciente.cpf, Paciente.telefone, Paciente.email)
+
+def _query_resumo(db: Session):
+    return db.query(*_COLUNAS_RESUMO)
+
+@somente_leitura
+def buscar_pacientes_resumo_por_nome(db: Session, nome: str, limite: int = 50):
+    """
+    Igual a buscar_pacientes_por_nome, mas retorna PacienteResumo (somente leitura).
+    """
+    if not nome or not nome.strip():
+        query = _query_resumo(db).order_by(Paciente.id).limit(limite)
+        return [PacienteResumo._make(linha) for linha in query]
+    ranking = carregar_indice_pacientes(db).buscar(nome, k=limite)
+    ids = [paciente_id for paciente_id, _ in ranking]
+    if not ids:
+        return []
+    por_id = {linha.id: PacienteResumo._make(linha) for linha in _query_resumo(db).filter(Paciente.id.in_(ids))}
+    return [por_id[i] for i in ids if i in por_id]
+
+def update_paciente(db: Session, paciente_id: int, versao: int = None, **kwargs):
+    """
+    Atualiza o paciente com um único UPDATE (campos None são ignorados).
+    Com 'versao' (lida ao carregar o cadastro), não sobrescreve a alteração feita
+    por outro usuário nesse meio-tempo. Retorna o paciente atualizado ou None
+    (campo desconhecido, paciente inexistente ou alterado por outro usuário).
+    """
+    valores = {k: v for k, v in kwargs.items() if v is not None}
+    if not valores:
+        return get_paciente_by_id(db, paciente_id)
+    try:
+        afetados = atualizar_em_lote(db, Paciente, valores, [Paciente.id == paciente_id], versao)
+        if afetados and "nome" in valores:
+            consultas_futuras.renomear(db, "paciente", [paciente_id], valores["nome"])
+        db.commit()
+    except (SQLAlchemyError, ValueError) as e:
+        db.rollback()
+        print(f"Erro ao atualizar paciente: {e}")
+        return None
     paciente = get_paciente_by_id(db, paciente_id)
-    if not paciente:
+    if paciente is None:
         return None
-    for key, value in kwargs.items():
-        if hasattr(paciente, key) and value is not None:
-            setattr(paciente, key, value)
-    db.commit()
-    db.refresh(paciente)
+    if not afetados:
+        print(f"Erro ao atualizar paciente: o cadastro {paciente_id} foi alterado por outro usuário "
+              f"(versão {paciente.versao}, esperada {versao}).")
+        return None
+    indice_pacientes.adicionar(paciente.id, paciente.nome)
+    auditoria.registrar("paciente", paciente_id, ALTERACAO, valores)
     return paciente
 
-def delete_paciente(db: Session, paciente_id: int):
-    paciente = get_paciente_by_id(db, paciente_id)
-    if not paciente:
-        return False
+def update_pacientes_em_lote(db: Session, valores: dict, *criterios, versao: int = None):
+    """
+    Aplica 'valores' a todos os pacientes que atendem aos critérios com um único UPDATE,
+    ex.: update_pacientes_em_lote(db, {"telefone": None}, Paciente.telefone == "").
+    Retorna a quantidade de pacientes alterados.
+    """
     try:
-        # Deleta consultas relacionadas (evita erro de integridade referencial)
-        consultas_relacionadas = db.query(Consulta).filter(Consulta.paciente_id == paciente_id).all()
-        for consulta in consultas_relacionadas:
-            db.delete(consulta)
-
-        # Agora deleta o paciente
-        db.delete(paciente)
+        afetados = atualizar_em_lote(db, Paciente, valores, criterios, versao)
+        if afetados and "nome" in valores:
+            # Os pacientes alterados são os que agora têm o novo nome
+            renomeados = select(Paciente.id).where(Paciente.nome == valores["nome"])
+            consultas_futuras.renomear(db, "paciente", renomeados, valores["nome"])
         db.commit()
-        return True
     except SQLAlchemyError as e:
         db.rollback()
-        print(f"[ERRO] Falha ao deletar paciente e suas consultas: {e}")
-        return False
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
-from models.paciente import Paciente
-from models.consulta import Consulta
+        print(f"Erro ao atualizar pacientes em lote: {e}")
+        return 0
+    if afetados:
+        auditoria.registrar("paciente", None, ALTERACAO_EM_LOTE, {"valores": valores, "linhas": afetados})
+    if afetados and "nome" in valores:
+        # Nomes mudaram em massa: o índice é recarregado na próxima busca
+        indice_pacientes.limpar()
+    return afetados
 
-def create_paciente(db: Session, nome: str, cpf: str, telefone: str = None, email: str = None):
-    paciente = Paciente(nome=nome, cpf=cpf, telefone=telefone, email=email)
-    db.add(paciente)
-    db.commit()
-    db.refresh(paciente)
-    return paciente
+def delete_paciente(db: Session, paciente_id: int):
+    """
+    Deleta o paciente com um único DELETE. Consultas e receitas relacionadas
+    saem pelo ON DELETE CASCADE do banco e o trigger after_delete_paciente
+    registra a deleção em log_delecao_paciente.
+    """
+    return delete_pacientes_bulk(db, ids=[paciente_id]) == 1
 
-def get_paciente_by_id(db: Session, paciente_id: int):
-    return db.query(Paciente).filter(Paciente.id == paciente_id).first()
+# -------------------- DELEÇÃO EM LOTE --------------------
 
-def get_all_pacientes(db: Session):
-    return db.query(Paciente).all()
+TAMANHO_LOTE_DELECAO = 500
 
-def buscar_pacientes_por_nome(db: Session, nome: str):
-    return db.query(Paciente).filter(Paciente.nome.ilike(f"%{nome}%")).all()
+def _tirar_da_agenda(db: Session, ids):
+    """
+    Remove da agenda em memória as consultas (a partir de ontem) dos pacientes
+    que vão ser apagados; o CASCADE do banco não passa pela aplicação.
+    """
+    if not agenda.carregada:
+        return
+    desde = datetime.now() - timedelta(days=1)
+    consultas = db.execute(
+        select(Consulta.id).where(Consulta.paciente_id.in_(ids), Consulta.data_consulta >= desde)
+    ).scalars().all()
+    for consulta_id in consultas:
+        agenda.remover(consulta_id)
 
-def update_paciente(db: Session, paciente_id: int, **kwargs):
-    paciente = get_paciente_by_id(db, paciente_id)
-    if not paciente:
-        return None
-    for key, value in kwargs.items():
-        if hasattr(paciente, key) and value is not None:
-            setattr(paciente, key, value)
-    db.commit()
-    db.refresh(paciente)
-    return paciente
+def delete_pacientes_bulk(db: Session, ids=None, criterio=None, tamanho_lote: int = TAMANHO_LOTE_DELECAO):
+    """
+    Deleta vários pacientes (ex.: dados de teste ou pedidos de exclusão da LGPD),
+    por lista de ids e/ou por critério, em lotes de 'tamanho_lote' com um commit por lote.
+    'criterio' é uma expressão sobre Paciente, ex.: Paciente.email.like("%@teste.com").
+    Cada lote é um DELETE ... WHERE id IN (...); o banco apaga em cascata as consultas
+    e o trigger grava cada paciente em log_delecao_paciente.
+    Retorna a quantidade de pacientes apagados (até o erro, se houver).
+    """
+    if ids is None and criterio is None:
+        raise ValueError("Informe ids ou criterio para deletar pacientes em lote.")
 
-def delete_paciente(db: Session, paciente_id: int):
-    paciente = get_paciente_by_id(db, paciente_id)
-    if not paciente:
-        return False
-    try:
-        # Deleta consultas relacionadas (evita erro de integridade referencial)
-        consultas_relacionadas = db.query(Consulta).filter(Consulta.id_paciente == paciente_id).all()
-        for consulta in consultas_relacionadas:
-            db.delete(consulta)
+    filtros = [criterio] if criterio is not None else []
+    if ids is not None:
+        ids = sorted(set(ids))
 
-        # Agora deleta o paciente
-        db.delete(paciente)
-        db.commit()
-        return True
+    def lotes():
+        if ids is not None:
+            for inicio in range(0, len(ids), tamanho_lote):
+                lote = ids[inicio:inicio + tamanho_lote]
+                if filtros:
+                    lote = db.execute(select(Paciente.id).where(Paciente.id.in_(lote), *filtros)).scalars().all()
+                if lote:
+                    yield lote
+            return
+        # Só critério: lotes por keyset, reavaliando o critério a cada lote
+        apos_id = None
+        while True:
+            query = select(Paciente.id).where(*filtros).order_by(Paciente.id).limit(tamanho_lote)
+            if apos_id is not None:
+                query = query.where(Paciente.id > apos_id)
+            lote = db.execute(query).scalars().all()
+            if not lote:
+                return
+            apos_id = lote[-1]
+            yield lote
+
+    total = 0
+    try:
+        for lote in lotes():
+            _tirar_da_agenda(db, lote)
+            # As consultas saem pelo CASCADE: desconta do resumo na mesma transação
+            removidas = resumo_consultas.contagem(db, Consulta.paciente_id.in_(lote))
+            resumo_consultas.ajustar(db, Counter({chave: -n for chave, n in removidas.items()}))
+            consultas_futuras.remover(db, consulta_futura.c.paciente_id.in_(lote))
+            resultado = db.execute(
+                delete(Paciente).where(Paciente.id.in_(lote)).execution_options(synchronize_session=False)
+            )
+            db.commit()
+            total += resultado.rowcount
+            apagados = set(lote)
+            for paciente_id in apagados:
+                indice_pacientes.remover(paciente_id)
+            # Objetos já carregados nesta sessão deixam de existir
+            for chave, objeto in list(db.identity_map.items()):
+                if chave[0] is Paciente and chave[1][0] in apagados:
+                    db.expunge(objeto)
     except SQLAlchemyError as e:
         db.rollback()
-        print(f"[ERRO] Falha ao deletar paciente e suas consultas: {e}")
-        return False
+        print(f"[ERRO] Falha ao deletar pacientes em lote: {e}")
+    return total
+
+def iter_pacientes(db: Session, tamanho_lote: int = 1000):
+    """
+    Percorre todos os pacientes em memória constante (stream_results + yield_per).
+    """
+    return iter_stream(db.query(Paciente).order_by(Paciente.id), tamanho_lote)
+
+def get_pacientes_pagina(db: Session, apos_id: int = None, limite: int = 100):
+    """
+    Retorna até 'limite' pacientes com id > apos_id, ordenados por id.
+    Para a próxima página, passe o id do último paciente retornado.
+    """
+    return pagina_por_chave(db.query(Paciente), Paciente.id, apos_id, limite)
+
+def iter_paginas_pacientes(db: Session, tamanho_pagina: int = 1000):
+    """
+    Gera páginas de pacientes via keyset pagination (sem OFFSET).
+    """
+    return iter_paginas(db.query(Paciente), Paciente.id, tamanho_pagina)
+
+# -------------------- ALTERAÇÕES INCREMENTAIS --------------------
+
+# Preenchida pelo trigger after_delete_paciente
+log_delecao_paciente = table(
+    "log_delecao_paciente",
+    column("paciente_id"),
+    column("data_hora"),
+)
+
+# Marca d'água: maior id visto e instante (no relógio do banco) da última leitura
+TokenAlteracoes = namedtuple("TokenAlteracoes", ["max_id", "desde"])
+
+# Folga para não perder transações que gravaram antes da leitura mas fizeram commit depois
+MARGEM_TOKEN = timedelta(seconds=5)
+
+def get_alteracoes_pacientes(db: Session, token: TokenAlteracoes = None):
+    """
+    Retorna (alterados, removidos, novo_token), com 'alterados' em PacienteResumo.
+    Sem token, 'alterados' traz todos os pacientes. Com token, só os inseridos
+    (id > max_id) ou atualizados (atualizado_em >= desde) depois dele, e 'removidos'
+    traz os ids apagados no período. Reaplicar uma alteração não tem efeito, então
+    a sobreposição causada pela margem do token é segura.
+    """
+    desde = _desde_agora(db)
+    query, removidos = _filtrar_alteracoes(db, _query_resumo(db), token)
+    alterados = [PacienteResumo._make(linha) for linha in query.order_by(Paciente.id)]
+
+    max_id = max(alterados[-1].id if alterados else 0, token.max_id if token else 0)
+    return alterados, removidos, TokenAlteracoes(max_id, desde)
+
+def _desde_agora(db: Session):
+    agora = db.execute(select(func.now())).scalar()
+    if isinstance(agora, str):
+        agora = datetime.fromisoformat(agora)
+    return agora - MARGEM_TOKEN
+
+def _filtrar_alteracoes(db: Session, query, token: TokenAlteracoes = None):
+    """
+    Restringe a query aos pacientes inseridos ou alterados depois do token e
+    busca os ids apagados no período. Retorna (query, removidos).
+    """
+    if token is None:
+        return query, []
+    query = query.filter(or_(Paciente.id > token.max_id, Paciente.atualizado_em >= token.desde))
+    removidos = list(db.execute(
+        select(log_delecao_paciente.c.paciente_id).where(log_delecao_paciente.c.data_hora >= token.desde)
+    ).scalars())
+    return query, removidos
+
+def _alteracoes_nomes_pacientes(db: Session, token: TokenAlteracoes = None):
+    """
+    Como get_alteracoes_pacientes, só com os pares (id, nome) do índice de nomes.
+    Sem token, percorre todos os pacientes em stream.
+    """
+    desde = _desde_agora(db)
+    query, removidos = _filtrar_alteracoes(db, db.query(Paciente.id, Paciente.nome), token)
+    query = query.order_by(Paciente.id)
+    if token is None:
+        # Quem for inserido durante a carga tem id maior: entra na próxima sincronização
+        max_id = db.execute(select(func.max(Paciente.id))).scalar() or 0
+        return iter_stream(query), removidos, TokenAlteracoes(max_id, desde)
+    alterados = query.all()
+    max_id = max(alterados[-1][0] if alterados else 0, token.max_id)
+    return alterados, removidos, TokenAlteracoes(max_id, desde)
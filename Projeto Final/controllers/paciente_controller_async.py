@@ -0,0 +1,91 @@
+from collections import Counter
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from models.paciente import Paciente
+from models.consulta import Consulta
+from controllers import paciente_controller
+from services.indice_nomes import indice_pacientes
+from services import resumo_consultas, consultas_futuras
+from services.consultas_futuras import consulta_futura
+from services.auditoria import auditoria, INSERCAO
+
+async def create_paciente(db: AsyncSession, nome: str, cpf: str, telefone: str = None, email: str = None):
+    paciente = Paciente(nome=nome, cpf=cpf, telefone=telefone, email=email)
+    db.add(paciente)
+    await db.commit()
+    await db.refresh(paciente)
+    indice_pacientes.adicionar(paciente.id, paciente.nome)
+    auditoria.registrar("paciente", paciente.id, INSERCAO,
+                        {"nome": nome, "cpf": cpf, "telefone": telefone, "email": email})
+    return paciente
+
+async def get_paciente_by_id(db: AsyncSession, paciente_id: int):
+    return await db.get(Paciente, paciente_id)
+
+async def get_all_pacientes(db: AsyncSession):
+    result = await db.execute(select(Paciente))
+    return result.scalars().all()
+
+async def get_pacientes_pagina(db: AsyncSession, apos_id: int = None, limite: int = 100):
+    """
+    Keyset pagination: até 'limite' pacientes com id > apos_id, ordenados por id.
+    """
+    query = select(Paciente)
+    if apos_id is not None:
+        query = query.where(Paciente.id > apos_id)
+    result = await db.execute(query.order_by(Paciente.id).limit(limite))
+    return result.scalars().all()
+
+async def iter_pacientes(db: AsyncSession, tamanho_lote: int = 1000):
+    """
+    Percorre todos os pacientes em memória constante (cursor do lado do servidor).
+    """
+    result = await db.stream_scalars(
+        select(Paciente).order_by(Paciente.id).execution_options(yield_per=tamanho_lote)
+    )
+    async for paciente in result:
+        yield paciente
+
+async def buscar_pacientes_por_nome(db: AsyncSession, nome: str, limite: int = 50):
+    """
+    Mesma busca por trigramas de paciente_controller.buscar_pacientes_por_nome.
+    """
+    if not nome or not nome.strip():
+        return await get_pacientes_pagina(db, limite=limite)
+    indice = await db.run_sync(paciente_controller.carregar_indice_pacientes)
+    ids = [paciente_id for paciente_id, _ in indice.buscar(nome, k=limite)]
+    if not ids:
+        return []
+    result = await db.execute(select(Paciente).where(Paciente.id.in_(ids)))
+    por_id = {p.id: p for p in result.scalars()}
+    return [por_id[i] for i in ids if i in por_id]
+
+async def update_paciente(db: AsyncSession, paciente_id: int, versao: int = None, **kwargs):
+    """
+    Mesma atualização de paciente_controller.update_paciente ('versao', campos
+    None ignorados e campos desconhecidos recusados), na sessão assíncrona.
+    """
+    return await db.run_sync(lambda s: paciente_controller.update_paciente(s, paciente_id, versao, **kwargs))
+
+async def delete_paciente(db: AsyncSession, paciente_id: int):
+    # Um único DELETE: consultas saem pelo ON DELETE CASCADE e o trigger grava o log
+    try:
+        def descontar_consultas(s):
+            removidas = resumo_consultas.contagem(s, Consulta.paciente_id == paciente_id)
+            resumo_consultas.ajustar(s, Counter({chave: -n for chave, n in removidas.items()}))
+            consultas_futuras.remover(s, consulta_futura.c.paciente_id == paciente_id)
+
+        await db.run_sync(descontar_consultas)
+        resultado = await db.execute(
+            delete(Paciente).where(Paciente.id == paciente_id).execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        if not resultado.rowcount:
+            return False
+        indice_pacientes.remover(paciente_id)
+        return True
+    except SQLAlchemyError as e:
+        await db.rollback()
+        print(f"[ERRO] Falha ao deletar paciente e suas consultas: {e}")
+        return False
@@ -0,0 +1,44 @@
+from sqlalchemy.orm import Query
+
+# Tamanho padrão dos lotes lidos do servidor
+TAMANHO_LOTE_PADRAO = 1000
+
+
+def iter_stream(query: Query, tamanho_lote: int = TAMANHO_LOTE_PADRAO):
+    """
+    Percorre o resultado de uma query em memória constante.
+    Usa cursor do lado do servidor (stream_results) e yield_per, então só
+    um lote de objetos é carregado por vez.
+    """
+    query = query.execution_options(stream_results=True).yield_per(tamanho_lote)
+    for obj in query:
+        yield obj
+
+
+def pagina_por_chave(query: Query, coluna, apos=None, limite: int = 100):
+    """
+    Retorna uma página usando keyset pagination (WHERE coluna > :apos LIMIT n).
+    A coluna deve ser única e indexada (normalmente a PK) para a ordem ser estável.
+    Para buscar a próxima página, passe o valor da coluna do último item retornado.
+    """
+    if apos is not None:
+        query = query.filter(coluna > apos)
+    return query.order_by(coluna).limit(limite).all()
+
+
+def iter_paginas(query: Query, coluna, tamanho_lote: int = TAMANHO_LOTE_PADRAO, chave=None):
+    """
+    Gera páginas sucessivas via keyset pagination até acabar o resultado.
+    Cada página é uma consulta curta, sem OFFSET e sem cursor aberto entre lotes.
+    'chave' extrai do objeto o valor da coluna (padrão: atributo com o mesmo nome).
+    """
+    chave = chave or (lambda obj: getattr(obj, coluna.key))
+    apos = None
+    while True:
+        pagina = pagina_por_chave(query, coluna, apos, tamanho_lote)
+        if not pagina:
+            return
+        yield pagina
+        if len(pagina) < tamanho_lote:
+            return
+        apos = chave(pagina[-1])
@@ -0,0 +1,118 @@
+from collections import defaultdict
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.exc import SQLAlchemyError
+from models.receita_medica import ReceitaMedica
+from models.consulta import Consulta
+from controllers.atualizacao import atualizar_em_lote
+
+# Consultas por SELECT ... IN (...) no carregamento em lote
+TAMANHO_LOTE_RECEITAS = 500
+
+def create_receita(db: Session, consulta_id: int, medicamento: str, posologia: str = None):
+    receita = ReceitaMedica(consulta_id=consulta_id, medicamento=medicamento, posologia=posologia)
+    db.add(receita)
+    db.commit()
+    db.refresh(receita)
+    return receita
+
+def create_receitas(db: Session, consulta_id: int, itens):
+    """
+    Grava todas as receitas de uma consulta com um único INSERT multi-linha.
+    'itens' são dicts com medicamento e posologia, ou pares (medicamento, posologia).
+    Retorna a quantidade de receitas gravadas (0 em caso de erro).
+    """
+    linhas = []
+    for item in itens:
+        if not isinstance(item, dict):
+            medicamento, posologia = item
+            item = {"medicamento": medicamento, "posologia": posologia}
+        linhas.append({"consulta_id": consulta_id, "medicamento": item.get("medicamento"),
+                       "posologia": item.get("posologia")})
+    if not linhas:
+        return 0
+    try:
+        db.execute(insert(ReceitaMedica.__table__).values(linhas))
+        db.commit()
+        return len(linhas)
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"Erro ao criar receitas: {e}")
+        return 0
+
+def get_receita_by_id(db: Session, receita_id: int):
+    return db.query(ReceitaMedica).filter(ReceitaMedica.id == receita_id).first()
+
+def get_receitas_by_consulta_id(db: Session, consulta_id: int):
+    return db.query(ReceitaMedica).filter(ReceitaMedica.consulta_id == consulta_id).order_by(ReceitaMedica.id).all()
+
+def get_receitas_por_consultas(db: Session, consulta_ids, tamanho_lote: int = TAMANHO_LOTE_RECEITAS):
+    """
+    Receitas de várias consultas de uma vez: um SELECT ... WHERE consulta_id IN (...)
+    a cada 'tamanho_lote' consultas, em vez de uma query por consulta.
+    Retorna dict consulta_id -> lista de ReceitaMedica (consultas sem receita ficam com lista vazia).
+    """
+    ids = list(dict.fromkeys(consulta_ids))
+    receitas = defaultdict(list, {consulta_id: [] for consulta_id in ids})
+    for inicio in range(0, len(ids), tamanho_lote):
+        lote = ids[inicio:inicio + tamanho_lote]
+        query = (
+            db.query(ReceitaMedica)
+            .filter(ReceitaMedica.consulta_id.in_(lote))
+            .order_by(ReceitaMedica.consulta_id, ReceitaMedica.id)
+        )
+        for receita in query:
+            receitas[receita.consulta_id].append(receita)
+    return dict(receitas)
+
+def get_consultas_com_receitas_by_paciente_id(db: Session, paciente_id: int):
+    """
+    Histórico do paciente com as receitas já carregadas: uma query para as
+    consultas e uma (selectin, com IN) para as receitas de todas elas.
+    """
+    return (
+        db.query(Consulta)
+        .options(selectinload(Consulta.receitas))
+        .filter(Consulta.paciente_id == paciente_id)
+        .order_by(Consulta.data_consulta, Consulta.id)
+        .all()
+    )
+
+def update_receita(db: Session, receita_id: int, **kwargs):
+    """
+    Atualiza a receita com um único UPDATE. Retorna a receita atualizada ou None
+    (campo desconhecido ou receita inexistente).
+    """
+    try:
+        afetados = atualizar_em_lote(db, ReceitaMedica, kwargs, [ReceitaMedica.id == receita_id])
+        db.commit()
+    except (SQLAlchemyError, ValueError) as e:
+        db.rollback()
+        print(f"Erro ao atualizar receita: {e}")
+        return None
+    if not afetados and kwargs:
+        return None
+    return get_receita_by_id(db, receita_id)
+
+def delete_receita(db: Session, receita_id: int):
+    receita = get_receita_by_id(db, receita_id)
+    if not receita:
+        return False
+    db.delete(receita)
+    db.commit()
+    return True
+
+def delete_receitas_da_consulta(db: Session, consulta_id: int):
+    """
+    Apaga todas as receitas da consulta com um único DELETE. Retorna quantas foram apagadas.
+    """
+    try:
+        apagadas = db.query(ReceitaMedica).filter(ReceitaMedica.consulta_id == consulta_id).delete(
+            synchronize_session=False
+        )
+        db.commit()
+        return apagadas
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"Erro ao apagar receitas: {e}")
+        return 0
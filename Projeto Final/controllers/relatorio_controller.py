@@ -0,0 +1,104 @@
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from models.consulta import Consulta
+from models.medico import Medico
+from models.clinica import Clinica
+from models.especialidade import Especialidade
+from services.resumo_consultas import resumo_consultas_diario as resumo, para_dia
+from config.db import somente_leitura
+
+# dimensão -> (coluna do resumo, model com o nome)
+DIMENSOES = {
+    "medico": (resumo.c.medico_id, Medico),
+    "clinica": (resumo.c.clinica_id, Clinica),
+    "especialidade": (resumo.c.especialidade_id, Especialidade),
+    "status": (resumo.c.status, None),
+}
+
+def _nomes(db: Session, modelo, ids):
+    ids = [i for i in ids if i]
+    if modelo is None or not ids:
+        return {}
+    return dict(db.execute(select(modelo.id, modelo.nome).where(modelo.id.in_(ids))).all())
+
+@somente_leitura
+def consultas_por_mes(db: Session, dimensao: str = "medico", desde: date = None, ate: date = None,
+                      status: str = None):
+    """
+    Quantidade de consultas por mês e por médico/clínica/especialidade/status,
+    lida do resumo diário (sem varrer o histórico de consultas).
+    Retorna uma lista de (mes "AAAA-MM", chave, nome, quantidade), ordenada por mês e chave.
+    """
+    coluna, modelo = DIMENSOES[dimensao]
+    query = select(resumo.c.dia, coluna, func.sum(resumo.c.quantidade)).group_by(resumo.c.dia, coluna)
+    if desde:
+        query = query.where(resumo.c.dia >= desde)
+    if ate:
+        query = query.where(resumo.c.dia <= ate)
+    if status:
+        query = query.where(resumo.c.status == status)
+    try:
+        por_mes = defaultdict(int)
+        for dia, chave, quantidade in db.execute(query):
+            por_mes[(para_dia(dia).strftime("%Y-%m"), chave)] += int(quantidade or 0)
+        nomes = _nomes(db, modelo, {chave for _, chave in por_mes})
+    except SQLAlchemyError as e:
+        print(f"Erro ao gerar relatório de consultas: {e}")
+        return []
+    return [
+        (mes, chave, nomes.get(chave, chave if modelo is None else "(sem cadastro)"), quantidade)
+        for (mes, chave), quantidade in sorted(por_mes.items(), key=lambda item: (item[0][0], str(item[0][1])))
+        if quantidade
+    ]
+
+@somente_leitura
+def comparativo_mensal(db: Session, ano: int, mes: int, dimensao: str = "medico", status: str = None):
+    """
+    Compara o mês informado com o anterior.
+    Retorna uma lista de (chave, nome, mes_anterior, mes_atual, variacao), do maior
+    para o menor volume no mês atual; variacao é None quando o mês anterior está zerado.
+    """
+    inicio = date(ano, mes, 1)
+    anterior = date(ano - 1, 12, 1) if mes == 1 else date(ano, mes - 1, 1)
+    fim = date(ano + 1, 1, 1) if mes == 12 else date(ano, mes + 1, 1)
+    atual_chave, anterior_chave = inicio.strftime("%Y-%m"), anterior.strftime("%Y-%m")
+
+    linhas = consultas_por_mes(db, dimensao, anterior, date.fromordinal(fim.toordinal() - 1), status)
+    valores = defaultdict(lambda: [None, 0, 0])
+    for mes_linha, chave, nome, quantidade in linhas:
+        item = valores[chave]
+        item[0] = nome
+        item[1 if mes_linha == anterior_chave else 2] += quantidade
+
+    resultado = [
+        (chave, nome, antes, agora, (agora - antes) / antes if antes else None)
+        for chave, (nome, antes, agora) in valores.items()
+    ]
+    resultado.sort(key=lambda linha: linha[3], reverse=True)
+    return resultado
+
+@somente_leitura
+def total_consultas_pacientes(db: Session, paciente_ids):
+    """
+    Total de consultas de vários pacientes com um único GROUP BY
+    (em vez de chamar a função total_consultas_paciente uma vez por paciente).
+    Retorna {paciente_id: total}, com 0 para quem não tem consultas.
+    """
+    ids = list(paciente_ids)
+    totais = dict.fromkeys(ids, 0)
+    if not ids:
+        return totais
+    try:
+        query = (
+            select(Consulta.paciente_id, func.count())
+            .where(Consulta.paciente_id.in_(ids))
+            .group_by(Consulta.paciente_id)
+        )
+        totais.update(db.execute(query).all())
+    except SQLAlchemyError as e:
+        print(f"Erro ao contar consultas dos pacientes: {e}")
+    return totais
@@ -0,0 +1,28 @@
+import argparse
+import time
+
+from config.db import get_db
+from services import espelho_local
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sincroniza o espelho local (SQLite) usado pela GUI para leitura.")
+    parser.add_argument("--arquivo", default=espelho_local.ARQUIVO or None, required=not espelho_local.ARQUIVO,
+                        help="Arquivo SQLite do espelho (padrão: DB_ESPELHO)")
+    parser.add_argument("--dias", type=int, default=espelho_local.DIAS,
+                        help="Consultas desde quantos dias atrás (padrão: %(default)s)")
+    args = parser.parse_args()
+
+    espelho = espelho_local.EspelhoLocal(args.arquivo, dias=args.dias)
+    inicio = time.perf_counter()
+    with get_db() as db:
+        resultado = espelho.sincronizar(db)
+    if resultado is None:
+        raise SystemExit(1)
+    for tabela, (gravadas, removidas) in resultado.items():
+        print(f"{tabela:<14} {gravadas:>7} gravadas {removidas:>7} removidas")
+    print(f"✅ Espelho {args.arquivo} sincronizado em {time.perf_counter() - inicio:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
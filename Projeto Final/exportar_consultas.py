@@ -0,0 +1,37 @@
+import argparse
+import sys
+import time
+from datetime import date
+
+from config.db import get_db, leitura_em_replica
+from services.exportacao_consultas import (
+    exportar_consultas, abrir_saida, formato_do_arquivo, FORMATOS, TAMANHO_LOTE_PADRAO,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta consultas com paciente, médico, clínica e receitas "
+                                                 "(CSV ou NDJSON), em lotes e sem carregar tudo na memória.")
+    parser.add_argument("saida", help="Arquivo de saída (.csv, .ndjson; .gz compacta) ou - para a saída padrão")
+    parser.add_argument("--formato", choices=FORMATOS, help="Padrão: pela extensão do arquivo (senão csv)")
+    parser.add_argument("--gzip", action="store_true", default=None, help="Compacta com gzip (padrão: pela extensão .gz)")
+    parser.add_argument("--de", type=date.fromisoformat, help="Consultas a partir desta data (AAAA-MM-DD)")
+    parser.add_argument("--ate", type=date.fromisoformat, help="Consultas até esta data, inclusive (AAAA-MM-DD)")
+    parser.add_argument("--clinica", type=int, action="append", help="Id da clínica (pode repetir)")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE_PADRAO, help="Linhas lidas do banco por vez")
+    args = parser.parse_args()
+
+    formato = args.formato or formato_do_arquivo(args.saida)
+
+    def progresso(linhas):
+        print(f"\r{linhas} linhas...", end="", file=sys.stderr, flush=True)
+
+    inicio = time.perf_counter()
+    # Com DATABASE_REPLICA_URLS, a exportação lê de uma réplica e não pesa no primário
+    with get_db() as db, leitura_em_replica(db), abrir_saida(args.saida, args.gzip) as saida:
+        total = exportar_consultas(db, saida, formato, args.de, args.ate, args.clinica, args.lote, progresso)
+    print(f"\r✅ {total} linhas exportadas em {time.perf_counter() - inicio:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
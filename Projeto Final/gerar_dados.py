@@ -0,0 +1,38 @@
+import argparse
+import time
+
+from config.db import get_db
+from services.dados_sinteticos import Escala, gerar, limpar_tabelas
+from services import resumo_consultas, consultas_futuras
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos determinísticos para testes de desempenho.")
+    parser.add_argument("--consultas", type=int, default=10_000, help="Quantidade de consultas (10k a 10M)")
+    parser.add_argument("--pacientes", type=int, help="Padrão: consultas / 10")
+    parser.add_argument("--medicos", type=int, help="Padrão: consultas / 2000")
+    parser.add_argument("--clinicas", type=int, help="Padrão: consultas / 100000")
+    parser.add_argument("--semente", type=int, default=42, help="Mesma semente gera os mesmos dados")
+    parser.add_argument("--limpar", action="store_true", help="Apaga os dados existentes antes de gerar")
+    args = parser.parse_args()
+
+    escala = Escala(args.consultas, args.pacientes, args.medicos, args.clinicas)
+    print(f"Gerando {escala} com semente {args.semente}...")
+
+    def progresso(tabela, total):
+        print(f"\r  {tabela}: {total} linhas", end="", flush=True)
+
+    inicio = time.perf_counter()
+    with get_db() as db:
+        if args.limpar:
+            limpar_tabelas(db)
+        totais = gerar(db, escala, args.semente, progresso)
+        # A carga não passa pelos controllers: resumo e consultas futuras são recalculados
+        resumo_consultas.reconstruir(db)
+        consultas_futuras.reconstruir(db)
+    print()
+    print(f"✅ Dados gerados em {time.perf_counter() - inicio:.1f}s: {totais}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,199 @@
+import time
+
+_INICIO_IMPORTS = time.perf_counter()
+
+import argparse
+import queue
 import tkinter as tk
 import customtkinter as ctk
 from tkinter import messagebox
-from config.db import SessionLocal
+from bisect import bisect_left
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from config.db import ScopedSession, SessionLocal, aquecer_pool
 from controllers import paciente_controller, consulta_controller
 from controllers import medico_controller
-from config.db import SessionLocal  
+from services import consultas_futuras
+from services.auditoria import auditoria
+from services.espelho_local import espelho
+
+_FIM_IMPORTS = time.perf_counter()
 
 
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
-db = SessionLocal()
+# Sessão por thread (scoped_session): cada thread que usar "db" recebe sua própria conexão do pool
+db = ScopedSession
+
+
+class Despachante:
+    """
+    Executa as chamadas aos controllers em um pool de threads, fora do mainloop do Tk.
+    O resultado volta para a thread da interface por uma fila lida com after().
+    Cada tarefa tem uma chave: uma nova tarefa com a mesma chave cancela a anterior
+    (ex.: buscas repetidas), e o resultado da anterior é descartado.
+    """
+
+    INTERVALO_MS = 30
+
+    def __init__(self, raiz, max_workers=4):
+        self.raiz = raiz
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bd")
+        self._resultados = queue.Queue()
+        self._versoes = {}
+        self._futuros = {}
+        self._ativo = True
+        self.raiz.after(self.INTERVALO_MS, self._processar_resultados)
+
+    def executar(self, chave, funcao, ao_concluir, ao_falhar=None, carregando=None):
+        versao = self._versoes.get(chave, 0) + 1
+        self._versoes[chave] = versao
+        anterior = self._futuros.get(chave)
+        if anterior is not None:
+            anterior.cancel()
+        if carregando:
+            carregando()
+
+        def tarefa():
+            try:
+                resultado, erro = funcao(), None
+            except Exception as e:
+                resultado, erro = None, e
+            finally:
+                # Fecha a sessão desta thread; os objetos lidos continuam acessíveis
+                db.remove()
+            self._resultados.put((chave, versao, resultado, erro, ao_concluir, ao_falhar))
+
+        self._futuros[chave] = self.executor.submit(tarefa)
+
+    def _processar_resultados(self):
+        while True:
+            try:
+                chave, versao, resultado, erro, ao_concluir, ao_falhar = self._resultados.get_nowait()
+            except queue.Empty:
+                break
+            if self._versoes.get(chave) != versao:
+                continue  # superada por uma chamada mais nova
+            self._futuros.pop(chave, None)
+            if erro is None:
+                ao_concluir(resultado)
+            elif ao_falhar:
+                ao_falhar(erro)
+            else:
+                messagebox.showerror("Erro", f"Erro ao acessar o banco de dados: {erro}")
+        if self._ativo:
+            self.raiz.after(self.INTERVALO_MS, self._processar_resultados)
+
+    def encerrar(self):
+        self._ativo = False
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def mostrar_texto(textbox, texto):
+    textbox.configure(state="normal")
+    textbox.delete("0.0", "end")
+    textbox.insert("end", texto)
+    textbox.configure(state="disabled")
+
+
+class PerfilInicializacao:
+    """
+    Mede os tempos de abertura da aplicação (modo --profile-startup).
+    """
 
-class App(ctk.CTk):
     def __init__(self):
+        self.inicio = _INICIO_IMPORTS
+        self.marcas = {"imports": _FIM_IMPORTS}
+        self.duracoes = {}
+
+    def marcar(self, nome):
+        self.marcas[nome] = time.perf_counter()
+        self._relatar()
+
+    def duracao(self, nome, segundos):
+        self.duracoes[nome] = segundos
+        self._relatar()
+
+    def _relatar(self):
+        if "primeira_pintura" not in self.marcas or "conexao" not in self.duracoes:
+            return
+        print("⏱️  Tempos de inicialização:")
+        print(f"   imports:          {(self.marcas['imports'] - self.inicio) * 1000:8.1f} ms")
+        print(f"   primeira pintura: {(self.marcas['primeira_pintura'] - self.inicio) * 1000:8.1f} ms")
+        print(f"   conexão ao banco: {self.duracoes['conexao'] * 1000:8.1f} ms (em segundo plano)")
+
+
+class App(ctk.CTk):
+    def __init__(self, perfil: PerfilInicializacao = None):
         super().__init__()
         self.title("Sistema de Gestão Médica")
         self.geometry("700x600")
+        self.perfil = perfil
+
+        self.despachante = Despachante(self)
+        self._parar_expiracao = None
+        self.protocol("WM_DELETE_WINDOW", self.fechar)
 
         self.container = ctk.CTkFrame(self)
         self.container.pack(fill="both", expand=True)
 
+        # As telas são criadas (e consultam o banco) só na primeira vez que são exibidas
         self.frames = {}
 
-        # Adicione aqui todas as frames, incluindo as novas ConsultaListFrame e ConsultaCancelFrame
-        frames_to_create = [
-            MenuFrame,
-            PacienteMenuFrame,
-            PacienteCreateFrame,
-            PacienteListFrame,
-            PacienteUpdateFrame,
-            PacienteDeleteFrame,
-            MedicoFrame,
-            ConsultaMenuFrame,
-            ConsultaListFrame,     
-        ]
-
-        for F in frames_to_create:
-            try:
-                frame = F(self.container, self, db)
-            except TypeError:
-                # Para frames que não aceitam db no construtor
-                frame = F(self.container, self)
-            self.frames[F] = frame
-            frame.grid(row=0, column=0, sticky="nsew")
-
         self.show_frame(MenuFrame)
 
+        # Depois da primeira pintura, conecta ao banco em segundo plano
+        self.after_idle(self._apos_primeira_pintura)
+
+    def _criar_frame(self, frame_class):
+        try:
+            frame = frame_class(self.container, self, db)
+        except TypeError:
+            # Para frames que não aceitam db no construtor
+            frame = frame_class(self.container, self)
+        frame.grid(row=0, column=0, sticky="nsew")
+        return frame
+
     def show_frame(self, frame_class):
-        frame = self.frames[frame_class]
+        frame = self.frames.get(frame_class)
+        if frame is None:
+            frame = self.frames[frame_class] = self._criar_frame(frame_class)
         frame.tkraise()
 
+    def _apos_primeira_pintura(self):
+        if self.perfil:
+            self.perfil.marcar("primeira_pintura")
+
+        def aquecer():
+            inicio = time.perf_counter()
+            aquecer_pool()
+            return time.perf_counter() - inicio
+
+        def aquecido(segundos):
+            if self.perfil:
+                self.perfil.duracao("conexao", segundos)
+
+        def falhou(erro):
+            print(f"Aviso: não foi possível conectar ao banco em segundo plano: {erro}")
+            if self.perfil:
+                self.perfil.duracao("conexao", float("nan"))
+
+        self.despachante.executar("aquecimento", aquecer, aquecido, falhou)
+        # Tira de consulta_futura, de tempos em tempos, as consultas que já passaram
+        self._parar_expiracao = consultas_futuras.iniciar_expiracao(SessionLocal)
+        # Com DB_ESPELHO, as listas de médicos e de consultas leem de uma cópia local (services/espelho_local.py)
+        espelho.iniciar()
+
+    def fechar(self):
+        if self._parar_expiracao is not None:
+            self._parar_expiracao.set()
+        self.despachante.encerrar()
+        espelho.encerrar()
+        # Grava o que ainda está na fila de auditoria antes de sair
+        auditoria.encerrar()
+        self.destroy()
+
 
 class MenuFrame(ctk.CTkFrame):
     def __init__(self, parent, app):
@@ -136,8 +279,8 @@ class PacienteCreateFrame(ctk.CTkFrame):
         self.email_entry = ctk.CTkEntry(self, placeholder_text="Email")
         self.email_entry.pack(pady=5, padx=20, fill="x")
 
-        btn_cadastrar = ctk.CTkButton(self, text="Cadastrar Paciente", command=self.cadastrar_paciente)
-        btn_cadastrar.pack(pady=15, padx=20)
+        self.btn_cadastrar = ctk.CTkButton(self, text="Cadastrar Paciente", command=self.cadastrar_paciente)
+        self.btn_cadastrar.pack(pady=15, padx=20)
 
     def cadastrar_paciente(self):
         nome = self.nome_entry.get().strip()
@@ -147,17 +290,33 @@ class PacienteCreateFrame(ctk.CTkFrame):
         if not nome or not cpf:
             messagebox.showerror("Erro", "Nome e CPF são obrigatórios.")
             return
-        try:
-            paciente = paciente_controller.create_paciente(self.db, nome, cpf, telefone, email)
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao cadastrar paciente: {e}")
-            return
+        self.btn_cadastrar.configure(state="disabled", text="Cadastrando...")
+        self.app.despachante.executar(
+            "paciente:cadastrar",
+            lambda: paciente_controller.create_paciente(self.db, nome, cpf, telefone, email),
+            self._paciente_cadastrado,
+            self._erro_cadastro,
+        )
+
+    def _erro_cadastro(self, erro):
+        self.btn_cadastrar.configure(state="normal", text="Cadastrar Paciente")
+        messagebox.showerror("Erro", f"Erro ao cadastrar paciente: {erro}")
+
+    def _paciente_cadastrado(self, paciente):
+        self.btn_cadastrar.configure(state="normal", text="Cadastrar Paciente")
+        espelho.sincronizar_agora()
         messagebox.showinfo("Sucesso", f"Paciente {paciente.nome} cadastrado com ID {paciente.id}")
         self.nome_entry.delete(0, "end")
         self.cpf_entry.delete(0, "end")
         self.telefone_entry.delete(0, "end")
         self.email_entry.delete(0, "end")
 
+# Agrupa eventos <Visibility> disparados em sequência
+DEBOUNCE_MS = 300
+# Intervalo mínimo (segundos) entre atualizações automáticas da lista
+INTERVALO_MIN_ATUALIZACAO = 2.0
+
+
 class PacienteListFrame(ctk.CTkFrame):
     def __init__(self, parent, app, db):
         super().__init__(parent)
@@ -181,29 +340,110 @@ class PacienteListFrame(ctk.CTkFrame):
         self.lista_text.pack(pady=15, padx=20)
         self.lista_text.configure(state="disabled")
 
-        # Atualiza lista sempre que abrir a tela
-        self.bind("<Visibility>", lambda e: self.atualizar_lista())
+        # Lista exibida: ids em ordem e a linha de cada um (para aplicar só o que mudou)
+        self._ids = []
+        self._linhas = {}
+        self._token = None
+        self._mostrando_busca = False
+        self._agendado = None
+        self._ultima_atualizacao = 0.0
+
+        # Atualiza a lista ao abrir a tela. O Tk dispara <Visibility> várias vezes
+        # seguidas, então as chamadas são agrupadas (debounce).
+        self.bind("<Visibility>", lambda e: self._agendar_atualizacao())
 
         self.atualizar_lista()
 
+    def _agendar_atualizacao(self):
+        if self._mostrando_busca:
+            return
+        if time.monotonic() - self._ultima_atualizacao < INTERVALO_MIN_ATUALIZACAO:
+            return
+        if self._agendado is not None:
+            self.after_cancel(self._agendado)
+        self._agendado = self.after(DEBOUNCE_MS, self.atualizar_lista)
+
     def atualizar_lista(self):
-        pacientes = paciente_controller.get_all_pacientes(self.db)
-        self.mostrar_pacientes(pacientes)
+        self._agendado = None
+        self._ultima_atualizacao = time.monotonic()
+        if self._mostrando_busca:
+            # Saindo da busca: volta a exibir a lista completa
+            self._mostrando_busca = False
+            self._renderizar()
+        token = self._token
+        # Mesma chave da busca: a tarefa mais recente substitui a anterior
+        self.app.despachante.executar(
+            "pacientes:lista",
+            lambda: paciente_controller.get_alteracoes_pacientes(self.db, token),
+            self._aplicar_alteracoes,
+            carregando=None if token else (lambda: mostrar_texto(self.lista_text, "Carregando...\n")),
+        )
 
     def buscar_pacientes(self):
         nome = self.buscar_entry.get().strip()
-        pacientes = paciente_controller.buscar_pacientes_por_nome(self.db, nome)
-        self.mostrar_pacientes(pacientes)
+        self.app.despachante.executar(
+            "pacientes:lista",
+            lambda: paciente_controller.buscar_pacientes_resumo_por_nome(self.db, nome),
+            self.mostrar_pacientes,
+            carregando=lambda: mostrar_texto(self.lista_text, "Buscando...\n"),
+        )
+
+    @staticmethod
+    def _formatar(p):
+        return f"ID: {p.id} | Nome: {p.nome} | CPF: {p.cpf} | Telefone: {p.telefone} | Email: {p.email}\n"
+
+    def _aplicar_alteracoes(self, resultado):
+        alterados, removidos, token = resultado
+        primeira_carga = self._token is None
+        self._token = token
+        if self._mostrando_busca:
+            return
+
+        if primeira_carga or not self._ids:
+            for p in alterados:
+                self._linhas[p.id] = self._formatar(p)
+            self._ids = sorted(self._linhas)
+            self._renderizar()
+            return
+
+        # Altera só as linhas afetadas no textbox (linha n do Tk = posição n-1 em self._ids)
+        self.lista_text.configure(state="normal")
+        for paciente_id in removidos:
+            if paciente_id in self._linhas:
+                i = bisect_left(self._ids, paciente_id)
+                self.lista_text.delete(f"{i + 1}.0", f"{i + 2}.0")
+                del self._ids[i]
+                del self._linhas[paciente_id]
+        for p in alterados:
+            linha = self._formatar(p)
+            i = bisect_left(self._ids, p.id)
+            if p.id in self._linhas:
+                if self._linhas[p.id] != linha:
+                    self.lista_text.delete(f"{i + 1}.0", f"{i + 2}.0")
+                    self.lista_text.insert(f"{i + 1}.0", linha)
+            else:
+                self._ids.insert(i, p.id)
+                self.lista_text.insert(f"{i + 1}.0", linha)
+            self._linhas[p.id] = linha
+        self.lista_text.configure(state="disabled")
+        if not self._ids:
+            self._renderizar()
+
+    def _renderizar(self):
+        self.mostrar_pacientes_linhas([self._linhas[i] for i in self._ids])
 
     def mostrar_pacientes(self, pacientes):
+        # Resultado de busca: a lista completa volta no próximo "Atualizar Lista"
+        self._mostrando_busca = True
+        self.mostrar_pacientes_linhas([self._formatar(p) for p in pacientes])
+
+    def mostrar_pacientes_linhas(self, linhas):
         self.lista_text.configure(state="normal")
         self.lista_text.delete("1.0", "end")  # corrigido aqui (era "0.0")
-        if not pacientes:
+        if not linhas:
             self.lista_text.insert("end", "Nenhum paciente encontrado.\n")
         else:
-            for p in pacientes:
-                linha = f"ID: {p.id} | Nome: {p.nome} | CPF: {p.cpf} | Telefone: {p.telefone} | Email: {p.email}\n"
-                self.lista_text.insert("end", linha)
+            self.lista_text.insert("end", "".join(linhas))
         self.lista_text.configure(state="disabled")
 
 class PacienteUpdateFrame(ctk.CTkFrame):
@@ -211,6 +451,8 @@ class PacienteUpdateFrame(ctk.CTkFrame):
         super().__init__(parent)
         self.app = app
         self.db = db
+        # (id, versao) do último paciente carregado nos campos
+        self._versao = (None, None)
 
         # Título
         ctk.CTkLabel(self, text="Atualizar Paciente", font=ctk.CTkFont(size=22, weight="bold")).pack(pady=15)
@@ -263,7 +505,14 @@ class PacienteUpdateFrame(ctk.CTkFrame):
         if not nome:
             messagebox.showwarning("Atenção", "Digite um nome para buscar.")
             return
-        pacientes = paciente_controller.buscar_pacientes_por_nome(self.db, nome)
+        self.app.despachante.executar(
+            "paciente_update:busca",
+            lambda: paciente_controller.buscar_pacientes_resumo_por_nome(self.db, nome),
+            self.mostrar_resultado,
+            carregando=lambda: mostrar_texto(self.resultado_text, "Buscando...\n"),
+        )
+
+    def mostrar_resultado(self, pacientes):
         self.resultado_text.configure(state="normal")
         self.resultado_text.delete("0.0", "end")
         if not pacientes:
@@ -280,11 +529,20 @@ class PacienteUpdateFrame(ctk.CTkFrame):
         except ValueError:
             messagebox.showerror("Erro", "ID inválido.")
             return
-        paciente = paciente_controller.get_paciente_by_id(self.db, id_paciente)
+        self.app.despachante.executar(
+            "paciente_update:carregar",
+            lambda: paciente_controller.get_paciente_by_id(self.db, id_paciente),
+            self.preencher_campos,
+        )
+
+    def preencher_campos(self, paciente):
         if not paciente:
             messagebox.showerror("Erro", "Paciente não encontrado.")
             return
 
+        # Versão lida: ao salvar, não sobrescreve o que outro usuário alterou depois
+        self._versao = (paciente.id, paciente.versao)
+
         self.nome_entry.delete(0, "end")
         self.nome_entry.insert(0, paciente.nome)
         self.cpf_entry.delete(0, "end")
@@ -310,22 +568,35 @@ class PacienteUpdateFrame(ctk.CTkFrame):
             messagebox.showerror("Erro", "Nome e CPF são obrigatórios.")
             return
 
-        paciente = paciente_controller.update_paciente(
-            self.db,
-            id_paciente,
-            nome=nome,
-            cpf=cpf,
-            telefone=telefone if telefone else None,
-            email=email if email else None
+        carregado_id, versao = self._versao
+        versao = versao if carregado_id == id_paciente else None
+
+        self.app.despachante.executar(
+            "paciente_update:salvar",
+            lambda: paciente_controller.update_paciente(
+                self.db,
+                id_paciente,
+                versao=versao,
+                nome=nome,
+                cpf=cpf,
+                telefone=telefone if telefone else None,
+                email=email if email else None
+            ),
+            self._paciente_atualizado,
         )
+
+    def _paciente_atualizado(self, paciente):
         if paciente:
+            espelho.sincronizar_agora()
             messagebox.showinfo("Sucesso", "Paciente atualizado com sucesso!")
             # Opcional: limpar campos ou atualizar lista
             self.limpar_campos()
-            self.resultado_text.configure(state="normal")
-            self.resultado_text.delete("0.0", "end")
+            mostrar_texto(self.resultado_text, "")
         else:
-            messagebox.showerror("Erro", "Falha ao atualizar paciente.")
+            messagebox.showerror(
+                "Erro",
+                "Falha ao atualizar paciente.\nSe outro usuário alterou o cadastro, carregue os dados novamente.",
+            )
 
     def limpar_campos(self):
         self.id_entry.delete(0, "end")
@@ -368,7 +639,14 @@ class PacienteDeleteFrame(ctk.CTkFrame):
 
     def buscar_pacientes(self):
         nome = self.nome_busca_entry.get().strip()
-        pacientes = paciente_controller.buscar_pacientes_por_nome(self.db, nome)
+        self.app.despachante.executar(
+            "paciente_delete:busca",
+            lambda: paciente_controller.buscar_pacientes_resumo_por_nome(self.db, nome),
+            self.mostrar_resultado,
+            carregando=lambda: mostrar_texto(self.resultado_text, "Buscando...\n"),
+        )
+
+    def mostrar_resultado(self, pacientes):
         self.resultado_text.configure(state="normal")
         self.resultado_text.delete("0.0", "end")
         if not pacientes:
@@ -385,7 +663,14 @@ class PacienteDeleteFrame(ctk.CTkFrame):
         except ValueError:
             messagebox.showerror("Erro", "ID inválido.")
             return
-        consultas = consulta_controller.get_consultas_by_paciente_id(self.db, id_paciente)
+        self.app.despachante.executar(
+            "paciente_delete:consultas",
+            lambda: consulta_controller.listar_consultas_resumo_por_paciente(self.db, id_paciente),
+            self.mostrar_consultas,
+            carregando=lambda: mostrar_texto(self.consultas_text, "Carregando...\n"),
+        )
+
+    def mostrar_consultas(self, consultas):
         self.consultas_text.configure(state="normal")
         self.consultas_text.delete("0.0", "end")
         if not consultas:
@@ -393,7 +678,7 @@ class PacienteDeleteFrame(ctk.CTkFrame):
         else:
             for c in consultas:
                 linha = (
-                    f"ID: {c.id} | Médico ID: {c.medico_id} | Clínica ID: {c.clinica_id} | "
+                    f"ID: {c.id} | Médico: {c.medico or '-'} | Clínica: {c.clinica or '-'} | "
                     f"Data: {c.data_consulta} | Status: {c.status}\n"
                 )
                 self.consultas_text.insert("end", linha)
@@ -405,13 +690,26 @@ class PacienteDeleteFrame(ctk.CTkFrame):
         except ValueError:
             messagebox.showerror("Erro", "ID inválido.")
             return
-        consultas = consulta_controller.get_consultas_by_paciente_id(self.db, id_paciente)
-        if consultas:
-            msg = "Existem consultas relacionadas a este paciente. Deseja realmente deletar?\nIsso pode afetar dados relacionados."
+        self.app.despachante.executar(
+            "paciente_delete:deletar",
+            lambda: consulta_controller.contar_consultas_do_paciente(self.db, id_paciente),
+            lambda quantidade: self._confirmar_delecao(id_paciente, quantidade),
+        )
+
+    def _confirmar_delecao(self, id_paciente, quantidade):
+        if quantidade:
+            msg = f"Existem {quantidade} consultas relacionadas a este paciente. Deseja realmente deletar?\nIsso pode afetar dados relacionados."
             if not messagebox.askyesno("Confirmação", msg):
                 return
-        sucesso = paciente_controller.delete_paciente(self.db, id_paciente)
+        self.app.despachante.executar(
+            "paciente_delete:deletar",
+            lambda: paciente_controller.delete_paciente(self.db, id_paciente),
+            self._paciente_deletado,
+        )
+
+    def _paciente_deletado(self, sucesso):
         if sucesso:
+            espelho.sincronizar_agora()
             messagebox.showinfo("Sucesso", "Paciente deletado com sucesso!")
             self.resultado_text.configure(state="normal")
             self.resultado_text.delete("0.0", "end")
@@ -446,7 +744,14 @@ class MedicoFrame(ctk.CTkFrame):
         self.atualizar_lista_medicos()
 
     def atualizar_lista_medicos(self):
-        medicos = medico_controller.listar_medicos_com_especialidades(db)
+        self.app.despachante.executar(
+            "medicos:lista",
+            lambda: espelho.ler(medico_controller.listar_medicos_resumo, db),
+            self.mostrar_medicos,
+            carregando=lambda: mostrar_texto(self.textbox, "Carregando...\n"),
+        )
+
+    def mostrar_medicos(self, medicos):
         self.textbox.configure(state="normal")
         self.textbox.delete("0.0", "end")
 
@@ -454,7 +759,7 @@ class MedicoFrame(ctk.CTkFrame):
             self.textbox.insert("end", "Nenhum médico encontrado.\n")
         else:
             for medico in medicos:
-                especialidade_nome = medico.especialidade.nome if medico.especialidade else "Sem especialidade"
+                especialidade_nome = medico.especialidade or "Sem especialidade"
                 linha = (
                     f"Nome: {medico.nome}\n"
                     f"CRM: {medico.crm}\n"
@@ -482,6 +787,10 @@ class ConsultaMenuFrame(ctk.CTkFrame):
         btn_voltar.pack(pady=30, ipadx=30, ipady=10)
 
 
+# Máximo de consultas exibidas de uma vez na tela
+LIMITE_CONSULTAS_TELA = 500
+
+
 class ConsultaListFrame(ctk.CTkFrame):
     def __init__(self, parent, app):
         super().__init__(parent)
@@ -506,50 +815,57 @@ class ConsultaListFrame(ctk.CTkFrame):
         self.atualizar_consultas()
 
     def atualizar_consultas(self):
-        nome = self.nome_paciente_entry.get().strip().lower()
+        nome = self.nome_paciente_entry.get().strip()
         data_min = self.data_min_entry.get().strip()
 
-        consultas = consulta_controller.get_consultas_futuras(db)
+        data_min_dt = None
+        if data_min:
+            try:
+                data_min_dt = datetime.strptime(data_min, "%Y-%m-%d")
+            except ValueError:
+                messagebox.showerror("Erro", "Formato de data inválido. Use YYYY-MM-DD.")
+                return
 
+        # Filtros aplicados no próprio SQL, com LIMIT
+        self.app.despachante.executar(
+            "consultas:lista",
+            lambda: espelho.ler(
+                consulta_controller.buscar_consultas,
+                db,
+                paciente=nome or None,
+                data_inicio=data_min_dt,
+                limite=LIMITE_CONSULTAS_TELA,
+            ),
+            self.mostrar_consultas,
+            carregando=lambda: mostrar_texto(self.consultas_text, "Carregando...\n"),
+        )
+
+    def mostrar_consultas(self, consultas):
         self.consultas_text.configure(state="normal")
         self.consultas_text.delete("0.0", "end")
 
-        consultas_filtradas = []
-
-        for c in consultas:
-            paciente_nome = c.paciente.lower()
-            data_consulta_str = str(c.data_consulta)
-
-            if nome and nome not in paciente_nome:
-                continue
-
-            if data_min:
-                try:
-                    from datetime import datetime
-                    data_min_dt = datetime.strptime(data_min, "%Y-%m-%d")
-                    data_consulta_dt = datetime.strptime(data_consulta_str.split()[0], "%Y-%m-%d")
-                    if data_consulta_dt < data_min_dt:
-                        continue
-                except Exception:
-                    messagebox.showerror("Erro", "Formato de data inválido. Use YYYY-MM-DD.")
-                    self.consultas_text.configure(state="disabled")
-                    return
-
-            consultas_filtradas.append(c)
-
-        if not consultas_filtradas:
+        if not consultas:
             self.consultas_text.insert("end", "Nenhuma consulta futura encontrada.\n")
         else:
-            for c in consultas_filtradas:
+            for c in consultas:
                 data_str = str(c.data_consulta)
                 linha = (
                     f"ID Consulta: {c.consulta_id} | Paciente: {c.paciente} | Médico: {c.medico} | "
                     f"Data: {data_str}\n"
                 )
                 self.consultas_text.insert("end", linha)
+            if len(consultas) == LIMITE_CONSULTAS_TELA:
+                self.consultas_text.insert(
+                    "end", f"\nMostrando as {LIMITE_CONSULTAS_TELA} primeiras consultas. Refine a busca para ver outras.\n"
+                )
 
         self.consultas_text.configure(state="disabled")
 
 if __name__ == "__main__":
-    app = App()
+    parser = argparse.ArgumentParser(description="Sistema de Gestão Médica")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="mostra os tempos de import, conexão e primeira pintura")
+    args = parser.parse_args()
+
+    app = App(perfil=PerfilInicializacao() if args.profile_startup else None)
     app.mainloop()
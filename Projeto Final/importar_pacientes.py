@@ -0,0 +1,28 @@
+import argparse
+import time
+
+from config.db import get_db
+from services.importacao_pacientes import importar_pacientes, salvar_rejeitos, TAMANHO_LOTE_PADRAO
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa pacientes em lote de um arquivo CSV ou JSONL.")
+    parser.add_argument("arquivo", help="Arquivo .csv (com cabeçalho) ou .jsonl com os campos: "
+                                        "nome, cpf, data_nascimento, telefone, email")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE_PADRAO, help="Pacientes por INSERT/commit")
+    parser.add_argument("--rejeitos", default="rejeitos_importacao.csv", help="Arquivo do relatório de linhas recusadas")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    with get_db() as db:
+        lidos, inseridos, rejeitos = importar_pacientes(db, args.arquivo, args.lote)
+    duracao = time.perf_counter() - inicio
+
+    print(f"✅ {inseridos} de {lidos} pacientes importados em {duracao:.1f}s")
+    if rejeitos:
+        salvar_rejeitos(args.rejeitos, rejeitos)
+        print(f"⚠️  {len(rejeitos)} linhas recusadas (ver {args.rejeitos})")
+
+
+if __name__ == "__main__":
+    main()
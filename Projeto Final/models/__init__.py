@@ -2,3 +2,5 @@ from .paciente import Paciente
 from .medico import Medico
 from .consulta import Consulta
 from .especialidade import Especialidade
+from .clinica import Clinica
+from .receita_medica import ReceitaMedica
@@ -1,13 +1,34 @@
-from sqlalchemy import Column, Integer, ForeignKey, Date
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, String, Text, Index, text
 from config.db import Base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, synonym
 
 class Consulta(Base):
-    __tablename__ = 'consultas'
+    __tablename__ = 'consulta'
 
     id = Column(Integer, primary_key=True, index=True)
-    id_paciente = Column(Integer, ForeignKey('paciente.id'))
-    id_medico = Column(Integer, ForeignKey('medicos.id'), nullable=False)
-    data_consulta = Column(Date, nullable=False)
+    paciente_id = Column(Integer, ForeignKey('paciente.id', ondelete='CASCADE'))
+    medico_id = Column(Integer, ForeignKey('medico.id', ondelete='SET NULL'))
+    clinica_id = Column(Integer, ForeignKey('clinica.id', ondelete='SET NULL'))
+    data_consulta = Column(DateTime, nullable=False, index=True)
+    status = Column(String(20), default='Agendada')
+    observacoes = Column(Text)
+    # Concorrência otimista: o ORM grava com WHERE versao = <lida> e incrementa
+    versao = Column(Integer, nullable=False, server_default=text("1"))
+
+    __mapper_args__ = {"version_id_col": versao}
+
+    # Índices compostos da migração 005 (ver services/analise_indices.py)
+    __table_args__ = (
+        Index("idx_consulta_medico_data", "medico_id", "data_consulta"),
+        Index("idx_consulta_paciente_data", "paciente_id", "data_consulta"),
+    )
+
+    # Nomes antigos dos atributos, mantidos por compatibilidade
+    id_paciente = synonym('paciente_id')
+    id_medico = synonym('medico_id')
 
     paciente = relationship("Paciente", back_populates="consultas")
+    # Quem apaga as receitas é o ON DELETE CASCADE do banco. Para várias consultas,
+    # carregar com selectinload(Consulta.receitas) (uma query com IN, não uma por consulta)
+    receitas = relationship("ReceitaMedica", back_populates="consulta", cascade="all, delete-orphan",
+                            passive_deletes=True, order_by="ReceitaMedica.id")
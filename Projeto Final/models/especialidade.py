@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, text
 from config.db import Base
 
 class Especialidade(Base):
@@ -6,3 +6,7 @@ class Especialidade(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     nome = Column(String(100), nullable=False)
+    # Concorrência otimista: o ORM grava com WHERE versao = <lida> e incrementa
+    versao = Column(Integer, nullable=False, server_default=text("1"))
+
+    __mapper_args__ = {"version_id_col": versao}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, text
 from sqlalchemy.orm import relationship
 from config.db import Base
 
@@ -9,5 +9,9 @@ class Medico(Base):
     nome = Column(String(100), nullable=False)
     crm = Column(String(20), nullable=False, unique=True)
     especialidade_id = Column(Integer, ForeignKey("especialidade.id"))
+    # Concorrência otimista: o ORM grava com WHERE versao = <lida> e incrementa
+    versao = Column(Integer, nullable=False, server_default=text("1"))
+
+    __mapper_args__ = {"version_id_col": versao}
 
     especialidade = relationship("Especialidade", backref="medicos")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date
+from sqlalchemy import Column, Integer, String, Date, TIMESTAMP, text, func
 from config.db import Base
 from sqlalchemy.orm import relationship
 
@@ -11,6 +11,14 @@ class Paciente(Base):
     data_nascimento = Column(Date)
     telefone = Column(String(20))
     email = Column(String(100))
+    # Marca d'água para atualizar listas só com o que mudou (ver get_alteracoes_pacientes)
+    atualizado_em = Column(TIMESTAMP, server_default=text("CURRENT_TIMESTAMP"), onupdate=func.now(), index=True)
+    # Concorrência otimista: o ORM grava com WHERE versao = <lida> e incrementa
+    versao = Column(Integer, nullable=False, server_default=text("1"))
 
-    consultas = relationship("Consulta", back_populates="paciente", cascade="all, delete")
+    __mapper_args__ = {"version_id_col": versao}
+
+    # passive_deletes: quem apaga as consultas é o ON DELETE CASCADE do banco,
+    # sem carregar cada uma na sessão
+    consultas = relationship("Consulta", back_populates="paciente", cascade="all, delete", passive_deletes=True)
 
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, ForeignKey, Text
+from sqlalchemy.orm import relationship
+from config.db import Base
+
+class ReceitaMedica(Base):
+    __tablename__ = "receita_medica"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    consulta_id = Column(Integer, ForeignKey("consulta.id", ondelete="CASCADE"), index=True)
+    medicamento = Column(Text)
+    posologia = Column(Text)
+
+    consulta = relationship("Consulta", back_populates="receitas")
+
+    def __repr__(self):
+        return f"<ReceitaMedica(id={self.id}, consulta_id={self.consulta_id}, medicamento='{self.medicamento}')>"
@@ -0,0 +1,42 @@
+import argparse
+from datetime import date
+
+from config.db import get_db
+from controllers import relatorio_controller
+from services import resumo_consultas
+
+
+def _mes(valor: str):
+    ano, mes = valor.split("-")
+    return int(ano), int(mes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumo diário de consultas (relatórios por médico, clínica e especialidade).")
+    parser.add_argument("--reconstruir", action="store_true", help="Recalcula o resumo a partir da tabela consulta")
+    parser.add_argument("--desde", type=date.fromisoformat, help="Início do período a reconstruir (AAAA-MM-DD)")
+    parser.add_argument("--ate", type=date.fromisoformat, help="Fim do período a reconstruir (AAAA-MM-DD)")
+    parser.add_argument("--mes", type=_mes, help="Mostra o comparativo do mês (AAAA-MM) com o anterior")
+    parser.add_argument("--por", choices=sorted(relatorio_controller.DIMENSOES), default="medico",
+                        help="Agrupamento do comparativo")
+    parser.add_argument("--status", help="Considera só consultas com este status")
+    args = parser.parse_args()
+
+    if not args.reconstruir and not args.mes:
+        parser.error("informe --reconstruir e/ou --mes")
+
+    with get_db() as db:
+        if args.reconstruir:
+            linhas = resumo_consultas.reconstruir(db, args.desde, args.ate)
+            print(f"✅ Resumo reconstruído: {linhas} linhas.")
+        if args.mes:
+            ano, mes = args.mes
+            print(f"{args.por:<40} {'anterior':>10} {'atual':>10} {'variação':>10}")
+            for chave, nome, antes, agora, variacao in relatorio_controller.comparativo_mensal(
+                    db, ano, mes, args.por, args.status):
+                texto = f"{variacao:+.0%}" if variacao is not None else "—"
+                print(f"{str(nome)[:40]:<40} {antes:>10} {agora:>10} {texto:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import re
+from collections import namedtuple
+
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+
+from services.instrumentacao import origem_da_chamada
+
+# Índices da migração 005 e as consultas que motivaram cada um.
+# verificar_recomendacoes() confere, pelo EXPLAIN, se cada um é de fato usado.
+RECOMENDACOES = {
+    "idx_consulta_medico_data": (
+        "consulta", ("medico_id", "data_consulta"),
+        "agenda do médico (conflito de horário, cancelar_consultas_do_medico, consulta_futura por médico)",
+    ),
+    "idx_consulta_paciente_data": (
+        "consulta", ("paciente_id", "data_consulta"),
+        "consultas do paciente já na ordem de data (listar_consultas_resumo_por_paciente)",
+    ),
+}
+
+# Varreduras completas em tabelas menores que isso não são problema
+LINHAS_MINIMAS_PADRAO = 1000
+
+Instrucao = namedtuple("Instrucao", ["origem", "sql", "parametros"])
+Problema = namedtuple("Problema", ["tipo", "tabela", "detalhe"])
+
+VARREDURA = "varredura completa"
+ORDENACAO = "ordenação (filesort)"
+TEMPORARIA = "tabela temporária"
+
+
+class ColetorInstrucoes:
+    """
+    Guarda as instruções SELECT/UPDATE/DELETE emitidas pela engine (uma por
+    texto SQL, com os parâmetros da primeira execução) e quem as emitiu:
+    o 'caso' atual, se informado, senão a função de controller da pilha.
+
+        with ColetorInstrucoes(engine) as coletor:
+            coletor.caso = "paciente_controller.get_all_pacientes"
+            paciente_controller.get_all_pacientes(db)
+        coletor.instrucoes
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.caso = None
+        self._por_sql = {}
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._antes)
+        return self
+
+    def __exit__(self, *excecao):
+        event.remove(self.engine, "before_cursor_execute", self._antes)
+
+    def _antes(self, conn, cursor, statement, parameters, context, executemany):
+        if executemany or statement in self._por_sql:
+            return
+        if statement.lstrip().split(None, 1)[0].upper() not in ("SELECT", "UPDATE", "DELETE", "WITH"):
+            return
+        self._por_sql[statement] = Instrucao(self.caso or origem_da_chamada(), statement, parameters)
+
+    @property
+    def instrucoes(self):
+        return list(self._por_sql.values())
+
+
+def _plano_mysql(conn, instrucao):
+    linhas = conn.exec_driver_sql("EXPLAIN " + instrucao.sql, instrucao.parametros).mappings().all()
+    return [dict(linha) for linha in linhas]
+
+
+def _plano_sqlite(conn, instrucao):
+    linhas = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + instrucao.sql, instrucao.parametros).all()
+    return [{"detail": linha[-1]} for linha in linhas]
+
+
+def _problemas_mysql(plano, linhas_minimas):
+    problemas = []
+    for passo in plano:
+        extra = passo.get("Extra") or ""
+        tabela = passo.get("table")
+        if passo.get("type") == "ALL" and (passo.get("rows") or 0) >= linhas_minimas:
+            problemas.append(Problema(VARREDURA, tabela, f"~{passo['rows']} linhas"))
+        if "Using filesort" in extra:
+            problemas.append(Problema(ORDENACAO, tabela, extra))
+        if "Using temporary" in extra:
+            problemas.append(Problema(TEMPORARIA, tabela, extra))
+    return problemas
+
+
+def _problemas_sqlite(plano, linhas_minimas):
+    # O SQLite não estima linhas no EXPLAIN QUERY PLAN: toda varredura sem índice conta
+    problemas = []
+    for passo in plano:
+        detalhe = passo["detail"]
+        varredura = re.match(r"SCAN (?:TABLE )?(\w+)", detalhe)
+        if varredura and "USING" not in detalhe and varredura.group(1) != "CONSTANT":
+            problemas.append(Problema(VARREDURA, varredura.group(1), detalhe))
+        if "TEMP B-TREE FOR ORDER BY" in detalhe or "TEMP B-TREE FOR RIGHT PART OF ORDER BY" in detalhe:
+            problemas.append(Problema(ORDENACAO, None, detalhe))
+        if re.search(r"TEMP B-TREE FOR (GROUP BY|DISTINCT)", detalhe):
+            problemas.append(Problema(TEMPORARIA, None, detalhe))
+    return problemas
+
+
+def indices_usados(plano):
+    """
+    Nomes dos índices que aparecem no plano (MySQL: coluna key; SQLite: USING INDEX).
+    """
+    usados = set()
+    for passo in plano:
+        if "detail" in passo:
+            usados.update(re.findall(r"USING (?:COVERING )?INDEX (\w+)", passo["detail"]))
+        elif passo.get("key"):
+            usados.update(passo["key"].split(","))
+    return usados
+
+
+def analisar(conn, instrucoes, linhas_minimas: int = LINHAS_MINIMAS_PADRAO):
+    """
+    Roda EXPLAIN em cada instrução. Retorna uma lista de
+    (instrucao, plano, problemas), das instruções com mais problemas para as sem nenhum.
+    Instruções que o banco não consegue explicar voltam com plano None.
+    """
+    if conn.dialect.name == "sqlite":
+        planejar, problemas_de = _plano_sqlite, _problemas_sqlite
+    else:
+        planejar, problemas_de = _plano_mysql, _problemas_mysql
+
+    resultado = []
+    for instrucao in instrucoes:
+        try:
+            plano = planejar(conn, instrucao)
+        except SQLAlchemyError as e:
+            print(f"Erro ao explicar instrução de {instrucao.origem}: {e}")
+            resultado.append((instrucao, None, []))
+            continue
+        resultado.append((instrucao, plano, problemas_de(plano, linhas_minimas)))
+    resultado.sort(key=lambda item: len(item[2]), reverse=True)
+    return resultado
+
+
+def verificar_recomendacoes(analises):
+    """
+    Para cada índice de RECOMENDACOES, as origens das instruções cujo plano o usa
+    (lista vazia: o índice não se paga para este conjunto de consultas).
+    """
+    usos = {nome: [] for nome in RECOMENDACOES}
+    for instrucao, plano, _ in analises:
+        for nome in indices_usados(plano or []) & usos.keys():
+            if instrucao.origem not in usos[nome]:
+                usos[nome].append(instrucao.origem)
+    return usos
@@ -0,0 +1,281 @@
+import os
+import json
+import queue
+import atexit
+import threading
+from datetime import datetime, date
+
+from sqlalchemy import insert, select, delete, text, table, column
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+# Registro de criações e alterações de paciente, médico e consulta.
+# As deleções de paciente continuam no log_delecao_paciente (trigger).
+# Particionada por mês no MySQL (ver manter_particoes).
+log_auditoria = table(
+    "log_auditoria",
+    column("id"),
+    column("data_hora"),
+    column("tabela"),
+    column("registro_id"),
+    column("operacao"),
+    column("dados"),
+)
+
+INSERCAO = "INSERT"
+ALTERACAO = "UPDATE"
+# UPDATE de vários registros de uma vez (update_*_em_lote): registro_id fica vazio
+ALTERACAO_EM_LOTE = "UPDATE_LOTE"
+
+TAMANHO_LOTE = int(os.getenv("DB_AUDITORIA_LOTE", "500"))
+# Segundos máximos que um evento espera na fila antes de ir para o banco
+INTERVALO = float(os.getenv("DB_AUDITORIA_INTERVALO", "2"))
+# Eventos em memória; acima disso vão direto para o arquivo de pendentes
+CAPACIDADE = 100_000
+# Eventos que não puderam ser gravados (banco fora, fila cheia, encerramento);
+# são reenviados na próxima vez que a auditoria iniciar
+ARQUIVO_PENDENTES = os.getenv("DB_AUDITORIA_PENDENTES", "auditoria_pendentes.jsonl")
+
+RETENCAO_MESES_PADRAO = 12
+
+
+def _valor_json(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return str(valor)
+
+
+class Auditoria:
+    """
+    Fila em memória de eventos de auditoria, gravada no banco em lotes (um
+    INSERT multi-linha) por uma thread em segundo plano. Quem chama registrar()
+    não espera o banco.
+
+        auditoria.registrar("paciente", paciente.id, INSERCAO, {"nome": nome})
+
+    A thread inicia no primeiro evento. Ao encerrar o processo, o que estiver
+    na fila é gravado; se o banco não responder, vai para ARQUIVO_PENDENTES.
+    """
+
+    def __init__(self, fabrica_sessao=None, tamanho_lote: int = TAMANHO_LOTE, intervalo: float = INTERVALO,
+                 capacidade: int = CAPACIDADE, arquivo_pendentes: str = ARQUIVO_PENDENTES):
+        self.fabrica_sessao = fabrica_sessao
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self.arquivo_pendentes = arquivo_pendentes
+        self.ativa = os.getenv("DB_AUDITORIA", "true").strip().lower() not in ("0", "false", "no", "nao", "não", "off")
+        self._fila = queue.Queue(maxsize=capacidade)
+        self._lock = threading.Lock()
+        self._lock_pendentes = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+        self.gravados = 0
+
+    # ---------- produção ----------
+
+    def registrar(self, tabela: str, registro_id, operacao: str, dados: dict = None):
+        """
+        Enfileira um evento (não acessa o banco). A hora é a do registro, não a da gravação.
+        """
+        if not self.ativa:
+            return
+        evento = {
+            "data_hora": datetime.now(),
+            "tabela": tabela,
+            "registro_id": registro_id,
+            "operacao": operacao,
+            "dados": json.dumps(dados, ensure_ascii=False, default=_valor_json) if dados else None,
+        }
+        self.iniciar()
+        try:
+            self._fila.put_nowait(evento)
+        except queue.Full:
+            self._salvar_pendentes([evento])
+
+    def registrar_varios(self, tabela: str, operacao: str, linhas):
+        """
+        Um evento por linha (dict com os valores gravados; 'id', se houver, vira registro_id).
+        """
+        for linha in linhas:
+            linha = dict(linha)
+            self.registrar(tabela, linha.pop("id", None), operacao, linha)
+
+    # ---------- thread de gravação ----------
+
+    def iniciar(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            if self.fabrica_sessao is None:
+                from config.db import SessionLocal
+                self.fabrica_sessao = SessionLocal
+            self._recuperar_pendentes()
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._laco, name="auditoria", daemon=True)
+            self._thread.start()
+            atexit.register(self.encerrar)
+
+    def _proximo_lote(self, espera):
+        try:
+            lote = [self._fila.get(timeout=espera)]
+        except queue.Empty:
+            return []
+        while len(lote) < self.tamanho_lote:
+            try:
+                lote.append(self._fila.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+
+    def _laco(self):
+        pendente = []
+        while not self._parar.is_set():
+            pendente = pendente or self._proximo_lote(self.intervalo)
+            if pendente and self._gravar(pendente):
+                pendente = []
+            elif pendente:
+                # Banco indisponível: tenta o mesmo lote de novo depois do intervalo
+                self._parar.wait(self.intervalo)
+        if pendente:
+            self._salvar_pendentes(pendente)
+
+    def _gravar(self, lote):
+        db = self.fabrica_sessao()
+        try:
+            db.execute(insert(log_auditoria).values(lote))
+            db.commit()
+            self.gravados += len(lote)
+            return True
+        except SQLAlchemyError as e:
+            db.rollback()
+            # Só a mensagem do banco: o SQL de um INSERT com centenas de linhas não cabe no log
+            print(f"Erro ao gravar auditoria: {getattr(e, 'orig', None) or e}")
+            return False
+        finally:
+            db.close()
+
+    def descarregar(self):
+        """
+        Grava agora (na thread de quem chama) tudo o que está na fila.
+        Retorna False se algum lote não pôde ser gravado (esse lote volta para pendentes).
+        """
+        while True:
+            lote = self._proximo_lote(0.001)
+            if not lote:
+                return True
+            if not self._gravar(lote):
+                self._salvar_pendentes(lote + self._proximo_lote(0.001))
+                return False
+
+    def encerrar(self, timeout: float = 10.0):
+        """
+        Para a thread e grava o que restou na fila (ou salva em ARQUIVO_PENDENTES).
+        """
+        if self._thread is None:
+            return
+        self._parar.set()
+        self._thread.join(timeout)
+        self._thread = None
+        if not self.descarregar():
+            # Banco fora: o resto da fila também vai para o arquivo
+            restantes = []
+            while True:
+                try:
+                    restantes.append(self._fila.get_nowait())
+                except queue.Empty:
+                    break
+            self._salvar_pendentes(restantes)
+
+    # ---------- durabilidade ----------
+
+    def _salvar_pendentes(self, eventos):
+        if not eventos:
+            return
+        with self._lock_pendentes:
+            with open(self.arquivo_pendentes, "a", encoding="utf-8") as f:
+                for evento in eventos:
+                    f.write(json.dumps(evento, ensure_ascii=False, default=_valor_json) + "\n")
+        print(f"⚠️  {len(eventos)} eventos de auditoria salvos em {self.arquivo_pendentes}")
+
+    def _recuperar_pendentes(self):
+        """
+        Devolve para a fila os eventos salvos em arquivo numa execução anterior.
+        """
+        if not os.path.exists(self.arquivo_pendentes):
+            return
+        with self._lock_pendentes:
+            with open(self.arquivo_pendentes, encoding="utf-8") as f:
+                eventos = [json.loads(linha) for linha in f if linha.strip()]
+            os.remove(self.arquivo_pendentes)
+        for evento in eventos:
+            evento["data_hora"] = datetime.fromisoformat(evento["data_hora"])
+            try:
+                self._fila.put_nowait(evento)
+            except queue.Full:
+                self._salvar_pendentes([evento])
+
+
+auditoria = Auditoria()
+
+
+# -------------------- CONSULTA E RETENÇÃO --------------------
+
+def historico(db: Session, tabela: str, registro_id: int, limite: int = 100):
+    """
+    Eventos de um registro, do mais recente para o mais antigo.
+    """
+    query = (
+        select(log_auditoria.c.data_hora, log_auditoria.c.operacao, log_auditoria.c.dados)
+        .where(log_auditoria.c.tabela == tabela, log_auditoria.c.registro_id == registro_id)
+        .order_by(log_auditoria.c.data_hora.desc())
+        .limit(limite)
+    )
+    return db.execute(query).all()
+
+
+def _inicio_do_mes(dia: date, deslocamento: int = 0) -> date:
+    meses = dia.year * 12 + dia.month - 1 + deslocamento
+    return date(meses // 12, meses % 12 + 1, 1)
+
+
+def manter_particoes(db: Session, retencao_meses: int = RETENCAO_MESES_PADRAO, meses_adiante: int = 2,
+                     hoje: date = None):
+    """
+    Mantém uma partição por mês em log_auditoria: cria as dos próximos
+    'meses_adiante' meses e descarta (DROP PARTITION, sem varrer linhas) as
+    anteriores à retenção. Fora do MySQL, apaga as linhas antigas com DELETE.
+    Retorna (particoes_criadas, particoes_ou_linhas_removidas).
+    """
+    hoje = hoje or date.today()
+    limite = _inicio_do_mes(hoje, -retencao_meses)
+
+    if db.get_bind().dialect.name != "mysql":
+        removidas = db.execute(delete(log_auditoria).where(log_auditoria.c.data_hora < limite)).rowcount
+        db.commit()
+        return 0, removidas
+
+    existentes = dict(db.execute(text(
+        "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'log_auditoria' AND PARTITION_NAME IS NOT NULL"
+    )).all())
+
+    novas = []
+    for deslocamento in range(0, meses_adiante + 1):
+        mes = _inicio_do_mes(hoje, deslocamento)
+        nome = f"p{mes:%Y%m}"
+        if nome not in existentes:
+            novas.append(f"PARTITION {nome} VALUES LESS THAN ('{_inicio_do_mes(mes, 1).isoformat()}')")
+    if novas:
+        # p_futuro (MAXVALUE) é sempre a última; as novas entram antes dela
+        db.execute(text(
+            "ALTER TABLE log_auditoria REORGANIZE PARTITION p_futuro INTO ("
+            + ", ".join(novas) + ", PARTITION p_futuro VALUES LESS THAN (MAXVALUE))"
+        ))
+
+    antigas = [nome for nome in existentes if nome != "p_futuro" and nome < f"p{limite:%Y%m}"]
+    if antigas:
+        db.execute(text(f"ALTER TABLE log_auditoria DROP PARTITION {', '.join(antigas)}"))
+    db.commit()
+    return len(novas), len(antigas)
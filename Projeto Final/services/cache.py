@@ -0,0 +1,101 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+
+class CacheTTL:
+    """
+    Cache em memória com expiração (TTL) e limite de itens (LRU).
+    Guarda contadores de acertos/erros para acompanhar a eficácia.
+    """
+
+    def __init__(self, max_itens: int = 128, ttl: float = 300.0):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._itens = OrderedDict()   # chave -> (expira_em, valor)
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.expirados = 0
+        self.invalidacoes = 0
+        # Incrementada a cada invalidar(): um valor carregado antes dela não é guardado
+        self._geracao = 0
+
+    def obter(self, chave, carregar):
+        """
+        Retorna o valor em cache ou chama carregar() e guarda o resultado.
+        """
+        agora = time.monotonic()
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None:
+                expira_em, valor = item
+                if expira_em > agora:
+                    self._itens.move_to_end(chave)
+                    self.hits += 1
+                    return valor
+                del self._itens[chave]
+                self.expirados += 1
+            self.misses += 1
+            geracao = self._geracao
+
+        # Carrega fora do lock para não travar outras threads durante a query
+        valor = carregar()
+
+        with self._lock:
+            if self._geracao != geracao:
+                # Houve invalidação durante a carga: o valor pode ser anterior a ela
+                return valor
+            self._itens[chave] = (time.monotonic() + self.ttl, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+        return valor
+
+    def invalidar(self, prefixo: str = None):
+        """
+        Remove as chaves que começam com 'prefixo' (ou tudo, se não for informado).
+        """
+        with self._lock:
+            self._geracao += 1
+            if prefixo is None:
+                removidas = len(self._itens)
+                self._itens.clear()
+            else:
+                chaves = [c for c in self._itens if str(c).startswith(prefixo)]
+                for chave in chaves:
+                    del self._itens[chave]
+                removidas = len(chaves)
+            self.invalidacoes += removidas
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "taxa_acerto": self.hits / total if total else 0.0,
+                "itens": len(self._itens),
+                "expirados": self.expirados,
+                "invalidacoes": self.invalidacoes,
+            }
+
+
+# Cache dos dados de referência (médicos, especialidades, clínicas), que mudam pouco
+cache_referencia = CacheTTL(
+    max_itens=int(os.getenv("CACHE_MAX_ITENS", "128")),
+    ttl=float(os.getenv("CACHE_TTL_SEGUNDOS", "300")),
+)
+
+
+def carregar_desanexado(db, consulta):
+    """
+    Executa consulta(sessao) em uma sessão própria, ligada à mesma engine de 'db',
+    e devolve os objetos já desanexados. Assim o que fica no cache não depende da
+    sessão (nem da thread) de quem fez a primeira chamada.
+    """
+    from sqlalchemy.orm import Session
+
+    with Session(bind=db.get_bind()) as sessao:
+        return consulta(sessao)
@@ -0,0 +1,139 @@
+import threading
+from datetime import datetime
+
+from sqlalchemy import select, delete, insert, update, func, table, column
+from sqlalchemy.orm import Session
+
+from models.consulta import Consulta
+from models.paciente import Paciente
+from models.medico import Medico
+from models.especialidade import Especialidade
+from models.clinica import Clinica
+
+# Cópia desnormalizada das consultas a partir de agora (mesmas colunas de
+# vw_consultas_futuras, mais os ids), indexada por data_consulta.
+# Mantida pelos controllers; as consultas que já passaram são removidas por expirar().
+consulta_futura = table(
+    "consulta_futura",
+    column("consulta_id"),
+    column("data_consulta"),
+    column("paciente"),
+    column("medico"),
+    column("especialidade"),
+    column("clinica"),
+    column("status"),
+    column("paciente_id"),
+    column("medico_id"),
+    column("clinica_id"),
+    column("especialidade_id"),
+)
+
+COLUNAS = [c.name for c in consulta_futura.columns]
+
+# Intervalo padrão (segundos) entre as expirações automáticas
+INTERVALO_EXPIRACAO = 15 * 60
+
+
+def _select_desnormalizado(*criterios):
+    """
+    SELECT das consultas futuras já com os nomes (LEFT JOIN: consultas sem
+    médico ou clínica também aparecem), na ordem de COLUNAS.
+    """
+    return (
+        select(
+            Consulta.id, Consulta.data_consulta, Paciente.nome, Medico.nome, Especialidade.nome,
+            Clinica.nome, Consulta.status, Consulta.paciente_id, Consulta.medico_id,
+            Consulta.clinica_id, Medico.especialidade_id,
+        )
+        .outerjoin(Paciente, Consulta.paciente_id == Paciente.id)
+        .outerjoin(Medico, Consulta.medico_id == Medico.id)
+        .outerjoin(Especialidade, Medico.especialidade_id == Especialidade.id)
+        .outerjoin(Clinica, Consulta.clinica_id == Clinica.id)
+        .where(Consulta.data_consulta >= func.now(), *criterios)
+    )
+
+
+def atualizar(db: Session, *criterios):
+    """
+    Regrava as consultas que atendem aos critérios (ex.: Consulta.id.in_(ids)).
+    As que deixaram de ser futuras ou foram apagadas somem da tabela.
+    Não faz commit: deve rodar na mesma transação da alteração em consulta.
+    """
+    ids = select(Consulta.id).where(*criterios).scalar_subquery()
+    db.execute(delete(consulta_futura).where(consulta_futura.c.consulta_id.in_(ids)))
+    db.execute(insert(consulta_futura).from_select(COLUNAS, _select_desnormalizado(*criterios)))
+
+
+def atualizar_por(db: Session, coluna: str, valor):
+    """
+    Regrava as consultas cuja cópia tem consulta_futura.<coluna> == valor
+    (ex.: depois de apagar um médico, quando consulta.medico_id já virou NULL).
+    """
+    ids = db.execute(
+        select(consulta_futura.c.consulta_id).where(consulta_futura.c[coluna] == valor)
+    ).scalars().all()
+    if ids:
+        atualizar(db, Consulta.id.in_(ids))
+
+
+def remover(db: Session, *criterios):
+    """
+    Apaga linhas da tabela por critérios sobre consulta_futura (ex.: consulta_futura.c.paciente_id == 1).
+    Não faz commit.
+    """
+    db.execute(delete(consulta_futura).where(*criterios))
+
+
+def renomear(db: Session, campo: str, ids, nome: str):
+    """
+    Propaga a troca de nome de paciente, médico, especialidade ou clínica
+    (campo = "paciente", "medico", "especialidade" ou "clinica") para os ids
+    informados (lista ou SELECT). Não faz commit.
+    """
+    coluna_id = consulta_futura.c[f"{campo}_id"]
+    db.execute(update(consulta_futura).where(coluna_id.in_(ids)).values({campo: nome}))
+
+
+def reconstruir(db: Session):
+    """
+    Recria a tabela inteira a partir de consulta. Faz commit.
+    Retorna a quantidade de consultas futuras gravadas.
+    """
+    db.execute(delete(consulta_futura))
+    resultado = db.execute(insert(consulta_futura).from_select(COLUNAS, _select_desnormalizado()))
+    db.commit()
+    return resultado.rowcount
+
+
+def expirar(db: Session, agora: datetime = None):
+    """
+    Remove as consultas que já passaram. Faz commit e retorna quantas saíram.
+    As leituras já filtram por data, então atrasar a expiração não muda resultados.
+    """
+    limite = agora if agora is not None else func.now()
+    resultado = db.execute(delete(consulta_futura).where(consulta_futura.c.data_consulta < limite))
+    db.commit()
+    return resultado.rowcount
+
+
+def iniciar_expiracao(fabrica_sessao, intervalo: float = INTERVALO_EXPIRACAO):
+    """
+    Roda expirar() a cada 'intervalo' segundos numa thread daemon, com sessões
+    próprias criadas por fabrica_sessao (ex.: SessionLocal).
+    Retorna um threading.Event: set() encerra a thread.
+    """
+    parar = threading.Event()
+
+    def laco():
+        while not parar.wait(intervalo):
+            db = fabrica_sessao()
+            try:
+                expirar(db)
+            except Exception as e:
+                db.rollback()
+                print(f"Erro ao expirar consultas futuras: {e}")
+            finally:
+                db.close()
+
+    threading.Thread(target=laco, name="expiracao-consultas-futuras", daemon=True).start()
+    return parar
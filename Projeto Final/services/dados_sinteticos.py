@@ -0,0 +1,220 @@
+import random
+from datetime import datetime, timedelta, time
+
+from sqlalchemy import insert, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from models.paciente import Paciente
+from models.medico import Medico
+from models.especialidade import Especialidade
+from models.clinica import Clinica
+from models.consulta import Consulta
+from models.receita_medica import ReceitaMedica
+
+TAMANHO_LOTE = 5000
+
+PRIMEIROS_NOMES = [
+    "Ana", "Maria", "João", "José", "Pedro", "Lucas", "Gabriel", "Rafael", "Mariana", "Juliana",
+    "Fernanda", "Camila", "Beatriz", "Larissa", "Letícia", "Bruno", "Gustavo", "Felipe", "Matheus",
+    "Carlos", "Paulo", "Antônio", "Francisco", "Luiz", "Helena", "Alice", "Laura", "Sophia", "Valentina",
+    "Heloísa", "Isabela", "Manuela", "Júlia", "Luísa", "Cecília", "Otávio", "Enzo", "Davi", "Heitor", "Caio",
+]
+SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+    "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa",
+    "Rocha", "Dias", "Nascimento", "Andrade", "Moreira", "Nunes", "Marques", "Machado", "Mendes", "Freitas",
+    "Cardoso", "Ramos", "Gonçalves", "Santana", "Teixeira", "Araújo", "Conceição", "Caldeira", "Peixoto", "Moura",
+]
+ESPECIALIDADES = [
+    "Clínico Geral", "Cardiologia", "Pediatria", "Dermatologia", "Ortopedia", "Ginecologia", "Neurologia",
+    "Oftalmologia", "Psiquiatria", "Endocrinologia", "Gastroenterologia", "Urologia", "Otorrinolaringologia",
+    "Pneumologia", "Reumatologia", "Nefrologia", "Oncologia", "Geriatria", "Fisioterapia", "Nutrologia",
+]
+MEDICAMENTOS = [
+    "Dipirona 500mg", "Paracetamol 750mg", "Ibuprofeno 400mg", "Amoxicilina 500mg", "Losartana 50mg",
+    "Metformina 850mg", "Omeprazol 20mg", "Sinvastatina 20mg", "Levotiroxina 50mcg", "Azitromicina 500mg",
+]
+POSOLOGIAS = ["1 comprimido a cada 8 horas", "1 comprimido ao dia", "1 comprimido a cada 12 horas", "Uso se dor"]
+
+
+def gerar_cpf(numero: int) -> str:
+    """
+    CPF válido e único derivado de um número sequencial.
+    """
+    digitos = [int(d) for d in f"{numero % 10 ** 9:09d}"]
+    for tamanho in (9, 10):
+        soma = sum(d * peso for d, peso in zip(digitos, range(tamanho + 1, 1, -1)))
+        digitos.append((soma * 10) % 11 % 10)
+    s = "".join(map(str, digitos))
+    return f"{s[:3]}.{s[3:6]}.{s[6:9]}-{s[9:]}"
+
+
+def _pesos_zipf(rng: random.Random, quantidade: int, s: float = 1.0):
+    """
+    Pesos acumulados de uma distribuição de Zipf (o k-ésimo item tem peso 1/k^s),
+    com os postos embaralhados: poucos itens muito frequentes (médicos concorridos,
+    pacientes crônicos) e uma cauda longa de itens raros.
+    """
+    postos = list(range(1, quantidade + 1))
+    rng.shuffle(postos)
+    acumulado, total = [], 0.0
+    for posto in postos:
+        total += 1 / posto ** s
+        acumulado.append(total)
+    return acumulado
+
+
+class Escala:
+    """
+    Quantidade de linhas de cada tabela. Só 'consultas' é obrigatório;
+    as demais são proporcionais a ele.
+    """
+
+    def __init__(self, consultas: int, pacientes: int = None, medicos: int = None,
+                 clinicas: int = None, receitas_por_consulta: float = 0.6):
+        self.consultas = consultas
+        self.pacientes = pacientes or max(100, consultas // 10)
+        self.medicos = medicos or max(10, consultas // 2000)
+        self.clinicas = clinicas or max(2, consultas // 100000)
+        self.especialidades = len(ESPECIALIDADES)
+        self.receitas_por_consulta = receitas_por_consulta
+
+    def __repr__(self):
+        return (f"<Escala(consultas={self.consultas}, pacientes={self.pacientes}, medicos={self.medicos}, "
+                f"clinicas={self.clinicas})>")
+
+
+def _inserir_em_lotes(conexao: Connection, tabela, linhas, progresso=None):
+    lote, total = [], 0
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= TAMANHO_LOTE:
+            conexao.execute(insert(tabela).values(lote))
+            conexao.commit()
+            total += len(lote)
+            lote = []
+            if progresso:
+                progresso(tabela.name, total)
+    if lote:
+        conexao.execute(insert(tabela).values(lote))
+        conexao.commit()
+        total += len(lote)
+        if progresso:
+            progresso(tabela.name, total)
+    return total
+
+
+def limpar_tabelas(db: Session):
+    """
+    Apaga todas as linhas das tabelas preenchidas pelo gerador.
+    """
+    for nome in ("consulta_futura", "resumo_consultas_diario", "receita_medica", "consulta", "paciente", "medico", "especialidade", "clinica"):
+        db.execute(text(f"DELETE FROM {nome}"))
+    db.commit()
+
+
+def gerar(db: Session, escala: Escala, semente: int = 42, progresso=None, hoje: datetime = None):
+    """
+    Preenche o banco com dados sintéticos determinísticos (mesma semente = mesmos dados).
+    Espera as tabelas vazias: os ids gerados começam em 1.
+    Retorna um dict com o total de linhas inseridas por tabela.
+    """
+    rng = random.Random(semente)
+    hoje = (hoje or datetime.now()).replace(minute=0, second=0, microsecond=0)
+    totais = {}
+
+    # O trigger before_insert_consulta recusa datas no passado. No MySQL, fixar o
+    # relógio da sessão no passado faz o NOW() do trigger aceitar o histórico.
+    # SET TIMESTAMP só vale na conexão em que foi executado: tudo roda numa
+    # única conexão, separada da Session (cujo commit devolveria a conexão ao
+    # pool a cada lote), e o relógio volta ao normal nela mesma antes de fechar.
+    conexao = db.get_bind().connect()
+    mysql = conexao.dialect.name == "mysql"
+
+    try:
+        if mysql:
+            conexao.execute(text("SET TIMESTAMP = UNIX_TIMESTAMP('2000-01-01')"))
+
+        totais["especialidade"] = _inserir_em_lotes(conexao, Especialidade.__table__, (
+            {"id": i + 1, "nome": nome} for i, nome in enumerate(ESPECIALIDADES)
+        ), progresso)
+
+        totais["clinica"] = _inserir_em_lotes(conexao, Clinica.__table__, (
+            {"id": i, "nome": f"Clínica {rng.choice(SOBRENOMES)} {i}",
+             "endereco": f"Rua {rng.choice(SOBRENOMES)}, {rng.randint(1, 2000)}"}
+            for i in range(1, escala.clinicas + 1)
+        ), progresso)
+
+        # Clínico geral e pediatria concentram mais médicos
+        pesos_especialidade = _pesos_zipf(rng, escala.especialidades)
+        totais["medico"] = _inserir_em_lotes(conexao, Medico.__table__, (
+            {"id": i, "nome": f"Dr(a). {rng.choice(PRIMEIROS_NOMES)} {rng.choice(SOBRENOMES)}",
+             "crm": f"CRM{i:07d}",
+             "especialidade_id": rng.choices(range(1, escala.especialidades + 1), cum_weights=pesos_especialidade)[0]}
+            for i in range(1, escala.medicos + 1)
+        ), progresso)
+
+        def pacientes():
+            for i in range(1, escala.pacientes + 1):
+                nascimento = hoje.date() - timedelta(days=rng.randint(0, 95 * 365))
+                primeiro = rng.choice(PRIMEIROS_NOMES)
+                yield {
+                    "id": i,
+                    "nome": f"{primeiro} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}",
+                    "cpf": gerar_cpf(i),
+                    "data_nascimento": nascimento,
+                    "telefone": f"({rng.randint(11, 99)}) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+                    "email": f"{primeiro.lower()}.{i}@exemplo.com.br",
+                }
+
+        totais["paciente"] = _inserir_em_lotes(conexao, Paciente.__table__, pacientes(), progresso)
+
+        # Consultas: 2 anos de histórico e 6 meses de agenda futura, só em dias úteis e horário comercial
+        pesos_medicos = _pesos_zipf(rng, escala.medicos, s=0.8)
+        pesos_pacientes = _pesos_zipf(rng, escala.pacientes)
+        clinica_do_medico = {m: rng.randint(1, escala.clinicas) for m in range(1, escala.medicos + 1)}
+        inicio = hoje - timedelta(days=730)
+        dias = 730 + 180
+
+        def consultas():
+            for i in range(1, escala.consultas + 1):
+                medico_id = rng.choices(range(1, escala.medicos + 1), cum_weights=pesos_medicos)[0]
+                dia = inicio + timedelta(days=rng.randrange(dias))
+                while dia.weekday() >= 5:
+                    dia -= timedelta(days=rng.randint(1, 2))
+                data = datetime.combine(dia.date(), time(rng.choice((8, 9, 10, 11, 14, 15, 16, 17)), rng.choice((0, 30))))
+                if data >= hoje:
+                    status = "Cancelada" if rng.random() < 0.05 else "Agendada"
+                else:
+                    sorteio = rng.random()
+                    status = "Realizada" if sorteio < 0.85 else ("Cancelada" if sorteio < 0.95 else "Faltou")
+                yield {
+                    "id": i,
+                    "paciente_id": rng.choices(range(1, escala.pacientes + 1), cum_weights=pesos_pacientes)[0],
+                    "medico_id": medico_id,
+                    "clinica_id": clinica_do_medico[medico_id],
+                    "data_consulta": data,
+                    "status": status,
+                    "observacoes": None,
+                }
+
+        totais["consulta"] = _inserir_em_lotes(conexao, Consulta.__table__, consultas(), progresso)
+
+        def receitas():
+            for consulta_id in range(1, escala.consultas + 1):
+                quantidade = int(escala.receitas_por_consulta + rng.random())
+                for _ in range(quantidade):
+                    yield {
+                        "consulta_id": consulta_id,
+                        "medicamento": rng.choice(MEDICAMENTOS),
+                        "posologia": rng.choice(POSOLOGIAS),
+                    }
+
+        totais["receita_medica"] = _inserir_em_lotes(conexao, ReceitaMedica.__table__, receitas(), progresso)
+    finally:
+        conexao.rollback()
+        if mysql:
+            conexao.execute(text("SET TIMESTAMP = DEFAULT"))
+        conexao.close()
+    return totais
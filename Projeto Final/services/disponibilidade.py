@@ -0,0 +1,182 @@
+import heapq
+import threading
+from bisect import bisect_right, insort
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+DURACAO_PADRAO = timedelta(minutes=30)
+
+# Segunda (0) a sexta (4), 08h-12h e 14h-18h
+TURNOS_PADRAO = {dia: [(time(8), time(12)), (time(14), time(18))] for dia in range(5)}
+
+# Consultas com esse status não ocupam o horário
+STATUS_LIVRES = {"Cancelada"}
+
+# Até quantos dias à frente procurar horários livres
+HORIZONTE_DIAS = 90
+
+
+class Expediente:
+    """
+    Horário de trabalho: turnos por dia da semana (0 = segunda) e duração de cada consulta.
+    """
+
+    def __init__(self, turnos: dict = None, duracao: timedelta = DURACAO_PADRAO):
+        self.turnos = turnos if turnos is not None else TURNOS_PADRAO
+        self.duracao = duracao
+
+    def horarios(self, a_partir: datetime, dias: int = HORIZONTE_DIAS):
+        """
+        Gera, em ordem, o início de todos os horários do expediente a partir de 'a_partir'.
+        """
+        dia = a_partir.date()
+        for _ in range(dias):
+            for inicio, fim in sorted(self.turnos.get(dia.weekday(), ())):
+                horario = datetime.combine(dia, inicio)
+                limite = datetime.combine(dia, fim)
+                while horario + self.duracao <= limite:
+                    if horario >= a_partir:
+                        yield horario
+                    horario += self.duracao
+            dia += timedelta(days=1)
+
+
+class Agenda:
+    """
+    Índice em memória das consultas ocupadas, por médico, ordenado por data.
+    Permite listar horários livres com busca binária, sem varrer todas as
+    consultas. Guarda a versao de cada consulta para que os controllers
+    sincronizem só o que mudou no banco (ver desatualizadas).
+
+    É uma cópia para leitura: pode estar atrasada em relação a outros processos,
+    então não serve para garantir que um horário está livre na hora de gravar.
+    """
+
+    def __init__(self):
+        self._por_medico = defaultdict(list)   # medico_id -> [(data, consulta_id)] ordenado
+        self._consultas = {}                    # consulta_id -> (medico_id, data)
+        self._versoes = {}                      # consulta_id -> versao (inclusive as que não ocupam horário)
+        self._expedientes = {}                  # (medico_id, clinica_id) -> Expediente
+        self._lock = threading.RLock()
+        self.carregada = False
+
+    # ---------- expediente ----------
+
+    def configurar_expediente(self, expediente: Expediente, medico_id: int = None, clinica_id: int = None):
+        """
+        Define o expediente de um médico, de uma clínica ou de um médico em uma clínica.
+        Sem medico_id e clinica_id, altera o padrão geral.
+        """
+        self._expedientes[(medico_id, clinica_id)] = expediente
+
+    def expediente(self, medico_id: int, clinica_id: int = None) -> Expediente:
+        for chave in ((medico_id, clinica_id), (medico_id, None), (None, clinica_id), (None, None)):
+            if chave in self._expedientes:
+                return self._expedientes[chave]
+        return Expediente()
+
+    # ---------- manutenção do índice ----------
+
+    def registrar(self, consulta_id: int, medico_id: int, data: datetime, status: str = None, versao: int = None):
+        with self._lock:
+            self._desindexar(consulta_id)
+            self._versoes[consulta_id] = versao
+            if medico_id is None or data is None or status in STATUS_LIVRES:
+                return
+            self._consultas[consulta_id] = (medico_id, data)
+            insort(self._por_medico[medico_id], (data, consulta_id))
+
+    def remover(self, consulta_id: int):
+        with self._lock:
+            self._versoes.pop(consulta_id, None)
+            self._desindexar(consulta_id)
+
+    def _desindexar(self, consulta_id: int):
+        with self._lock:
+            atual = self._consultas.pop(consulta_id, None)
+            if not atual:
+                return
+            medico_id, data = atual
+            lista = self._por_medico[medico_id]
+            i = bisect_right(lista, (data, consulta_id)) - 1
+            if i >= 0 and lista[i] == (data, consulta_id):
+                del lista[i]
+
+    def aplicar(self, linhas):
+        """
+        Aplica linhas (id, medico_id, data_consulta, status[, versao]) vindas do banco.
+        """
+        with self._lock:
+            for consulta_id, medico_id, data, status, *versao in linhas:
+                self.registrar(consulta_id, medico_id, data, status, versao[0] if versao else None)
+
+    def carregar(self, linhas):
+        with self._lock:
+            self._por_medico.clear()
+            self._consultas.clear()
+            self._versoes.clear()
+            self.aplicar(linhas)
+            self.carregada = True
+
+    def limpar(self):
+        with self._lock:
+            self._por_medico.clear()
+            self._consultas.clear()
+            self._versoes.clear()
+            self.carregada = False
+
+    def desatualizadas(self, versoes: dict):
+        """
+        Compara com o banco ('versoes': consulta_id -> versao de todas as consultas
+        do período coberto). Retorna (ids novos ou alterados, ids que saíram do banco ou do período).
+        """
+        with self._lock:
+            alteradas = [i for i, versao in versoes.items() if i not in self._versoes or self._versoes[i] != versao]
+            removidas = [i for i in self._versoes if i not in versoes]
+        return alteradas, removidas
+
+    # ---------- consultas ao índice ----------
+
+    def conflito(self, medico_id: int, data: datetime, duracao: timedelta = None, ignorar_id: int = None):
+        """
+        Retorna o id da consulta que ocupa o horário do médico, ou None se estiver livre.
+        Duas consultas conflitam quando começam a menos de 'duracao' uma da outra.
+        """
+        duracao = duracao or self.expediente(medico_id).duracao
+        with self._lock:
+            lista = self._por_medico.get(medico_id)
+            if not lista:
+                return None
+            i = bisect_right(lista, (data - duracao, float("inf")))
+            while i < len(lista) and lista[i][0] < data + duracao:
+                if lista[i][1] != ignorar_id:
+                    return lista[i][1]
+                i += 1
+        return None
+
+    def horarios_livres(self, medico_id: int, a_partir: datetime, clinica_id: int = None, dias: int = HORIZONTE_DIAS):
+        """
+        Gera os horários livres do médico em ordem cronológica.
+        """
+        expediente = self.expediente(medico_id, clinica_id)
+        for horario in expediente.horarios(a_partir, dias):
+            if self.conflito(medico_id, horario, expediente.duracao) is None:
+                yield horario
+
+    def proximos_livres(self, medicos_ids, a_partir: datetime, quantidade: int = 10,
+                        clinica_id: int = None, dias: int = HORIZONTE_DIAS):
+        """
+        Retorna os próximos 'quantidade' horários livres entre vários médicos,
+        como pares (data, medico_id), intercalando as agendas em ordem de data.
+        """
+        def livres(medico_id):
+            for horario in self.horarios_livres(medico_id, a_partir, clinica_id, dias):
+                yield horario, medico_id
+
+        geradores = [livres(medico_id) for medico_id in medicos_ids]
+        return list(islice(heapq.merge(*geradores), quantidade))
+
+
+# Agenda global do processo (carregada sob demanda pelo consulta_controller)
+agenda = Agenda()
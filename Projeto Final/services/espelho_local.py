@@ -0,0 +1,391 @@
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import (
+    MetaData, Table, Column, Integer, DateTime, Index, select, delete, insert, func, or_, exists,
+    table, column, event, text,
+)
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import functions
+
+from models.especialidade import Especialidade
+from models.clinica import Clinica
+from models.medico import Medico
+from models.paciente import Paciente
+from models.consulta import Consulta
+from services.cache import cache_referencia
+from services.indice_nomes import indice_pacientes, indice_medicos
+from services import consultas_futuras
+
+# Cópia local (SQLite) das tabelas que as telas da GUI mais leem: médicos,
+# especialidades e clínicas inteiras, consultas de DIAS dias atrás em diante e
+# os pacientes dessas consultas ou alterados nesse período. As telas leem daqui
+# sem esperar a rede; as escritas continuam indo para o banco principal.
+# Os pacientes do espelho são só os recentes: a busca de pacientes por nome
+# continua no banco principal.
+# Vazio: sem espelho, tudo é lido do banco principal.
+ARQUIVO = os.getenv("DB_ESPELHO", "")
+# Segundos entre as sincronizações em segundo plano
+INTERVALO = float(os.getenv("DB_ESPELHO_INTERVALO", "60"))
+# Consultas mais antigas que isso (em dias) ficam fora do espelho
+DIAS = int(os.getenv("DB_ESPELHO_DIAS", "30"))
+
+# Ids por SELECT ... IN (...) ao buscar as linhas alteradas
+TAMANHO_LOTE = 500
+
+# Folga para não perder transações que gravaram antes da leitura mas fizeram commit depois
+MARGEM_MARCA = timedelta(seconds=5)
+
+# Preenchida pelo trigger de deleção de paciente (ver Trabalho-BancoII.sql)
+log_delecao_paciente = table(
+    "log_delecao_paciente",
+    column("paciente_id"),
+    column("data_hora"),
+)
+
+_metadata = MetaData()
+
+
+def _tabela_local(modelo, *indices):
+    # Mesmas colunas e nomes do model (os controllers rodam sem mudança), sem chaves estrangeiras
+    colunas = [Column(c.name, c.type, primary_key=c.primary_key) for c in modelo.__table__.columns]
+    return Table(modelo.__tablename__, _metadata, *colunas, *indices)
+
+
+especialidade_local = _tabela_local(Especialidade)
+clinica_local = _tabela_local(Clinica)
+medico_local = _tabela_local(Medico)
+paciente_local = _tabela_local(Paciente, Index("idx_espelho_paciente_atualizado", "atualizado_em"))
+consulta_local = _tabela_local(
+    Consulta,
+    Index("idx_espelho_consulta_data", "data_consulta"),
+    Index("idx_espelho_consulta_paciente", "paciente_id"),
+)
+
+# Uma linha só: marca d'água dos pacientes e fim da última sincronização
+espelho_estado = Table(
+    "espelho_estado", _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("paciente_max_id", Integer),
+    Column("paciente_desde", DateTime),
+    Column("sincronizado_em", DateTime),
+)
+
+# Tabelas de referência: copiadas inteiras, comparando (id, versao)
+REFERENCIA = (
+    (Especialidade.__table__, especialidade_local),
+    (Clinica.__table__, clinica_local),
+    (Medico.__table__, medico_local),
+)
+
+
+@compiles(functions.now, "sqlite")
+def _agora_local(elemento, compilador, **kw):
+    # O espelho guarda as datas na hora local (como o MySQL); CURRENT_TIMESTAMP do SQLite é UTC
+    if getattr(compilador.dialect, "hora_local", False):
+        return "datetime('now', 'localtime')"
+    return compilador.visit_now_func(elemento, **kw)
+
+
+def _para_datetime(valor):
+    if valor is None or isinstance(valor, datetime):
+        return valor
+    return datetime.fromisoformat(str(valor))
+
+
+def _em_lotes(ids, tamanho_lote: int = TAMANHO_LOTE):
+    ids = list(ids)
+    for inicio in range(0, len(ids), tamanho_lote):
+        yield ids[inicio:inicio + tamanho_lote]
+
+
+def _gravar(destino, local, linhas):
+    if linhas:
+        destino.execute(insert(local).prefix_with("OR REPLACE"), [dict(linha) for linha in linhas])
+
+
+def _apagar(destino, local, ids):
+    for lote in _em_lotes(ids):
+        destino.execute(delete(local).where(local.c.id.in_(lote)))
+
+
+def _buscar_por_ids(origem: Session, remota, ids):
+    linhas = []
+    for lote in _em_lotes(ids):
+        linhas.extend(origem.execute(select(remota).where(remota.c.id.in_(lote))).mappings().all())
+    return linhas
+
+
+def sincronizar_por_versao(origem: Session, destino, remota, local, filtro=None):
+    """
+    Iguala 'local' a 'remota' (nas linhas que passam por filtro(tabela)) lendo
+    do banco principal só (id, versao) de cada linha e, por inteiro, as que
+    mudaram. Tabelas sem versao são comparadas linha a linha.
+    Retorna (linhas_gravadas, ids_removidos).
+    """
+    nomes = ["id", "versao"] if "versao" in remota.c else [c.name for c in remota.c]
+    criterios = filtro or (lambda tabela: [])
+
+    remotas = {linha[0]: tuple(linha) for linha in origem.execute(
+        select(*[remota.c[nome] for nome in nomes]).where(*criterios(remota))
+    )}
+    locais = {linha[0]: tuple(linha) for linha in destino.execute(
+        select(*[local.c[nome] for nome in nomes]).where(*criterios(local))
+    )}
+
+    alterados = [i for i, assinatura in remotas.items() if locais.get(i) != assinatura]
+    removidos = locais.keys() - remotas.keys()
+    linhas = _buscar_por_ids(origem, remota, alterados)
+    _gravar(destino, local, linhas)
+    _apagar(destino, local, removidos)
+    return linhas, removidos
+
+
+class EspelhoLocal:
+    """
+    Espelho SQLite para leitura imediata na GUI, sincronizado em segundo plano.
+
+        espelho.iniciar()
+        medicos = espelho.ler(medico_controller.listar_medicos_resumo, db)
+
+    ler() usa o espelho se ele já foi sincronizado alguma vez (inclusive numa
+    execução anterior: a GUI abre com os dados do último uso) e o banco
+    principal caso contrário. Sem DB_ESPELHO, ler() sempre usa o banco principal.
+    """
+
+    def __init__(self, arquivo: str = ARQUIVO, intervalo: float = INTERVALO, dias: int = DIAS,
+                 fabrica_sessao=None):
+        self.arquivo = arquivo
+        self.intervalo = intervalo
+        self.dias = dias
+        self.fabrica_sessao = fabrica_sessao
+        self.ativo = bool(arquivo)
+        self.engine = None
+        self.sincronizado_em = None
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._thread = None
+
+    # ---------- banco local ----------
+
+    def abrir(self):
+        """
+        Cria (se preciso) o arquivo e as tabelas do espelho. Não acessa o banco principal.
+        """
+        if self.engine is not None:
+            return self.engine
+        from config.db import criar_engine
+
+        engine = criar_engine(f"sqlite:///{self.arquivo}", echo=False)
+        engine.dialect.hora_local = True
+
+        @event.listens_for(engine, "connect")
+        def _configurar(conexao, _):
+            # WAL: as telas leem enquanto a sincronização grava
+            conexao.execute("PRAGMA journal_mode=WAL")
+
+        _metadata.create_all(engine)
+        with engine.begin() as conexao:
+            self._criar_visao(conexao)
+            self.sincronizado_em = _para_datetime(
+                conexao.execute(select(espelho_estado.c.sincronizado_em)).scalar()
+            )
+        self.engine = engine
+        return engine
+
+    @staticmethod
+    def _criar_visao(conexao):
+        # consulta_futura como visão sobre as tabelas do espelho: buscar_consultas roda igual
+        query = consultas_futuras._select_desnormalizado()
+        query = query.with_only_columns(
+            *[coluna.label(nome) for coluna, nome in zip(query.selected_columns, consultas_futuras.COLUNAS)]
+        )
+        sql = query.compile(dialect=conexao.dialect, compile_kwargs={"literal_binds": True})
+        conexao.execute(text(f"CREATE VIEW IF NOT EXISTS consulta_futura AS {sql}"))
+
+    @property
+    def pronto(self):
+        return self.ativo and self.sincronizado_em is not None
+
+    def sessao(self):
+        return Session(bind=self.abrir())
+
+    def ler(self, funcao, db, *args, **kwargs):
+        """
+        funcao(sessao, *args, **kwargs) no espelho, se pronto; senão no 'db' informado.
+        Para funções de leitura que devolvem linhas ou namedtuples (nada ligado à sessão).
+        Não usar com buscas de paciente: o espelho só tem os pacientes recentes, e
+        essas buscas carregam o índice de nomes compartilhado (indice_pacientes).
+        """
+        if not self.pronto:
+            return funcao(db, *args, **kwargs)
+        with self.sessao() as sessao:
+            return funcao(sessao, *args, **kwargs)
+
+    # ---------- sincronização ----------
+
+    def sincronizar(self, origem: Session = None):
+        """
+        Traz para o espelho o que mudou no banco principal desde a última vez,
+        numa única transação local. Retorna um dict tabela -> (gravadas, removidas),
+        ou None em caso de erro (o espelho fica como estava).
+        """
+        fechar = origem is None
+        if origem is None:
+            if self.fabrica_sessao is None:
+                from config.db import SessionLocal
+                self.fabrica_sessao = SessionLocal
+            origem = self.fabrica_sessao()
+        try:
+            with self._lock, self.abrir().begin() as destino:
+                from config.db import leitura_em_replica
+
+                with leitura_em_replica(origem):
+                    resultado, apagados = self._sincronizar(origem, destino)
+                origem.rollback()
+        except SQLAlchemyError as e:
+            origem.rollback()
+            print(f"Erro ao sincronizar espelho local: {getattr(e, 'orig', None) or e}")
+            return None
+        finally:
+            if fechar:
+                origem.close()
+        self._atualizar_memoria(resultado, apagados)
+        return {tabela: (len(linhas), len(removidos)) for tabela, (linhas, removidos) in resultado.items()}
+
+    def _sincronizar(self, origem: Session, destino):
+        agora = _para_datetime(origem.execute(select(func.now())).scalar())
+        inicio = agora - timedelta(days=self.dias)
+        resultado = {}
+
+        for remota, local in REFERENCIA:
+            resultado[local.name] = sincronizar_por_versao(origem, destino, remota, local)
+
+        resultado["consulta"] = sincronizar_por_versao(
+            origem, destino, Consulta.__table__, consulta_local,
+            lambda tabela: [tabela.c.data_consulta >= inicio],
+        )
+        # A janela andou: consultas que ficaram para trás saem do espelho
+        destino.execute(delete(consulta_local).where(consulta_local.c.data_consulta < inicio))
+
+        linhas, removidos, apagados = self._sincronizar_pacientes(origem, destino, agora, inicio)
+        resultado["paciente"] = (linhas, removidos)
+        # Só o que foi apagado no banco principal (e não o que saiu da janela do espelho)
+        return resultado, {"paciente": apagados, "medico": resultado["medico"][1]}
+
+    def _sincronizar_pacientes(self, origem: Session, destino, agora, inicio):
+        """
+        Pacientes por marca d'água (maior id e atualizado_em), como get_alteracoes_pacientes,
+        mais os das consultas do espelho que ainda não estão nele.
+        Retorna (linhas_gravadas, ids_removidos_do_espelho, ids_apagados_no_banco).
+        """
+        remota = Paciente.__table__
+        estado = destino.execute(select(espelho_estado)).mappings().first()
+        max_id = estado["paciente_max_id"] if estado else None
+        desde = _para_datetime(estado["paciente_desde"]) if estado else None
+
+        apagados = set()
+        if max_id is None:
+            criterio = remota.c.atualizado_em >= inicio
+        else:
+            criterio = or_(remota.c.id > max_id, remota.c.atualizado_em >= desde)
+            apagados.update(origem.execute(
+                select(log_delecao_paciente.c.paciente_id).where(log_delecao_paciente.c.data_hora >= desde)
+            ).scalars())
+        linhas = list(origem.execute(select(remota).where(criterio)).mappings())
+        _gravar(destino, paciente_local, linhas)
+
+        faltando = destino.execute(
+            select(consulta_local.c.paciente_id).distinct().where(
+                consulta_local.c.paciente_id.is_not(None),
+                ~exists().where(paciente_local.c.id == consulta_local.c.paciente_id),
+            )
+        ).scalars().all()
+        faltando = [i for i in faltando if i not in apagados]
+        linhas_faltando = _buscar_por_ids(origem, remota, faltando)
+        _gravar(destino, paciente_local, linhas_faltando)
+        linhas.extend(linhas_faltando)
+
+        # Fora da janela e sem consulta no espelho: sai
+        antigos = destino.execute(
+            select(paciente_local.c.id).where(
+                or_(paciente_local.c.atualizado_em.is_(None), paciente_local.c.atualizado_em < inicio),
+                ~exists().where(consulta_local.c.paciente_id == paciente_local.c.id),
+            )
+        ).scalars().all()
+        removidos = apagados | set(antigos)
+        _apagar(destino, paciente_local, removidos)
+
+        maior_id = origem.execute(select(func.max(remota.c.id))).scalar() or 0
+        destino.execute(delete(espelho_estado))
+        destino.execute(insert(espelho_estado).values(
+            id=1,
+            paciente_max_id=max(maior_id, max_id or 0),
+            paciente_desde=agora - MARGEM_MARCA,
+            sincronizado_em=datetime.now(),
+        ))
+        return linhas, removidos, apagados
+
+    def _atualizar_memoria(self, resultado, apagados):
+        """
+        Leva as alterações para o índice de nomes (já carregado do banco principal)
+        e o cache de referência. Do índice só saem os registros apagados no banco:
+        os que apenas saíram da janela do espelho continuam existindo.
+        """
+        self.sincronizado_em = datetime.now()
+        if any(linhas or removidos for tabela, (linhas, removidos) in resultado.items()
+               if tabela in ("especialidade", "clinica", "medico")):
+            cache_referencia.invalidar()
+        for tabela, indice in (("paciente", indice_pacientes), ("medico", indice_medicos)):
+            if not indice.carregado:
+                continue
+            for linha in resultado[tabela][0]:
+                indice.adicionar(linha["id"], linha["nome"])
+            for registro_id in apagados[tabela]:
+                indice.remover(registro_id)
+
+    # ---------- thread ----------
+
+    def iniciar(self):
+        """
+        Sincroniza agora e depois a cada 'intervalo' segundos, numa thread daemon.
+        """
+        if not self.ativo or self._thread is not None:
+            return
+        try:
+            # Só o arquivo local: se já houve uma sincronização, ler() passa a usá-lo agora
+            self.abrir()
+        except SQLAlchemyError as e:
+            print(f"Erro ao abrir espelho local {self.arquivo}: {e}")
+            self.ativo = False
+            return
+        self._parar.clear()
+
+        def laco():
+            while not self._parar.is_set():
+                self.sincronizar()
+                self._acordar.wait(self.intervalo)
+                self._acordar.clear()
+
+        self._thread = threading.Thread(target=laco, name="espelho-local", daemon=True)
+        self._thread.start()
+
+    def sincronizar_agora(self):
+        """
+        Antecipa a próxima sincronização (ex.: depois de uma escrita feita pela GUI).
+        """
+        self._acordar.set()
+
+    def encerrar(self):
+        if self._thread is None:
+            return
+        self._parar.set()
+        self._acordar.set()
+        self._thread = None
+
+
+espelho = EspelhoLocal()
@@ -0,0 +1,165 @@
+import csv
+import gzip
+import io
+import json
+import sys
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from models.consulta import Consulta
+from models.paciente import Paciente
+from models.medico import Medico
+from models.clinica import Clinica
+from models.receita_medica import ReceitaMedica
+
+TAMANHO_LOTE_PADRAO = 5000
+
+FORMATOS = ("csv", "ndjson")
+
+# Uma linha por receita; consultas sem receita saem uma vez, com as colunas da receita vazias
+CAMPOS = (
+    "consulta_id", "data_consulta", "status", "paciente_id", "paciente", "cpf", "medico_id", "medico",
+    "crm", "clinica_id", "clinica", "receita_id", "medicamento", "posologia",
+)
+
+
+def _select(*criterios):
+    """
+    SELECT da exportação, na ordem de CAMPOS e ordenado por (data_consulta, id),
+    que é a ordem do índice de data_consulta (não precisa de ordenação no servidor).
+    """
+    return (
+        select(
+            Consulta.id, Consulta.data_consulta, Consulta.status, Consulta.paciente_id, Paciente.nome,
+            Paciente.cpf, Consulta.medico_id, Medico.nome, Medico.crm, Consulta.clinica_id, Clinica.nome,
+            ReceitaMedica.id, ReceitaMedica.medicamento, ReceitaMedica.posologia,
+        )
+        .outerjoin(Paciente, Consulta.paciente_id == Paciente.id)
+        .outerjoin(Medico, Consulta.medico_id == Medico.id)
+        .outerjoin(Clinica, Consulta.clinica_id == Clinica.id)
+        .outerjoin(ReceitaMedica, ReceitaMedica.consulta_id == Consulta.id)
+        .where(*criterios)
+        .order_by(Consulta.data_consulta, Consulta.id)
+    )
+
+
+def criterios_exportacao(data_inicio: date = None, data_fim: date = None, clinica_ids=None):
+    """
+    Filtros da exportação: período (data_fim inclusiva) e clínicas.
+    """
+    criterios = []
+    if data_inicio:
+        criterios.append(Consulta.data_consulta >= data_inicio)
+    if data_fim:
+        criterios.append(Consulta.data_consulta < data_fim + timedelta(days=1))
+    if clinica_ids:
+        criterios.append(Consulta.clinica_id.in_(list(clinica_ids)))
+    return criterios
+
+
+def _lotes_cursor_servidor(db: Session, criterios, tamanho_lote: int):
+    """
+    Uma única consulta lida por um cursor no servidor: o driver só traz
+    tamanho_lote linhas por vez.
+    """
+    resultado = db.connection().execution_options(stream_results=True, yield_per=tamanho_lote).execute(
+        _select(*criterios)
+    )
+    try:
+        yield from resultado.partitions()
+    finally:
+        resultado.close()
+
+
+def _lotes_paginados(db: Session, criterios, tamanho_lote: int):
+    """
+    Para drivers sem cursor no servidor (o mysqlconnector do SQLAlchemy sempre
+    bufferiza o resultado inteiro): páginas de tamanho_lote consultas, cada
+    uma continuando do último (data_consulta, id) lido, pelo índice de data.
+    """
+    ultimo = None
+    while True:
+        pagina = select(Consulta.id).where(*criterios)
+        if ultimo is not None:
+            pagina = pagina.where(tuple_(Consulta.data_consulta, Consulta.id) > tuple_(*ultimo))
+        pagina = pagina.order_by(Consulta.data_consulta, Consulta.id).limit(tamanho_lote).subquery()
+
+        # JOIN com a página (e não IN): o MySQL não aceita LIMIT em subconsulta de IN
+        linhas = db.execute(_select(*criterios).join(pagina, pagina.c.id == Consulta.id)).all()
+        if not linhas:
+            return
+        yield linhas
+        ultimo = (linhas[-1][1], linhas[-1][0])
+
+
+def lotes_exportacao(db: Session, *criterios, tamanho_lote: int = TAMANHO_LOTE_PADRAO):
+    """
+    Gera as linhas da exportação em listas de cerca de tamanho_lote linhas,
+    sem carregar o resultado inteiro na memória. Tudo é lido na mesma
+    transação, então a exportação é uma foto consistente do banco.
+    """
+    if db.get_bind().dialect.supports_server_side_cursors:
+        return _lotes_cursor_servidor(db, criterios, tamanho_lote)
+    return _lotes_paginados(db, criterios, tamanho_lote)
+
+
+def _valor_json(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return str(valor)
+
+
+def abrir_saida(caminho: str, compactar: bool = None):
+    """
+    Abre o arquivo de saída em modo texto; "-" é a saída padrão.
+    Compacta com gzip se compactar=True ou, quando não informado, se o nome termina em .gz.
+    """
+    if compactar is None:
+        compactar = caminho.endswith(".gz")
+    if caminho == "-":
+        if compactar:
+            return io.TextIOWrapper(gzip.GzipFile(fileobj=sys.stdout.buffer, mode="wb"),
+                                    encoding="utf-8", newline="")
+        return io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", newline="", write_through=True)
+    if compactar:
+        return gzip.open(caminho, "wt", encoding="utf-8", newline="")
+    return open(caminho, "w", encoding="utf-8", newline="")
+
+
+def formato_do_arquivo(caminho: str) -> str:
+    nome = caminho[:-3] if caminho.endswith(".gz") else caminho
+    return "ndjson" if nome.lower().endswith((".ndjson", ".jsonl")) else "csv"
+
+
+def exportar_consultas(db: Session, saida, formato: str = "csv", data_inicio: date = None,
+                       data_fim: date = None, clinica_ids=None, tamanho_lote: int = TAMANHO_LOTE_PADRAO,
+                       progresso=None) -> int:
+    """
+    Escreve em saida (arquivo texto já aberto) as consultas com paciente,
+    médico, clínica e receitas, lote a lote. Devolve o número de linhas escritas.
+    progresso(linhas) é chamado após cada lote.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconhecido: {formato} (use {', '.join(FORMATOS)})")
+
+    if formato == "csv":
+        escritor = csv.writer(saida)
+        escritor.writerow(CAMPOS)
+        escrever = escritor.writerows
+    else:
+        def escrever(linhas):
+            saida.write("".join(
+                json.dumps(dict(zip(CAMPOS, linha)), ensure_ascii=False, default=_valor_json) + "\n"
+                for linha in linhas
+            ))
+
+    total = 0
+    criterios = criterios_exportacao(data_inicio, data_fim, clinica_ids)
+    for linhas in lotes_exportacao(db, *criterios, tamanho_lote=tamanho_lote):
+        escrever(linhas)
+        total += len(linhas)
+        if progresso:
+            progresso(total)
+    return total
@@ -0,0 +1,223 @@
+import csv
+import json
+import re
+from datetime import datetime
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from models.paciente import Paciente
+from services.auditoria import auditoria, INSERCAO
+
+TAMANHO_LOTE_PADRAO = 1000
+
+CAMPOS = ("nome", "cpf", "data_nascimento", "telefone", "email")
+
+
+class LinhaInvalida(ValueError):
+    pass
+
+
+# -------------------- LEITURA --------------------
+
+def ler_arquivo(caminho: str):
+    """
+    Lê um arquivo CSV (com cabeçalho) ou JSONL linha a linha.
+    Gera pares (numero_linha, dict), ou (numero_linha, LinhaInvalida) para
+    linhas JSONL que não são um objeto JSON.
+    """
+    if caminho.lower().endswith((".jsonl", ".ndjson")):
+        with open(caminho, encoding="utf-8") as f:
+            for numero, linha in enumerate(f, start=1):
+                if not linha.strip():
+                    continue
+                try:
+                    registro = json.loads(linha)
+                except json.JSONDecodeError as e:
+                    yield numero, LinhaInvalida(f"JSON inválido: {e}")
+                    continue
+                if isinstance(registro, dict):
+                    yield numero, registro
+                else:
+                    yield numero, LinhaInvalida(f"esperado um objeto JSON, veio {type(registro).__name__}")
+    else:
+        with open(caminho, encoding="utf-8-sig", newline="") as f:
+            # Linha 1 é o cabeçalho
+            for numero, registro in enumerate(csv.DictReader(f), start=2):
+                yield numero, registro
+
+
+# -------------------- NORMALIZAÇÃO E VALIDAÇÃO --------------------
+
+def normalizar_cpf(cpf) -> str:
+    """
+    Aceita o CPF com ou sem pontuação e devolve no formato 000.000.000-00.
+    """
+    digitos = re.sub(r"\D", "", str(cpf or ""))
+    if len(digitos) != 11 or digitos == digitos[0] * 11:
+        raise LinhaInvalida(f"CPF inválido: {cpf!r}")
+    for tamanho in (9, 10):
+        soma = sum(int(d) * peso for d, peso in zip(digitos[:tamanho], range(tamanho + 1, 1, -1)))
+        dv = (soma * 10) % 11 % 10
+        if dv != int(digitos[tamanho]):
+            raise LinhaInvalida(f"CPF com dígito verificador inválido: {cpf!r}")
+    return f"{digitos[:3]}.{digitos[3:6]}.{digitos[6:9]}-{digitos[9:]}"
+
+
+def _texto(valor, tamanho: int, campo: str):
+    valor = (str(valor).strip() if valor is not None else "") or None
+    if valor and len(valor) > tamanho:
+        raise LinhaInvalida(f"{campo} maior que {tamanho} caracteres")
+    return valor
+
+
+def validar_registro(registro: dict) -> dict:
+    """
+    Normaliza um registro bruto e devolve o dict pronto para inserir.
+    Levanta LinhaInvalida com o motivo quando o registro não é aceito.
+    """
+    nome = _texto(registro.get("nome"), 100, "nome")
+    if not nome:
+        raise LinhaInvalida("nome é obrigatório")
+
+    data_nascimento = _texto(registro.get("data_nascimento"), 10, "data_nascimento")
+    if data_nascimento:
+        try:
+            data_nascimento = datetime.strptime(data_nascimento, "%Y-%m-%d").date()
+        except ValueError:
+            raise LinhaInvalida(f"data_nascimento inválida: {data_nascimento!r} (use YYYY-MM-DD)")
+
+    email = _texto(registro.get("email"), 100, "email")
+    if email and not re.fullmatch(r"[^@\s]+@[^@\s]+\.[^@\s]+", email):
+        raise LinhaInvalida(f"email inválido: {email!r}")
+
+    return {
+        "nome": nome,
+        "cpf": normalizar_cpf(registro.get("cpf")),
+        "data_nascimento": data_nascimento,
+        "telefone": _texto(registro.get("telefone"), 20, "telefone"),
+        "email": email,
+    }
+
+
+def validar(registros, rejeitos: list):
+    """
+    Etapa do pipeline: valida e remove CPFs repetidos dentro do próprio arquivo.
+    Linhas recusadas vão para 'rejeitos' como (linha, cpf, motivo).
+    """
+    vistos = set()
+    for numero, registro in registros:
+        if isinstance(registro, Exception):
+            rejeitos.append((numero, "", str(registro)))
+            continue
+        try:
+            paciente = validar_registro(registro)
+        except LinhaInvalida as e:
+            rejeitos.append((numero, registro.get("cpf", ""), str(e)))
+            continue
+        if paciente["cpf"] in vistos:
+            rejeitos.append((numero, paciente["cpf"], "CPF repetido no arquivo"))
+            continue
+        vistos.add(paciente["cpf"])
+        yield numero, paciente
+
+
+def em_lotes(itens, tamanho: int):
+    lote = []
+    for item in itens:
+        lote.append(item)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+# -------------------- GRAVAÇÃO --------------------
+
+def _inserir_lote(db: Session, lote, rejeitos: list) -> int:
+    """
+    Insere um lote com um único INSERT multi-linha e um commit.
+    CPFs que já existem no banco são recusados antes do INSERT.
+    """
+    cpfs = [p["cpf"] for _, p in lote]
+    existentes = set(db.execute(select(Paciente.cpf).where(Paciente.cpf.in_(cpfs))).scalars())
+    novos = []
+    for numero, paciente in lote:
+        if paciente["cpf"] in existentes:
+            rejeitos.append((numero, paciente["cpf"], "CPF já cadastrado"))
+        else:
+            novos.append((numero, paciente))
+    if not novos:
+        return 0
+
+    try:
+        db.execute(insert(Paciente.__table__).values([p for _, p in novos]))
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+    else:
+        _auditar(db, [p for _, p in novos])
+        return len(novos)
+
+    # Lote falhou (ex.: CPF inserido por outro processo): isola as linhas com problema
+    inseridos = []
+    for numero, paciente in novos:
+        try:
+            db.execute(insert(Paciente.__table__).values(paciente))
+            db.commit()
+            inseridos.append(paciente)
+        except SQLAlchemyError as e:
+            db.rollback()
+            rejeitos.append((numero, paciente["cpf"], f"erro no banco: {e.__class__.__name__}"))
+    _auditar(db, inseridos)
+    return len(inseridos)
+
+
+def _auditar(db: Session, pacientes):
+    """
+    Um evento de INSERT por paciente gravado. O INSERT multi-linha não devolve
+    os ids: eles são buscados pelo CPF (único). Roda depois do commit: se a busca
+    falhar, os eventos saem sem o id, mas a importação segue.
+    """
+    if not auditoria.ativa or not pacientes:
+        return
+    try:
+        ids = dict(db.execute(
+            select(Paciente.cpf, Paciente.id).where(Paciente.cpf.in_([p["cpf"] for p in pacientes]))
+        ).all())
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"Erro ao buscar os ids dos pacientes importados: {e}")
+        ids = {}
+    auditoria.registrar_varios("paciente", INSERCAO, ({"id": ids.get(p["cpf"]), **p} for p in pacientes))
+
+
+def importar_pacientes(db: Session, caminho: str, tamanho_lote: int = TAMANHO_LOTE_PADRAO):
+    """
+    Importa pacientes de um arquivo CSV/JSONL em lotes.
+    Retorna (total_lidos, total_inseridos, rejeitos).
+    """
+    rejeitos = []
+    lidos = 0
+    inseridos = 0
+
+    def contar(registros):
+        nonlocal lidos
+        for item in registros:
+            lidos += 1
+            yield item
+
+    for lote in em_lotes(validar(contar(ler_arquivo(caminho)), rejeitos), tamanho_lote):
+        inseridos += _inserir_lote(db, lote, rejeitos)
+    # Os processos em execução veem os novos pacientes na próxima sincronização
+    # do índice de nomes (INDICE_NOMES_INTERVALO)
+    return lidos, inseridos, rejeitos
+
+
+def salvar_rejeitos(caminho: str, rejeitos):
+    with open(caminho, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["linha", "cpf", "motivo"])
+        writer.writerows(sorted(rejeitos, key=lambda r: r[0]))
@@ -0,0 +1,182 @@
+import os
+import re
+import time
+import heapq
+import threading
+import unicodedata
+from collections import defaultdict
+
+# Tempo máximo (segundos) até o índice ver nomes gravados por outros processos
+INTERVALO_SINCRONIZACAO = float(os.getenv("INDICE_NOMES_INTERVALO", "30"))
+
+
+def normalizar(texto: str) -> str:
+    """
+    Remove acentos, passa para minúsculas e troca pontuação por espaço.
+    Ex.: "Daniela Gonçalves" -> "daniela goncalves"
+    """
+    if not texto:
+        return ""
+    texto = unicodedata.normalize("NFKD", texto)
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return re.sub(r"[^a-z0-9]+", " ", texto.lower()).strip()
+
+
+def trigramas(texto: str, completo: bool = True) -> set:
+    """
+    Gera os trigramas de cada palavra (no estilo do pg_trgm: "  p", " pa", ..., "lo ").
+    Com completo=False o trigrama final da última palavra é omitido, pois
+    quem está digitando ainda pode completar a palavra.
+    """
+    return _trigramas_normalizados(normalizar(texto), completo)
+
+
+def _trigramas_normalizados(texto: str, completo: bool = True) -> set:
+    palavras = texto.split()
+    grams = set()
+    for i, palavra in enumerate(palavras):
+        fim = " " if completo or i < len(palavras) - 1 else ""
+        p = "  " + palavra + fim
+        for j in range(len(p) - 2):
+            grams.add(p[j:j + 3])
+    return grams
+
+
+class IndiceNgram:
+    """
+    Índice invertido de trigramas em memória para busca de nomes
+    sem diferenciar acentos, com ranking e top-K.
+    É atualizado incrementalmente com adicionar/remover (gravações deste processo)
+    e com sincronizar (gravações de outros processos).
+    """
+
+    def __init__(self):
+        self._postings = defaultdict(set)   # trigrama -> ids
+        self._docs = {}                      # id -> (nome normalizado, trigramas)
+        self._lock = threading.RLock()
+        self.carregado = False
+        self.marca = None                    # marca d'água da última sincronização
+        self._sincronizado_em = float("-inf")
+
+    def __len__(self):
+        return len(self._docs)
+
+    def adicionar(self, doc_id: int, nome: str):
+        with self._lock:
+            self.remover(doc_id)
+            nome_norm = normalizar(nome)
+            grams = _trigramas_normalizados(nome_norm)
+            self._docs[doc_id] = (nome_norm, grams)
+            for g in grams:
+                self._postings[g].add(doc_id)
+
+    def remover(self, doc_id: int):
+        with self._lock:
+            doc = self._docs.pop(doc_id, None)
+            if not doc:
+                return
+            for g in doc[1]:
+                ids = self._postings.get(g)
+                if ids is not None:
+                    ids.discard(doc_id)
+                    if not ids:
+                        del self._postings[g]
+
+    def carregar(self, linhas):
+        """
+        Reconstrói o índice a partir de pares (id, nome).
+        """
+        with self._lock:
+            self._postings.clear()
+            self._docs.clear()
+            postings, docs = self._postings, self._docs
+            for doc_id, nome in linhas:
+                nome_norm = normalizar(nome)
+                grams = _trigramas_normalizados(nome_norm)
+                docs[doc_id] = (nome_norm, grams)
+                for g in grams:
+                    postings[g].add(doc_id)
+            self.carregado = True
+
+    def sincronizar(self, buscar_alteracoes, intervalo: float = INTERVALO_SINCRONIZACAO):
+        """
+        Traz para o índice o que mudou no banco, no máximo a cada 'intervalo' segundos.
+        buscar_alteracoes(marca) retorna (pares (id, nome) alterados, ids removidos, nova marca).
+        Com marca None (índice vazio ou sem marca d'água), deve trazer todos os
+        registros, e o índice é reconstruído.
+        """
+        if self.carregado and time.monotonic() - self._sincronizado_em < intervalo:
+            return self
+        with self._lock:
+            if self.carregado and time.monotonic() - self._sincronizado_em < intervalo:
+                return self
+            marca = self.marca if self.carregado else None
+            alterados, removidos, nova_marca = buscar_alteracoes(marca)
+            if marca is None:
+                self.carregar(alterados)
+            else:
+                for doc_id, nome in alterados:
+                    self.adicionar(doc_id, nome)
+                for doc_id in removidos:
+                    self.remover(doc_id)
+            self.marca = nova_marca
+            self._sincronizado_em = time.monotonic()
+        return self
+
+    def limpar(self):
+        with self._lock:
+            self._postings.clear()
+            self._docs.clear()
+            self.carregado = False
+            self.marca = None
+
+    def buscar(self, consulta: str, k: int = 50, limiar: float = 0.3):
+        """
+        Retorna até k pares (id, score) ordenados do mais para o menos parecido.
+        O score é a fração dos trigramas da busca presentes no nome, com bônus
+        quando a busca aparece inteira (como substring) no nome.
+        """
+        grams = trigramas(consulta, completo=False)
+        if not grams:
+            return []
+        termo = normalizar(consulta)
+
+        with self._lock:
+            listas = sorted((self._postings.get(g, set()) for g in grams), key=len)
+            total = len(listas)
+
+            # Caminho rápido: nomes que contêm todos os trigramas (interseção feita em C).
+            # Se já houver k deles, nenhum nome parcial pode superá-los no ranking.
+            completos = listas[0].intersection(*listas[1:])
+            if len(completos) >= k:
+                candidatos, minimo = completos, total
+            else:
+                # Listas mais raras primeiro: um candidato que atinja o limiar precisa
+                # aparecer em pelo menos uma das (total - minimo + 1) listas mais raras.
+                minimo = max(1, int(total * limiar + 0.999))
+                candidatos = set()
+                for ids in listas[:total - minimo + 1]:
+                    candidatos.update(ids)
+
+            resultados = []
+            for doc_id in candidatos:
+                if candidatos is completos:
+                    acertos = total
+                else:
+                    acertos = sum(1 for ids in listas if doc_id in ids)
+                    if acertos < minimo:
+                        continue
+                nome_norm, doc_grams = self._docs[doc_id]
+                score = acertos / total
+                if termo in nome_norm:
+                    score += 1.0
+                # Desempate: nomes mais curtos (mais próximos da busca) primeiro
+                score -= len(doc_grams) * 1e-4
+                resultados.append((score, doc_id))
+
+        return [(doc_id, score) for score, doc_id in heapq.nlargest(k, resultados)]
+
+
+# Índices globais do processo (carregados sob demanda pelos controllers)
+indice_pacientes = IndiceNgram()
+indice_medicos = IndiceNgram()
@@ -0,0 +1,203 @@
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+from collections import defaultdict
+
+from sqlalchemy import event
+
+# Limites (ms) das faixas do histograma de latência; a última faixa é "acima de 1000"
+FAIXAS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# Mesma instrução repetida mais que isso numa transação é tratada como N+1
+LIMIAR_N_MAIS_1 = int(os.getenv("DB_LIMIAR_N_MAIS_1", "10"))
+
+SEM_ORIGEM = "(desconhecida)"
+
+# Frames que não identificam quem pediu a query
+_MODULOS_IGNORADOS = ("sqlalchemy", "services.instrumentacao", "contextlib", "controllers.paginacao")
+
+
+def origem_da_chamada():
+    """
+    Nome "modulo.funcao" da função de controller mais próxima na pilha
+    (ex.: "paciente_controller.get_all_pacientes"). Fora dos controllers
+    (ex.: lazy load disparado pela GUI), usa o primeiro código da aplicação.
+    """
+    frame = sys._getframe(1)
+    aplicacao = None
+    while frame is not None:
+        modulo = frame.f_globals.get("__name__", "")
+        if modulo.startswith("controllers.") and modulo != "controllers.paginacao":
+            return f"{modulo[len('controllers.'):]}.{frame.f_code.co_name}"
+        if aplicacao is None and not modulo.startswith(_MODULOS_IGNORADOS):
+            aplicacao = f"{modulo}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return aplicacao or SEM_ORIGEM
+
+
+class _Estatistica:
+    __slots__ = ("quantidade", "total_ms", "max_ms", "linhas", "faixas")
+
+    def __init__(self):
+        self.quantidade = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.linhas = 0
+        self.faixas = [0] * (len(FAIXAS_MS) + 1)
+
+    def registrar(self, duracao_ms, linhas):
+        self.quantidade += 1
+        self.total_ms += duracao_ms
+        self.max_ms = max(self.max_ms, duracao_ms)
+        if linhas > 0:
+            self.linhas += linhas
+        for i, limite in enumerate(FAIXAS_MS):
+            if duracao_ms <= limite:
+                self.faixas[i] += 1
+                break
+        else:
+            self.faixas[-1] += 1
+
+    def como_dict(self):
+        rotulos = [f"<={limite}ms" for limite in FAIXAS_MS] + [f">{FAIXAS_MS[-1]}ms"]
+        return {
+            "quantidade": self.quantidade,
+            "total_ms": round(self.total_ms, 3),
+            "media_ms": round(self.total_ms / self.quantidade, 3) if self.quantidade else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "linhas": self.linhas,
+            "histograma": dict(zip(rotulos, self.faixas)),
+        }
+
+
+class Instrumentacao:
+    """
+    Coleta, via eventos before/after_cursor_execute da engine, a latência e as
+    linhas de cada instrução SQL, agrupadas pela função de controller que a emitiu.
+    Também acusa padrões N+1: a mesma instrução repetida muitas vezes numa transação
+    (tipicamente lazy loads dentro de um laço).
+
+        instrumentacao.instalar(engine)
+        ...
+        instrumentacao.estatisticas()
+    """
+
+    def __init__(self, limiar_n_mais_1: int = LIMIAR_N_MAIS_1):
+        self.limiar_n_mais_1 = limiar_n_mais_1
+        self._lock = threading.Lock()
+        self._por_origem = defaultdict(_Estatistica)
+        self._alertas = {}   # (origem, sql) -> maior repetição vista numa transação
+        self._engines = []
+        self._dump = None
+
+    # ---------- eventos ----------
+
+    def instalar(self, engine):
+        if engine in self._engines:
+            return
+        event.listen(engine, "before_cursor_execute", self._antes)
+        event.listen(engine, "after_cursor_execute", self._depois)
+        event.listen(engine, "begin", self._inicio_transacao)
+        self._engines.append(engine)
+
+    def desinstalar(self):
+        for engine in self._engines:
+            event.remove(engine, "before_cursor_execute", self._antes)
+            event.remove(engine, "after_cursor_execute", self._depois)
+            event.remove(engine, "begin", self._inicio_transacao)
+        self._engines.clear()
+
+    def _inicio_transacao(self, conn):
+        conn.info.pop("instrumentacao_repeticoes", None)
+
+    def _antes(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("instrumentacao_inicio", []).append(time.perf_counter())
+
+    def _depois(self, conn, cursor, statement, parameters, context, executemany):
+        duracao_ms = (time.perf_counter() - conn.info["instrumentacao_inicio"].pop()) * 1000
+        origem = origem_da_chamada()
+        # rowcount só é conhecido com cursor bufferizado (padrão do mysqlconnector); -1 nos demais
+        linhas = cursor.rowcount if cursor.rowcount is not None else -1
+
+        repeticoes = conn.info.setdefault("instrumentacao_repeticoes", defaultdict(int))
+        chave = (origem, statement)
+        repeticoes[chave] += 1
+        vezes = repeticoes[chave]
+
+        with self._lock:
+            self._por_origem[origem].registrar(duracao_ms, linhas)
+            if vezes > self.limiar_n_mais_1 and not executemany:
+                self._alertas[chave] = max(vezes, self._alertas.get(chave, 0))
+
+    # ---------- API ----------
+
+    def estatisticas(self):
+        """
+        Dict origem -> {quantidade, total_ms, media_ms, max_ms, linhas, histograma},
+        da origem mais custosa para a menos.
+        """
+        with self._lock:
+            itens = sorted(self._por_origem.items(), key=lambda item: item[1].total_ms, reverse=True)
+            return {origem: est.como_dict() for origem, est in itens}
+
+    def alertas_n_mais_1(self):
+        """
+        Lista de suspeitas de N+1: (origem, sql, repetições numa mesma transação).
+        """
+        with self._lock:
+            return sorted(((o, sql, vezes) for (o, sql), vezes in self._alertas.items()),
+                          key=lambda alerta: alerta[2], reverse=True)
+
+    def total_instrucoes(self):
+        with self._lock:
+            return sum(est.quantidade for est in self._por_origem.values())
+
+    def zerar(self):
+        with self._lock:
+            self._por_origem.clear()
+            self._alertas.clear()
+
+    def relatorio(self):
+        return {
+            "gerado_em": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "por_origem": self.estatisticas(),
+            "n_mais_1": [
+                {"origem": o, "sql": sql, "repeticoes": vezes} for o, sql, vezes in self.alertas_n_mais_1()
+            ],
+        }
+
+    def salvar(self, caminho: str):
+        """
+        Grava o relatório em JSON (escrita atômica: arquivo temporário + rename).
+        """
+        temporario = caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(self.relatorio(), f, ensure_ascii=False, indent=2)
+        os.replace(temporario, caminho)
+
+    def iniciar_dump(self, caminho: str, intervalo: float = 60.0):
+        """
+        Grava o relatório em 'caminho' a cada 'intervalo' segundos (thread daemon)
+        e uma última vez ao encerrar o processo.
+        """
+        if self._dump is not None:
+            return
+        parar = threading.Event()
+
+        def laco():
+            while not parar.wait(intervalo):
+                try:
+                    self.salvar(caminho)
+                except OSError as e:
+                    print(f"Erro ao gravar estatísticas de SQL: {e}")
+
+        thread = threading.Thread(target=laco, name="instrumentacao-dump", daemon=True)
+        thread.start()
+        self._dump = (thread, parar)
+        atexit.register(self.salvar, caminho)
+
+
+instrumentacao = Instrumentacao()
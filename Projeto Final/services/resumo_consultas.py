@@ -0,0 +1,158 @@
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select, delete, insert, func, table, column, literal
+from sqlalchemy.orm import Session
+
+from models.consulta import Consulta
+from models.medico import Medico
+
+# Contagem diária de consultas por médico, clínica, especialidade e status.
+# Campos sem valor (ex.: médico apagado) ficam como 0 para fazer parte da chave primária.
+resumo_consultas_diario = table(
+    "resumo_consultas_diario",
+    column("dia"),
+    column("medico_id"),
+    column("clinica_id"),
+    column("especialidade_id"),
+    column("status"),
+    column("quantidade"),
+)
+
+CHAVE = ("dia", "medico_id", "clinica_id", "especialidade_id", "status")
+
+STATUS_PADRAO = "Agendada"
+
+
+def para_dia(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return datetime.fromisoformat(str(valor)).date()
+
+
+def _chave(dia, medico_id, clinica_id, especialidade_id, status):
+    return (para_dia(dia), medico_id or 0, clinica_id or 0, especialidade_id or 0, status or STATUS_PADRAO)
+
+
+def ajustar(db: Session, deltas: Counter):
+    """
+    Soma os deltas {chave: +n/-n} ao resumo com um único upsert.
+    Não faz commit: deve rodar na mesma transação da alteração em consulta.
+    """
+    linhas = [dict(zip(CHAVE, chave), quantidade=n) for chave, n in deltas.items() if n]
+    if not linhas:
+        return
+    tabela = resumo_consultas_diario
+    if db.get_bind().dialect.name == "mysql":
+        from sqlalchemy.dialects.mysql import insert as insert_dialeto
+
+        query = insert_dialeto(tabela).values(linhas)
+        query = query.on_duplicate_key_update(quantidade=tabela.c.quantidade + query.inserted.quantidade)
+    else:
+        from sqlalchemy.dialects.sqlite import insert as insert_dialeto
+
+        query = insert_dialeto(tabela).values(linhas)
+        query = query.on_conflict_do_update(
+            index_elements=list(CHAVE), set_={"quantidade": tabela.c.quantidade + query.excluded.quantidade}
+        )
+    db.execute(query)
+
+
+def _especialidades(db: Session, medico_ids):
+    ids = {m for m in medico_ids if m}
+    if not ids:
+        return {}
+    return dict(db.execute(select(Medico.id, Medico.especialidade_id).where(Medico.id.in_(ids))).all())
+
+
+def registrar(db: Session, consultas, sinal: int = 1):
+    """
+    Conta (+1) ou desconta (sinal=-1) consultas no resumo. Cada item tem
+    medico_id, clinica_id, data_consulta e status (dict ou objeto).
+    """
+    itens = [c if isinstance(c, dict) else {
+        "medico_id": c.medico_id, "clinica_id": c.clinica_id,
+        "data_consulta": c.data_consulta, "status": c.status,
+    } for c in consultas]
+    especialidades = _especialidades(db, (c["medico_id"] for c in itens))
+    deltas = Counter()
+    for c in itens:
+        deltas[_chave(c["data_consulta"], c["medico_id"], c["clinica_id"],
+                      especialidades.get(c["medico_id"]), c.get("status"))] += sinal
+    ajustar(db, deltas)
+
+
+def contagem(db: Session, *criterios, travar: bool = False):
+    """
+    Contagem atual, por chave do resumo, das consultas que atendem aos critérios
+    (imagem "antes" de uma alteração em massa). Com travar=True, usa SELECT ... FOR UPDATE.
+    """
+    query = (
+        select(
+            func.date(Consulta.data_consulta), Consulta.medico_id, Consulta.clinica_id,
+            Medico.especialidade_id, Consulta.status, func.count(),
+        )
+        .outerjoin(Medico, Consulta.medico_id == Medico.id)
+        .where(*criterios)
+        .group_by(func.date(Consulta.data_consulta), Consulta.medico_id, Consulta.clinica_id,
+                  Medico.especialidade_id, Consulta.status)
+    )
+    if travar:
+        query = query.with_for_update(of=Consulta)
+    contagens = Counter()
+    for linha in db.execute(query):
+        contagens[_chave(*linha[:5])] += linha[5]
+    return contagens
+
+
+def mover(db: Session, antes: Counter, **novos):
+    """
+    Passa as contagens 'antes' (de contagem()) para as chaves com os campos de
+    'novos' trocados, ex.: especialidade_id=3 quando o médico muda de especialidade,
+    ou medico_id=None, especialidade_id=None quando ele é apagado. Não faz commit.
+    """
+    deltas = Counter()
+    for chave, n in antes.items():
+        deltas[chave] -= n
+        deltas[_chave(*(novos.get(campo, valor) for campo, valor in zip(CHAVE, chave)))] += n
+    ajustar(db, deltas)
+
+
+def reconstruir(db: Session, desde: date = None, ate: date = None):
+    """
+    Recalcula o resumo a partir de consulta (todo o histórico ou só o período,
+    datas inclusivas). Usar depois de cargas feitas fora dos controllers
+    (importações, gerar_dados.py) ou de alterações direto no banco. Faz commit.
+    Retorna a quantidade de linhas gravadas no resumo.
+    """
+    tabela = resumo_consultas_diario
+    apagar = delete(tabela)
+    filtros = []
+    if desde:
+        apagar = apagar.where(tabela.c.dia >= desde)
+        filtros.append(Consulta.data_consulta >= datetime.combine(desde, datetime.min.time()))
+    if ate:
+        apagar = apagar.where(tabela.c.dia <= ate)
+        filtros.append(Consulta.data_consulta < datetime.combine(ate + timedelta(days=1), datetime.min.time()))
+
+    dia = func.date(Consulta.data_consulta)
+    agregado = (
+        select(
+            dia,
+            func.coalesce(Consulta.medico_id, 0),
+            func.coalesce(Consulta.clinica_id, 0),
+            func.coalesce(Medico.especialidade_id, 0),
+            func.coalesce(Consulta.status, literal(STATUS_PADRAO)),
+            func.count(),
+        )
+        .outerjoin(Medico, Consulta.medico_id == Medico.id)
+        .where(*filtros)
+        .group_by(dia, func.coalesce(Consulta.medico_id, 0), func.coalesce(Consulta.clinica_id, 0),
+                  func.coalesce(Medico.especialidade_id, 0), func.coalesce(Consulta.status, literal(STATUS_PADRAO)))
+    )
+    db.execute(apagar)
+    resultado = db.execute(insert(tabela).from_select(list(CHAVE) + ["quantidade"], agregado))
+    db.commit()
+    return resultado.rowcount
@@ -1,9 +1,50 @@
-from config.db import SessionLocal
+import argparse
+
+from sqlalchemy import select, literal
+
+from config.db import SessionLocal, roteador, leitura_em_replica
+
+
+def _nome(engine):
+    return engine.url.render_as_string(hide_password=True)
+
+
+def testar_roteamento():
+    """
+    Mostra para qual banco vai cada tipo de leitura com DATABASE_REPLICA_URLS
+    (ver README, "Réplicas de leitura em ambiente local").
+    """
+    if roteador is None:
+        print("Sem DATABASE_REPLICA_URLS: todas as leituras vão para o primário.")
+        return
+    print(f"Réplicas no rodízio: {roteador.verificar()} de {len(roteador.replicas)}")
+    leitura = select(literal(1))
+    db = SessionLocal()
+    try:
+        with leitura_em_replica(db):
+            db.execute(leitura)
+            print(f"Leitura @somente_leitura   -> {_nome(db.get_bind(clause=leitura))}")
+        print(f"Leitura comum              -> {_nome(db.get_bind(clause=leitura))}")
+        print(f"SELECT ... FOR UPDATE      -> {_nome(db.get_bind(clause=leitura.with_for_update()))}")
+        with leitura_em_replica(db):
+            print(f"@somente_leitura depois    -> {_nome(db.get_bind(clause=leitura))}")
+    finally:
+        db.close()
+
+
+parser = argparse.ArgumentParser(description="Testa a conexão com o banco")
+parser.add_argument("--roteamento", action="store_true",
+                    help="Mostra como as leituras são divididas entre o primário e as réplicas")
+args = parser.parse_args()
 
 try:
     db = SessionLocal()
+    db.execute(select(literal(1)))
     print("✅ Conexão com o banco de dados bem-sucedida!")
 except Exception as e:
     print("❌ Erro ao conectar:", e)
 finally:
     db.close()
+
+if args.roteamento:
+    testar_roteamento()
@@ -13,13 +13,17 @@ CREATE TABLE paciente (
     cpf VARCHAR(14) UNIQUE NOT NULL,
     data_nascimento DATE,
     telefone VARCHAR(25),
-    email VARCHAR(100)
+    email VARCHAR(100),
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    versao INT NOT NULL DEFAULT 1,
+    INDEX idx_paciente_atualizado_em (atualizado_em)
 );
 
 -- Criação da tabela Especialidade (deve ser criada antes de médico)
 CREATE TABLE especialidade (
     id INT AUTO_INCREMENT PRIMARY KEY,
-    nome VARCHAR(100) NOT NULL
+    nome VARCHAR(100) NOT NULL,
+    versao INT NOT NULL DEFAULT 1
 );
 
 -- Tabela Médico com chave estrangeira para especialidade
@@ -28,6 +32,7 @@ CREATE TABLE medico (
     nome VARCHAR(100) NOT NULL,
     crm VARCHAR(20) UNIQUE NOT NULL,
     especialidade_id INT,
+    versao INT NOT NULL DEFAULT 1,
     CONSTRAINT fk_medico_especialidade FOREIGN KEY (especialidade_id) REFERENCES especialidade(id)
         ON DELETE SET NULL ON UPDATE CASCADE
 );
@@ -41,9 +46,28 @@ CREATE TABLE clinica (
 
 CREATE TABLE log_delecao_paciente (
     id INT AUTO_INCREMENT PRIMARY KEY,
+    paciente_id INT,
     nome VARCHAR(255),
     cpf VARCHAR(20),
-    data_hora TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    data_hora TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_log_delecao_data_hora (data_hora)
+);
+
+-- Criações e alterações de paciente, médico e consulta, gravadas em lote pela
+-- aplicação (services/auditoria.py). Uma partição por mês: a retenção descarta
+-- partições inteiras (auditoria.py --manter) em vez de apagar linha a linha.
+CREATE TABLE log_auditoria (
+    id BIGINT AUTO_INCREMENT,
+    data_hora DATETIME(6) NOT NULL,
+    tabela VARCHAR(30) NOT NULL,
+    registro_id INT,
+    operacao VARCHAR(12) NOT NULL,
+    dados JSON,
+    PRIMARY KEY (id, data_hora),
+    INDEX idx_log_auditoria_registro (tabela, registro_id, data_hora)
+)
+PARTITION BY RANGE COLUMNS (data_hora) (
+    PARTITION p_futuro VALUES LESS THAN (MAXVALUE)
 );
 
 
@@ -56,6 +80,10 @@ CREATE TABLE consulta (
     data_consulta DATETIME NOT NULL,
     status VARCHAR(20) DEFAULT 'Agendada',
     observacoes TEXT,
+    versao INT NOT NULL DEFAULT 1,
+    INDEX idx_consulta_data (data_consulta),
+    INDEX idx_consulta_medico_data (medico_id, data_consulta),
+    INDEX idx_consulta_paciente_data (paciente_id, data_consulta),
     CONSTRAINT fk_consulta_paciente FOREIGN KEY (paciente_id) REFERENCES paciente(id)
         ON DELETE CASCADE ON UPDATE CASCADE,
     CONSTRAINT fk_consulta_medico FOREIGN KEY (medico_id) REFERENCES medico(id)
@@ -74,6 +102,44 @@ CREATE TABLE receita_medica (
         ON DELETE CASCADE ON UPDATE CASCADE
 );
 
+-- Consultas futuras já com os nomes (substitui o JOIN de vw_consultas_futuras nas
+-- leituras). Mantida pelos controllers; as que passaram são expiradas pela aplicação.
+CREATE TABLE consulta_futura (
+    consulta_id INT PRIMARY KEY,
+    data_consulta DATETIME NOT NULL,
+    paciente VARCHAR(100),
+    medico VARCHAR(100),
+    especialidade VARCHAR(100),
+    clinica VARCHAR(100),
+    status VARCHAR(20),
+    paciente_id INT,
+    medico_id INT,
+    clinica_id INT,
+    especialidade_id INT,
+    INDEX idx_consulta_futura_data (data_consulta, consulta_id),
+    INDEX idx_consulta_futura_paciente (paciente_id),
+    INDEX idx_consulta_futura_medico (medico_id),
+    INDEX idx_consulta_futura_especialidade (especialidade_id),
+    CONSTRAINT fk_consulta_futura_consulta FOREIGN KEY (consulta_id) REFERENCES consulta(id)
+        ON DELETE CASCADE
+);
+
+-- Resumo diário de consultas para relatórios (mantido pelos controllers;
+-- recalculável com "python resumo_consultas.py --reconstruir").
+-- Campos sem valor são gravados como 0 para fazer parte da chave primária.
+CREATE TABLE resumo_consultas_diario (
+    dia DATE NOT NULL,
+    medico_id INT NOT NULL DEFAULT 0,
+    clinica_id INT NOT NULL DEFAULT 0,
+    especialidade_id INT NOT NULL DEFAULT 0,
+    status VARCHAR(20) NOT NULL,
+    quantidade INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (dia, medico_id, clinica_id, especialidade_id, status),
+    INDEX idx_resumo_medico_dia (medico_id, dia),
+    INDEX idx_resumo_clinica_dia (clinica_id, dia),
+    INDEX idx_resumo_especialidade_dia (especialidade_id, dia)
+);
+
 -- ========================
 -- VIEW – Consultas futuras com detalhes
 -- ========================
@@ -147,11 +213,11 @@ DELIMITER ;
 DELIMITER //
 
 CREATE TRIGGER after_delete_paciente
-AFTER DELETE ON pacientes
+AFTER DELETE ON paciente
 FOR EACH ROW
 BEGIN
-    INSERT INTO log_delecao_paciente (nome, cpf)
-    VALUES (OLD.nome, OLD.cpf);
+    INSERT INTO log_delecao_paciente (paciente_id, nome, cpf)
+    VALUES (OLD.id, OLD.nome, OLD.cpf);
 END //
 
 DELIMITER ;
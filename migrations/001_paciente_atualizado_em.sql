@@ -0,0 +1,30 @@
+-- ========================
+-- MIGRAÇÃO 001 – Alterações incrementais de pacientes
+-- Para bancos criados com uma versão anterior de Trabalho-BancoII.sql
+-- ========================
+USE projeto_final;
+
+-- Marca d'água de atualização (usada por get_alteracoes_pacientes)
+ALTER TABLE paciente
+    ADD COLUMN atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    ADD INDEX idx_paciente_atualizado_em (atualizado_em);
+
+-- O log de deleção passa a guardar o id, para as telas removerem o paciente da lista
+ALTER TABLE log_delecao_paciente
+    ADD COLUMN paciente_id INT AFTER id,
+    ADD INDEX idx_log_delecao_data_hora (data_hora);
+
+-- O trigger original apontava para a tabela "pacientes", que não existe
+DROP TRIGGER IF EXISTS after_delete_paciente;
+
+DELIMITER //
+
+CREATE TRIGGER after_delete_paciente
+AFTER DELETE ON paciente
+FOR EACH ROW
+BEGIN
+    INSERT INTO log_delecao_paciente (paciente_id, nome, cpf)
+    VALUES (OLD.id, OLD.nome, OLD.cpf);
+END //
+
+DELIMITER ;
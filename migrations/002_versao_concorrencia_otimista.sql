@@ -0,0 +1,11 @@
+-- ========================
+-- MIGRAÇÃO 002 – Controle de concorrência otimista
+-- Cada UPDATE incrementa 'versao'; quem editou a partir de uma versão antiga
+-- não sobrescreve a alteração de outro usuário (ver controllers/atualizacao.py)
+-- ========================
+USE projeto_final;
+
+ALTER TABLE paciente ADD COLUMN versao INT NOT NULL DEFAULT 1;
+ALTER TABLE especialidade ADD COLUMN versao INT NOT NULL DEFAULT 1;
+ALTER TABLE medico ADD COLUMN versao INT NOT NULL DEFAULT 1;
+ALTER TABLE consulta ADD COLUMN versao INT NOT NULL DEFAULT 1;
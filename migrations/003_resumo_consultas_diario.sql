@@ -0,0 +1,21 @@
+-- ========================
+-- MIGRAÇÃO 003 – Resumo diário de consultas para relatórios
+-- Depois de criar a tabela, preencha com: python resumo_consultas.py --reconstruir
+-- ========================
+USE projeto_final;
+
+-- Resumo diário de consultas para relatórios (mantido pelos controllers;
+-- recalculável com "python resumo_consultas.py --reconstruir").
+-- Campos sem valor são gravados como 0 para fazer parte da chave primária.
+CREATE TABLE resumo_consultas_diario (
+    dia DATE NOT NULL,
+    medico_id INT NOT NULL DEFAULT 0,
+    clinica_id INT NOT NULL DEFAULT 0,
+    especialidade_id INT NOT NULL DEFAULT 0,
+    status VARCHAR(20) NOT NULL,
+    quantidade INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (dia, medico_id, clinica_id, especialidade_id, status),
+    INDEX idx_resumo_medico_dia (medico_id, dia),
+    INDEX idx_resumo_clinica_dia (clinica_id, dia),
+    INDEX idx_resumo_especialidade_dia (especialidade_id, dia)
+);
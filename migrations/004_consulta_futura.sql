@@ -0,0 +1,41 @@
+-- ========================
+-- MIGRAÇÃO 004 – Consultas futuras materializadas
+-- ========================
+USE projeto_final;
+
+ALTER TABLE consulta ADD INDEX idx_consulta_data (data_consulta);
+
+-- Consultas futuras já com os nomes (substitui o JOIN de vw_consultas_futuras nas
+-- leituras). Mantida pelos controllers; as que passaram são expiradas pela aplicação.
+CREATE TABLE consulta_futura (
+    consulta_id INT PRIMARY KEY,
+    data_consulta DATETIME NOT NULL,
+    paciente VARCHAR(100),
+    medico VARCHAR(100),
+    especialidade VARCHAR(100),
+    clinica VARCHAR(100),
+    status VARCHAR(20),
+    paciente_id INT,
+    medico_id INT,
+    clinica_id INT,
+    especialidade_id INT,
+    INDEX idx_consulta_futura_data (data_consulta, consulta_id),
+    INDEX idx_consulta_futura_paciente (paciente_id),
+    INDEX idx_consulta_futura_medico (medico_id),
+    INDEX idx_consulta_futura_especialidade (especialidade_id),
+    CONSTRAINT fk_consulta_futura_consulta FOREIGN KEY (consulta_id) REFERENCES consulta(id)
+        ON DELETE CASCADE
+);
+
+-- Carga inicial (o mesmo que services/consultas_futuras.reconstruir)
+INSERT INTO consulta_futura
+    (consulta_id, data_consulta, paciente, medico, especialidade, clinica, status,
+     paciente_id, medico_id, clinica_id, especialidade_id)
+SELECT c.id, c.data_consulta, p.nome, m.nome, e.nome, cl.nome, c.status,
+       c.paciente_id, c.medico_id, c.clinica_id, m.especialidade_id
+FROM consulta c
+LEFT JOIN paciente p ON c.paciente_id = p.id
+LEFT JOIN medico m ON c.medico_id = m.id
+LEFT JOIN especialidade e ON m.especialidade_id = e.id
+LEFT JOIN clinica cl ON c.clinica_id = cl.id
+WHERE c.data_consulta >= NOW();
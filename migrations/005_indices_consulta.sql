@@ -0,0 +1,18 @@
+-- ========================
+-- MIGRAÇÃO 005 – Índices compostos em consulta
+-- Escolhidos com analisar_indices.py (EXPLAIN das consultas dos controllers);
+-- a mesma ferramenta mostra quais consultas usam cada índice.
+--
+-- idx_consulta_medico_data: agenda e conflitos de horário do médico,
+--   cancelar_consultas_do_medico e atualização de consulta_futura por médico.
+-- idx_consulta_paciente_data: consultas do paciente já em ordem de data
+--   (sem filesort) e exclusão de pacientes.
+--
+-- Os índices criados automaticamente pelo InnoDB para fk_consulta_medico e
+-- fk_consulta_paciente ficam redundantes e são descartados pelo próprio MySQL.
+-- ========================
+USE projeto_final;
+
+ALTER TABLE consulta
+    ADD INDEX idx_consulta_medico_data (medico_id, data_consulta),
+    ADD INDEX idx_consulta_paciente_data (paciente_id, data_consulta);
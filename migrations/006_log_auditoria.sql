@@ -0,0 +1,26 @@
+-- ========================
+-- MIGRAÇÃO 006 – Log de auditoria
+-- Criações e alterações de paciente, médico e consulta, gravadas em lote pela
+-- aplicação (services/auditoria.py), sem INSERT síncrono em cada escrita.
+-- Particionada por mês: depois de criar a tabela, rode
+--     python auditoria.py --manter
+-- (e agende mensalmente) para criar as partições dos próximos meses e
+-- descartar as que passaram da retenção.
+-- ========================
+USE projeto_final;
+
+-- A chave primária inclui data_hora porque toda chave única de uma tabela
+-- particionada precisa conter a coluna de particionamento
+CREATE TABLE log_auditoria (
+    id BIGINT AUTO_INCREMENT,
+    data_hora DATETIME(6) NOT NULL,
+    tabela VARCHAR(30) NOT NULL,
+    registro_id INT,
+    operacao VARCHAR(12) NOT NULL,
+    dados JSON,
+    PRIMARY KEY (id, data_hora),
+    INDEX idx_log_auditoria_registro (tabela, registro_id, data_hora)
+)
+PARTITION BY RANGE COLUMNS (data_hora) (
+    PARTITION p_futuro VALUES LESS THAN (MAXVALUE)
+);